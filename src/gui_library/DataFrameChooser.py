@@ -1,30 +1,52 @@
 import tkinter
 from dataclasses import dataclass, field
+from uuid import uuid4
 
 import polars
 
 from gui_library.DataFrameViewer import DataFrameViewerApp
+from gui_library.formatting import DisplayCache
 
 
 @dataclass
 class ChooserModel:
     df: polars.DataFrame = field(init=True, default_factory=polars.DataFrame)
+    index: dict[str, int] = field(init=False, default_factory=dict)
+    value_columns: list[str] = field(init=False, default_factory=list)
+    # Values read as the viewer shows them, toggles only format the rows they flip
+    display: DisplayCache = field(default_factory=DisplayCache)
 
     def __post_init__(self):
+        if "iid" not in self.df.columns:
+            self.df = self.df.insert_column(0, polars.Series("iid", [str(uuid4()) for _ in range(self.df.shape[0])]))
+
         if "selected" not in self.df.columns:
             self.df = self.df.with_columns(polars.lit(False).alias("selected"))
 
+        # Rows never move in the model, so each iid's position is looked up once
+        self.index = {iid: row for row, iid in enumerate(self.df.get_column("iid").to_list())}
+
+        # The Treeview shows the first remaining column as its text and the rest as values
+        self.value_columns = [column for column in self.df.columns if column not in ("iid", "parent", "tag")][1:]
+
+    def rows(self, iids: tuple[str, ...]) -> polars.Series:
+        return polars.Series("row", [self.index[iid] for iid in iids], dtype=polars.UInt32)
+
     def select(self, iids: tuple[str, ...]):
-        data: list = list()
-        for row in self.df.iter_rows(named=True):
-            if row["iid"] in iids:
-                row["selected"] = not row["selected"]
-            data.append(row)
+        rows = self.rows(iids)
+        selected = self.df.get_column("selected")
+        df = self.df.with_columns(selected.scatter(rows, ~selected.gather(rows)))
+        self.display.edited(self.df, df, rows, ["selected"])
+        self.df = df
 
-        self.df = polars.DataFrame(data)
+    def selected(self, iids: tuple[str, ...]) -> list[bool]:
+        return self.df.get_column("selected").gather(self.rows(iids)).to_list()
 
     def get_values(self, iid: str) -> tuple:
-        return self.df.filter(polars.col("iid") == iid).drop(["iid", "treepath", "parent"])[0].row()[1:]
+        return self.get_values_batch((iid,))[0]
+
+    def get_values_batch(self, iids: tuple[str, ...]) -> list[tuple]:
+        return self.display.gather(self.df, self.value_columns, self.rows(iids)).rows()
 
 
 @dataclass
@@ -49,13 +71,13 @@ class ChooserController:
         self.viewer.dfv.dfv.treeview.bind("<Double-Button-1>", self.select)
 
     def select(self, event: tkinter.Event):
-        selections: tuple = self.viewer.dfv.dfv.treeview.selection()
+        dfv = self.viewer.dfv.dfv
+        selections: tuple = dfv.treeview.selection()
         self.model.select(selections)
 
-        for selection in selections:
-            self.viewer.dfv.dfv.treeview.item(selection, values=self.model.get_values(selection))
-
-        self.viewer.df = self.model.df
+        # Written into the viewer's frame by column, so filters and sorts see them, but outside its edit journal:
+        # undo only reverts cells the user typed, and the toggles stay in step with this model
+        dfv.write_values("selected", list(selections), self.model.selected(selections))
 
     def report(self):
         return list(self.model.df.filter(polars.col("selected")).get_column("iid"))
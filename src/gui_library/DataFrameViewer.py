@@ -1,55 +1,133 @@
+from functools import partial
 from tkinter import BooleanVar, Checkbutton, Event, EventType, Tk, font
-from tkinter.constants import CENTER, END, E, W
-from tkinter.ttk import Entry, Frame, Scrollbar, Treeview
-from typing import Any, Callable, Literal, TypeAlias
+from tkinter.constants import CENTER, E, W
+from tkinter.ttk import Entry, Frame, Scrollbar, Style, Treeview
+from typing import Any, Callable
 from uuid import uuid4
 
 import polars
-from treelib.node import Node
-from treelib.tree import Tree
 
+from gui_library.autofit import column_widths, measurer
+from gui_library.columns import DEFAULT_WIDTH, ColumnWindow
+from gui_library.edits import EditBatch
+from gui_library.formatting import DisplayCache, DisplayFormat
+from gui_library.grouping import Grouping, checked_aggregates
+from gui_library.hierarchy import Hierarchy
+from gui_library.model import (
+    Appended,
+    DataFrameViewerFilterTypes,
+    FilterModel,
+    PreparedData,
+    SortedRows,
+    ViewerModel,
+    ViewRows,
+    collected,
+    empty_positions,
+    with_identities,
+)
+from gui_library.search import SearchIndex
+from gui_library.selection import SelectionModel
+from gui_library.sorting import SortKey
+from gui_library.spans import SPANS, timed
+from gui_library.sources import DataSource, LazyRows, RowView, open_source, with_row_iids
+from gui_library.spill import SpillStore
 from gui_library.StatusBar import StatusBar
-
-DataFrameViewerFilterTypes: TypeAlias = Literal["all", "by_column"]
+from gui_library.treeview_sync import HIDDEN_COLUMNS, TreeviewSync
+from gui_library.viewport import Viewport
+from gui_library.worker import BackgroundWorker, Batcher, ChunkedTask, Debouncer
 
 DATAFRAMEFILTER_FILTER_UPDATED = "<<DataFrameViewerFilter-FilterUpdate>>"
+DATAFRAMEFILTER_HIERARCHY_PROBLEM = "<<DataFrameViewerFilter-HierarchyProblem>>"
+DATAFRAMEVIEWER_BUSY = "<<DataFrameViewer-Busy>>"
+DATAFRAMEVIEWER_IDLE = "<<DataFrameViewer-Idle>>"
+DATAFRAMEVIEWER_SELECTION_CHANGED = "<<DataFrameViewer-SelectionChanged>>"
+DATAFRAMEVIEWER_EDITED = "<<DataFrameViewer-Edited>>"
+
+# Appended rows are added together, at most once every this many milliseconds
+APPEND_INTERVAL = 50
 
 
 class DataFrameViewer(Frame):
     def __init__(
         self,
         parent,
-        df: polars.DataFrame = polars.DataFrame(),
+        df: polars.DataFrame | polars.LazyFrame | LazyRows | RowView = polars.DataFrame(),
         iids: list | None = None,
         parents: list | None = None,
         callback: Callable[[int, int, str], None] | None = None,
+        on_message: Callable[[str], None] | None = None,
+        virtual: bool = False,
+        overscan: int = 20,
+        worker: BackgroundWorker | None = None,
+        release_closed: bool = False,
+        on_edit: Callable[[EditBatch], None] | None = None,
+        max_rows: int | None = None,
+        display: DisplayCache | None = None,
     ):
         super().__init__(parent)
 
+        if not isinstance(df, polars.DataFrame) and not virtual:
+            raise ValueError("lazy sources can only be shown with virtual=True")
+
         self.parent = parent
         self.iids = iids
         self.callback = callback
-        self.df = df
-        self.columns_to_drop = {"iid", "parent", "tag"}
-        self.drop_columns = self.columns_to_drop.intersection(set(self.df.columns))
-        self.df_dropped_columns = self.df.drop(self.drop_columns)
-        self.sort: dict[str, bool] = {column: False for column in self.df.columns}
+        # Errors and notices, shown where callback's progress would be cleared away
+        self.on_message = on_message
+        self.virtual = virtual
+        self.release_closed = release_closed
+        self.on_edit = on_edit
+        self.max_rows = max_rows
+        self.appends = Batcher(self, APPEND_INTERVAL, self.flush_appends)
+        # Key columns and aggregates of the grouping shown instead of the rows, if any
+        self.grouped: tuple[list[str], dict[str, str]] | None = None
+        self.group_tree: GroupTree | None = None
+        self.worker = worker if worker is not None else BackgroundWorker(self, synchronous=True)
+        # Display strings are made once per frame and column, for the Treeview and autofit alike
+        self.display = display if display is not None else DisplayCache()
+        self.viewport = Viewport(overscan=overscan)
+        self.model = ViewerModel(virtual=virtual, df=polars.DataFrame(schema=df.collect_schema()), display=self.display)
+        self.realized_rows: dict[str, int] = dict()
+        self.realized_positions = empty_positions()
+        self.focus_iid: str | None = None
+        self.focus_row: int | None = None
+        self.flush_id: str | None = None
+        # Hierarchies only get their roots inserted, children follow when their parent is first opened
+        self.sync = TreeviewSync(keep_detached=not virtual, lazy=not virtual, display=self.display)
+        self.rendering: ChunkedTask | None = None
+        self.partial = False
+        self.display_columns: list[str] = list()
+        self.heading_font: font.Font | None = None
+        # Measures of the body and heading fonts, for the font configuration they were made with
+        self.measures: tuple[Any, Callable[[str], int], Callable[[str], int]] | None = None
+        self.autofit_sample: int | None = None
+        # Only the columns in this window are formatted into items, wide frames are scrolled a few columns at a time
+        self.column_window = ColumnWindow()
+        self.df_dropped_columns = self.model.sample()
 
         self.make_widgets()
         self.make_bindings()
+        self.column_window.resize(self.winfo_screenwidth())
 
         self.update_data(df=df)
-        self.autoalign_columns()
-        self.autofit_columns()
 
     def make_widgets(self):
         self.scrollbar = Scrollbar(self, orient="vertical")
 
-        self.treeview = Treeview(self, yscrollcommand=self.scrollbar.set)
-        self.treeview.grid(row=0, column=0, rowspan=1, columnspan=1, padx=0, pady=0, sticky="nsew")
+        # In virtual mode the scrollbar tracks the row offset into self.df, not the realized Treeview items
+        if self.virtual:
+            self.treeview = Treeview(self)
+            self.scrollbar.configure(command=self.yview)
+        else:
+            self.treeview = Treeview(self, yscrollcommand=self.scrollbar.set)
+            self.scrollbar.configure(command=self.treeview.yview)
 
-        self.scrollbar.configure(command=self.treeview.yview)
+        # Scrolls the column window rather than the Treeview, which only holds the columns on screen
+        self.xscrollbar = Scrollbar(self, orient="horizontal", command=self.xview)
+
+        self.treeview.grid(row=0, column=0, rowspan=1, columnspan=1, padx=0, pady=0, sticky="nsew")
         self.scrollbar.grid(row=0, column=1, rowspan=2, columnspan=1, padx=0, pady=0, sticky="nsew")
+        self.xscrollbar.grid(row=1, column=0, rowspan=1, columnspan=1, padx=0, pady=0, sticky="nsew")
 
         self.rowconfigure(0, weight=1)
         self.columnconfigure(0, weight=1)
@@ -57,99 +135,478 @@ class DataFrameViewer(Frame):
     def make_bindings(self):
         self.treeview.bind("<Shift-Down>", self.treeview_shift_down)
         self.treeview.bind("<Shift-Up>", self.treeview_shift_up)
+        self.treeview.bind("<Shift-Button-1>", self.treeview_shift_click)
+        self.treeview.bind("<Control-Button-1>", self.treeview_control_click)
+        self.treeview.bind("<<TreeviewSelect>>", self.on_treeview_select)
+        self.treeview.bind("<Control-z>", self.undo)
+        self.treeview.bind("<Control-y>", self.redo)
+        self.treeview.bind("<Configure>", self.on_configure)
+        self.treeview.bind("<Shift-MouseWheel>", self.on_shift_mousewheel)
+        self.treeview.bind("<Shift-Button-4>", self.on_shift_mousewheel)
+        self.treeview.bind("<Shift-Button-5>", self.on_shift_mousewheel)
+
+        if self.virtual:
+            self.treeview.bind("<MouseWheel>", self.on_mousewheel)
+            self.treeview.bind("<Button-4>", self.on_mousewheel)
+            self.treeview.bind("<Button-5>", self.on_mousewheel)
+            self.treeview.bind("<Down>", lambda event: self.move_focus(1))
+            self.treeview.bind("<Up>", lambda event: self.move_focus(-1))
+            self.treeview.bind("<Next>", lambda event: self.move_focus(self.viewport.height))
+            self.treeview.bind("<Prior>", lambda event: self.move_focus(-self.viewport.height))
+            self.treeview.bind("<Home>", lambda event: self.move_focus(-self.viewport.total))
+            self.treeview.bind("<End>", lambda event: self.move_focus(self.viewport.total))
+        else:
+            self.treeview.bind("<<TreeviewOpen>>", self.on_treeview_open)
+            self.treeview.bind("<<TreeviewClose>>", self.on_treeview_close)
 
     def clear(self):
-        self.treeview.delete(*self.treeview.get_children())
+        self.cancel_render()
+        self.sync.clear(self.treeview)
+        self.realized_rows = dict()
+
+    @property
+    def df(self) -> ViewRows:
+        return self.model.df
+
+    @property
+    def selection_model(self) -> SelectionModel:
+        return self.model.selection
 
     def get_dataframe_copy(self):
-        return self.df.clone()
+        return self.model.dataframe_copy()
+
+    @timed(rows=lambda self, df: getattr(df, "height", None))
+    def update_data(self, df: ViewRows | polars.LazyFrame):
+        if not self.virtual and isinstance(df, (polars.LazyFrame, LazyRows)):
+            raise TypeError("lazy sources can only be shown with virtual=True")
+
+        self.worker.cancel("sort")
+        if not self.model.load(df):
+            self.cancel_render()
+            # Detach rather than delete, so the items can be re-attached when the rows come back
+            self.sync.update(self.treeview, self.df)
+            self.realized_rows = dict()
+            if self.virtual:
+                self.viewport.resize(total=0)
+                self.viewport.invalidate()
+                self.scrollbar.set(*self.viewport.fractions())
+            return
+
+        self.df_dropped_columns = self.model.sample()
+
+        if self.df_dropped_columns.columns != self.display_columns:
+            self.display_columns = self.df_dropped_columns.columns
+            self.clear()
+            self.column_window.reset(self.display_columns)
 
-    def update_data(self, df: polars.DataFrame):
-        self.clear()
+        self.update_columns(refit=True)
+        self.render()
 
-        if df.is_empty():
+        if self.model.sort_pending():
+            self.submit_sort(self.model.sort_keys)
+
+        if self.grouped is not None:
+            # Frames without the key or aggregate columns show their rows
+            try:
+                self.group_by(*self.grouped)
+            except ValueError as error:
+                self.ungroup()
+                self.show_grouping_error(error)
+
+    def render(self):
+        if self.virtual:
+            self.update_window()
+        else:
+            # Large frames are inserted a few milliseconds at a time so the window stays responsive while they load
+            self.cancel_render()
+            self.rendering = ChunkedTask(
+                self,
+                self.sync.steps(self.treeview, self.df, open_paths=self.model.filtered, source=self.model.source()),
+                on_progress=self.report_progress,
+                on_done=self.finish_render,
+            )
+            self.rendering.start(synchronous=self.worker.synchronous)
+
+    def destroy(self):
+        # Chunks still scheduled must not run against destroyed widgets
+        self.callback = None
+        self.cancel_render()
+        self.cancel_flush()
+        self.appends.cancel()
+        self.worker.cancel("group")
+        super().destroy()
+
+    def report_progress(self, numerator: int, denominator: int):
+        if self.callback:
+            self.callback(numerator, denominator, "Updating Treeview")
+
+    def finish_render(self, completed: bool):
+        task, self.rendering = self.rendering, None
+        self.partial = not completed
+        if task is not None and self.callback:
+            message = "Finished Updating Treeview" if completed else "Cancelled Updating Treeview"
+            self.callback(task.total, task.total, message)
+
+        # Selections made while rows were still being inserted, or under items that were just opened, are applied
+        # to the rows that made it in
+        if self.model.selection.count or self.treeview.selection():
+            self.show_selection()
+
+    def show_selection(self):
+        # A lazy hierarchy only holds the children of opened items, a partial render the rows it got to
+        selected = self.model.selected_rows().get_column("iid")
+        if self.partial or self.sync.lazy:
+            selected = selected.filter(selected.is_in(self.sync.attached().implode()))
+        self.treeview.selection_set(selected.to_list())
+
+    def cancel_render(self):
+        if self.rendering is not None:
+            self.rendering.cancel()
+
+    def update_headings(self):
+        keys = {column: (i, descending) for i, (column, descending) in enumerate(self.model.sort_keys)}
+        for column in self.column_window.projection():
+            text = column
+            if column in keys:
+                position, descending = keys[column]
+                text = f"{column} {'▼' if descending else '▲'}"
+                if len(keys) > 1:
+                    text = f"{text}{position + 1}"
+
+            self.treeview.heading(self.column_id(column), text=text)
+
+    def column_id(self, column: str) -> str:
+        return "#0" if column == self.column_window.tree_column else column
+
+    def displayed_columns(self) -> list[str]:
+        # By position, as Tk numbers the columns it shows
+        return [self.column_window.tree_column, *self.column_window.displayed()] if self.display_columns else list()
+
+    def update_columns(self, refit: bool = False):
+        # Scrolling within the projected columns, hiding and moving them only changes the Treeview's displaycolumns.
+        # Past them the projection moves: the Treeview gets the new columns and its items new values, in place.
+        window = self.column_window
+        projecting, fit = refit or window.needs_projection(), refit
+        projected = projecting
+        while projecting:
+            window.project()
+            columns = window.projection()
+            if columns != self.sync.projection:
+                # Tk resets the options of every column when the columns change
+                self.sync.project(self.treeview, columns)
+                self.treeview["columns"] = columns[1:]
+                self.configure_columns(columns)
+
+            self.autofit_columns(columns if fit else [column for column in columns if column not in window.widths])
+            # Columns narrower than estimated let more of them in
+            projecting, fit = window.needs_projection(), False
+
+        if projected:
+            self.update_headings()
+        if projected and not refit:
+            self.render()
+
+        self.treeview["displaycolumns"] = window.displayed()
+        self.xscrollbar.set(*window.fractions())
+
+    def configure_columns(self, columns: list[str]):
+        for column in columns:
+            name = self.column_id(column)
+            self.treeview.column(name, stretch=True, width=self.column_window.widths.get(column, DEFAULT_WIDTH))
+            self.treeview.heading(name, command=lambda col=column: self.sort_df(col))
+
+        self.autoalign_columns(columns)
+
+    def hide_columns(self, columns: list[str]):
+        self.column_window.hide(columns)
+        self.update_columns()
+
+    def show_columns(self, columns: list[str]):
+        self.column_window.show(columns)
+        self.update_columns()
+
+    def move_column(self, column: str, index: int):
+        self.column_window.move(column, index)
+        self.update_columns()
+
+    def xview(self, *args):
+        if args[0] == "moveto":
+            self.column_window.moveto(float(args[1]))
+        elif args[0] == "scroll":
+            self.column_window.scroll(int(args[1]), args[2])
+
+        self.update_columns()
+
+    def update_window(self):
+        self.focus_row = None if self.focus_iid is None else self.model.find(self.focus_iid)
+
+        self.viewport.resize(total=self.df.height)
+        self.viewport.invalidate()
+        self.render_window()
+
+    def render_window(self):
+        if self.viewport.needs_render():
+            self.realize_window()
+
+        self.treeview.yview_moveto(self.viewport.realized_fraction())
+        self.scrollbar.set(*self.viewport.fractions())
+        self.sync_selection()
+
+    def realize_window(self):
+        try:
+            self.entrypopup.destroy()
+        except AttributeError:
+            pass
+
+        start, stop = self.viewport.realize()
+        rows = self.df.slice(start, stop - start)
+        self.sync.update(self.treeview, rows, flat=True, source=self.model.source(start, rows.height))
+        self.realized_rows = {iid: start + i for i, iid in enumerate(rows.get_column("iid"))}
+        self.realized_positions = self.model.window_positions(start, rows)
+        if self.focus_iid in self.realized_rows:
+            self.focus_row = self.realized_rows[self.focus_iid]
+
+    def sync_selection(self):
+        flags = self.model.selection.is_selected(self.realized_positions).to_list()
+        self.treeview.selection_set([iid for iid, flag in zip(self.realized_rows, flags) if flag])
+        if self.focus_iid in self.realized_rows:
+            self.treeview.focus(self.focus_iid)
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.viewport.moveto(float(args[1]))
+        elif args[0] == "scroll":
+            self.viewport.scroll(int(args[1]), args[2])
+
+        self.render_window()
+
+    def on_configure(self, event: Event):
+        self.column_window.resize(event.width)
+        self.update_columns()
+        if not self.virtual:
             return
 
-        self.df = df
-        self.drop_columns = self.columns_to_drop.intersection(set(self.df.columns))
-        self.df_dropped_columns = self.df.drop(self.drop_columns)
+        rowheight = Style(self).lookup("Treeview", "rowheight")
+        if not rowheight:
+            rowheight = font.nametofont("TkDefaultFont").metrics("linespace") + 4
+
+        # Leave one row for the headings
+        self.viewport.resize(height=event.height // int(rowheight) - 1)
+        self.render_window()
 
-        if set(self.sort.keys()) != {column for column in self.df_dropped_columns.columns}:
-            self.sort: dict[str, bool] = {column: False for column in self.df_dropped_columns.columns}
+    def on_mousewheel(self, event: Event):
+        step = 3 if event.num == 5 or event.delta < 0 else -3
+        self.viewport.scroll(step)
+        self.render_window()
 
-        cols = [col for col in self.df_dropped_columns.columns]
-        cols = [(f"#{i}", col) for i, col in enumerate(cols)]
+        # Stop the Treeview from scrolling its realized items on its own
+        return "break"
+
+    def on_shift_mousewheel(self, event: Event):
+        self.column_window.scroll(1 if event.num == 5 or event.delta < 0 else -1)
+        self.update_columns()
+        return "break"
 
-        if len(cols) > 0:
-            self.treeview["columns"] = cols[1:]
+    def on_treeview_select(self, event: Event | None = None):
+        selected = self.treeview.selection()
+        if self.virtual:
+            positions = self.realized_positions
+            chosen = set(selected)
+            flags = polars.Series([iid in chosen for iid in self.realized_rows], dtype=polars.Boolean)
         else:
-            self.treeview["columns"] = cols
+            iids = self.df.get_column("iid")
+            positions = self.model.positions
+            flags = iids.is_in(polars.Series(selected, dtype=polars.String).implode())
+            if self.rendering is not None:
+                # Rows still to be inserted look unselected, so only additions count while a load is running
+                positions, flags = positions.filter(flags), flags.filter(flags)
+            elif self.partial or self.sync.lazy:
+                attached = iids.is_in(self.sync.attached().implode())
+                positions, flags = positions.filter(attached), flags.filter(attached)
+
+        if self.model.update_selection(positions, flags):
+            self.event_generate(DATAFRAMEVIEWER_SELECTION_CHANGED)
+
+        focus = self.treeview.focus()
+        if focus in self.realized_rows:
+            self.focus_iid = focus
+            self.focus_row = self.realized_rows[focus]
+
+    def on_treeview_open(self, event: Event | None = None):
+        if self.sync.open(self.treeview.focus()):
+            self.render()
+
+    def on_treeview_close(self, event: Event | None = None):
+        if not self.release_closed:
+            return
+
+        # A running render would write back its view of the items after they were released
+        rendering = self.rendering is not None
+        self.cancel_render()
+        self.sync.close(self.treeview, self.treeview.focus())
+        if rendering:
+            self.render()
 
-        for name, text in cols:
-            self.treeview.column(name, stretch=True)
-            self.treeview.heading(name, text=text, command=lambda col=text: self.sort_df(col))
+    def move_focus(self, step: int, extend: bool = False):
+        if self.viewport.total == 0:
+            return "break"
 
-        denominator = self.df.shape[0]
-        for numerator, row in enumerate(self.df.iter_rows(named=True)):
-            iid = uuid4().hex
-            parent = ""
-            tag = ""
-            if "iid" in row.keys():
-                iid = row.pop("iid")
-            if "parent" in row.keys():
-                parent = row.pop("parent")
-            if "tag" in row.keys():
-                tag = row.pop("tag")
+        current = self.viewport.offset if self.focus_row is None else self.focus_row
+        row = min(max(current + step, 0), self.viewport.total - 1)
 
-            values = list(row.values())
-            text = values[0]
-            if len(values) > 0:
-                values = values[1:]
+        if extend:
+            self.model.select_range(min(current, row), max(current, row) + 1, extend=True)
+        else:
+            self.model.select_range(row, row + 1)
 
-            if not text:
-                text = ""
+        self.focus_iid = self.df.slice(row, 1).get_column("iid")[0]
+        self.focus_row = row
+        self.viewport.ensure_visible(row)
+        self.render_window()
+        self.event_generate(DATAFRAMEVIEWER_SELECTION_CHANGED)
+
+        # Stop propagating this event to other handlers!
+        return "break"
 
-            values = ["" if v is None else v for v in values]
+    @timed()
+    def sort_df(self, column: str, add: bool = False):
+        self.submit_sort(self.model.toggle_sort(column, add))
+
+    def submit_sort(self, keys: list[SortKey]):
+        self.worker.submit(
+            "sort",
+            self.model.sorted_frame,
+            self.model.unsorted_df,
+            self.model.unsorted_positions,
+            keys,
+            self.model.version,
+            on_done=self.show_sorted,
+        )
 
-            # print(f"{iid=}, {parent=}, {text=}, {values=}, {tag=}")
-            self.treeview.insert(parent=parent, index=END, text=text, values=values, iid=iid, tags=tag)
+    def show_sorted(self, result: SortedRows):
+        if not self.model.show_sorted(result):
+            return
 
-            if self.callback:
-                self.callback(numerator, denominator, "Updating Treeview")
+        # Existing items are moved into the new order, columns are not refit
+        self.update_headings()
+        self.render()
 
-        if self.callback:
-            self.callback(denominator, denominator, "Finished Updating Treeview")
+    def heading_column(self, event: Event) -> str | None:
+        if self.treeview.identify_region(event.x, event.y) != "heading":
+            return None
 
-        self.autofit_columns()
-        self.autoalign_columns()
+        return self.displayed_columns()[int(self.treeview.identify_column(event.x).replace("#", ""))]
 
-    def sort_df(self, column: str):
-        self.sort[column] = not self.sort[column]
-        self.df = self.df.sort(column, descending=self.sort[column])
-        self.update_data(df=self.df)
+    def treeview_shift_click(self, event: Event):
+        column = self.heading_column(event)
+        if column is None:
+            return
 
-    def autofit_columns(self):
-        df = self.df_dropped_columns
-        f = font.nametofont("TkDefaultFont")
-        bf = font.Font(family="Helvetica", size=12, weight="bold")
-        self.col_widths = dict()
+        self.sort_df(column, add=True)
 
-        for col in df.columns:
-            self.col_widths[col] = int(bf.measure(str(col)) * 1.2)
+        # Stop the heading command from replacing the sort keys
+        return "break"
 
-        for row in df.iter_rows(named=True):
-            for key, value in row.items():
-                if key in df.columns:
-                    old_width = self.col_widths[key]
-                    new_width = int(f.measure(str(value)) * 1.2)
-                    self.col_widths[key] = max(old_width, new_width)
+    def treeview_control_click(self, event: Event):
+        column = self.heading_column(event)
+        if column is None:
+            return
 
-        for i, width in enumerate(self.col_widths.values()):
-            self.treeview.column(f"#{i}", width=width)
+        self.toggle_group(column)
+        return "break"
 
-    def autoalign_columns(self):
-        df = self.df_dropped_columns
-        for i, dtype in enumerate(df.dtypes):
+    def toggle_group(self, column: str):
+        # Adds column to the grouping's key columns, or takes it out again
+        by, aggregates = self.grouped or (list(), dict())
+        self.group_by([key for key in by if key != column] if column in by else [*by, column], aggregates)
+
+    def group_by(self, columns: list[str], aggregates: dict[str, str] | None = None):
+        # Shows one item per group of the current rows, with its count and aggregates (column -> sum, mean, min or
+        # max); no columns shows the rows again
+        if not columns:
+            return self.ungroup()
+
+        aggregates = checked_aggregates(self.model.df.collect_schema(), columns, aggregates)
+        self.grouped = (list(columns), aggregates)
+        rows = self.model.df
+        self.worker.submit(
+            "group",
+            lambda: Grouping.build(rows if isinstance(rows, LazyRows) else collected(rows), columns, aggregates),
+            on_done=self.show_grouping,
+            on_error=self.show_grouping_error,
+        )
+
+    def show_grouping(self, grouping: Grouping):
+        if self.group_tree is not None:
+            self.group_tree.destroy()
+
+        self.group_tree = GroupTree(self, grouping, self.worker)
+        self.group_tree.grid(row=0, column=0, rowspan=1, columnspan=2, padx=0, pady=0, sticky="nsew")
+        self.treeview.grid_remove()
+        self.scrollbar.grid_remove()
+        self.xscrollbar.grid_remove()
+
+    def show_grouping_error(self, error: BaseException):
+        # The rows stay on screen, a later load does not try the grouping again
+        self.grouped = None
+        self.report(f"Grouping failed: {error}")
+
+    def report(self, message: str):
+        if self.on_message is not None:
+            self.on_message(message)
+
+    def ungroup(self):
+        self.grouped = None
+        self.worker.cancel("group")
+        if self.group_tree is not None:
+            self.group_tree.destroy()
+            self.group_tree = None
+
+        self.treeview.grid()
+        self.scrollbar.grid()
+        self.xscrollbar.grid()
+
+    @timed(rows=lambda self, columns=None: self.df_dropped_columns.height)
+    def autofit_columns(self, columns: list[str] | None = None):
+        # The projected columns by default, the rest are fit when they are first projected
+        columns = self.column_window.projection() if columns is None else columns
+        if not columns:
+            return
+
+        measure, measure_heading = self.font_measures()
+
+        # Views that are frames show the loaded frame's display strings, measuring them formats them for the render too
+        source = self.model.source()
+        frame = source[0] if source is not None else self.df_dropped_columns
+        widths = column_widths(
+            self.display.frame(frame, columns),
+            measure=measure,
+            measure_heading=measure_heading,
+            sample=self.autofit_sample,
+        )
+        self.column_window.widths.update(widths)
+
+        for column, width in widths.items():
+            self.treeview.column(self.column_id(column), width=width)
+
+    def font_measures(self) -> tuple[Callable[[str], int], Callable[[str], int]]:
+        # Cached measures die with the viewer, and are made again once either font is reconfigured
+        if self.heading_font is None:
+            self.heading_font = font.Font(root=self, family="Helvetica", size=12, weight="bold")
+
+        body = font.nametofont("TkDefaultFont", root=self)
+        actual = (body.actual(), self.heading_font.actual())
+        if self.measures is None or self.measures[0] != actual:
+            self.measures = (actual, measurer(body), measurer(self.heading_font))
+
+        return self.measures[1], self.measures[2]
+
+    @timed()
+    def autoalign_columns(self, columns: list[str] | None = None):
+        columns = self.column_window.projection() if columns is None else columns
+        schema = self.df_dropped_columns.schema
+        for column in columns:
+            dtype = schema[column]
             if "float" in str(dtype).lower() or "int" in str(dtype).lower():
                 anchor = E
             elif "bool" in str(dtype).lower():
@@ -157,15 +614,178 @@ class DataFrameViewer(Frame):
             else:
                 anchor = W
 
-            self.treeview.column(f"#{i}", anchor=anchor)
+            self.treeview.column(self.column_id(column), anchor=anchor)
 
     def focus(self) -> Any:
+        if self.virtual:
+            return self.focus_iid or ""
         return self.treeview.focus()
 
     def selection(self) -> tuple[str, ...]:
+        if self.virtual:
+            if "iid" not in self.df.columns:
+                return tuple()
+            return tuple(self.model.selected_rows().get_column("iid"))
         return self.treeview.selection()
 
+    def selected_rows(self) -> polars.DataFrame:
+        return self.model.selected_rows()
+
+    def select_all(self):
+        self.model.select_all()
+        self.selection_changed()
+
+    def clear_selection(self):
+        self.model.clear_selection()
+        self.selection_changed()
+
+    def invert_selection(self):
+        self.model.invert_selection()
+        self.selection_changed()
+
+    def select_range(self, start: int, stop: int, extend: bool = False):
+        self.model.select_range(start, stop, extend)
+        self.selection_changed()
+
+    def select_where(self, predicate: polars.Expr, extend: bool = False):
+        self.model.select_where(predicate, extend)
+        self.selection_changed()
+
+    def selection_changed(self):
+        # Only realized items are touched, a bulk selection over a million rows sets a handful of Treeview items
+        if self.virtual:
+            self.sync_selection()
+        elif self.rendering is None:
+            self.show_selection()
+        self.event_generate(DATAFRAMEVIEWER_SELECTION_CHANGED)
+
+    def entrypopup_write(self, rowid: str, item: dict):
+        # Changed cells are journaled and written back to the frame together once Tk is idle
+        row = self.model.frame_row(rowid)
+        if row is None:
+            return
+
+        # Cells are matched to columns by name, as the Treeview holds them: the tree column's text, then the values of
+        # its columns, whatever the projection or order of the frame
+        frame: polars.DataFrame = self.model.universe  # type: ignore
+        names = [self.column_window.tree_column, *self.treeview["columns"]]
+        edited = {
+            column: str(value)
+            for column, value in zip(names, (item["text"], *item["values"]))
+            if column in frame.columns
+        }
+        shown = dict(zip(edited, self.display.frame(frame, list(edited)).row(row)))
+
+        try:
+            for column, after in edited.items():
+                if shown[column] != after:
+                    self.model.record_edit(rowid, column, after)
+        except ValueError as error:
+            # The item goes back to what the frame holds, edits to its other cells stay journaled
+            texts = [shown.get(column, "") for column in names]
+            self.treeview.item(rowid, text=texts[0], values=texts[1:])
+            self.report(str(error))
+
+        if self.model.journal.pending and self.flush_id is None:
+            self.flush_id = self.after_idle(self.flush_edits)
+
+    def write_values(self, column: str, iids: list[str], values: list[Any]):
+        # Not journaled, so undo and the edit count leave them be; see ViewerModel.write_values
+        self.show_edits(self.model.write_values(column, iids, values))
+
+    def flush_edits(self):
+        self.flush_id = None
+        self.show_edits(self.model.flush_edits())
+
+    def cancel_flush(self):
+        if self.flush_id is not None:
+            self.after_cancel(self.flush_id)
+            self.flush_id = None
+
+    def undo(self, event: Event | None = None):
+        # Edits still waiting for the flush are undone with it
+        self.cancel_flush()
+        self.show_edits(self.model.undo())
+
+    def redo(self, event: Event | None = None):
+        self.cancel_flush()
+        self.show_edits(self.model.redo())
+
+    def show_edits(self, batch: EditBatch | None):
+        # Only items whose rows changed are rewritten: in place when the rows stay where they were, through a render
+        # that compares row hashes when the edit moves them
+        if batch is None:
+            return
+
+        if self.on_edit is not None:
+            self.on_edit(batch)
+        if self.edits_in_place(batch):
+            rows = self.model.positions.is_in(batch.rows.implode()).arg_true()
+            self.sync.refresh(self.treeview, self.df, rows, self.model.source())  # type: ignore
+        else:
+            self.render()
+        self.event_generate(DATAFRAMEVIEWER_EDITED)
+
+    def edits_in_place(self, batch: EditBatch) -> bool:
+        # Virtual windows are synced whole anyway, and edits to sort keys or the hierarchy move rows
+        sorted_columns = {column for column, _ in self.model.sort_keys}
+        return (
+            not self.virtual
+            and self.rendering is None
+            and not self.partial
+            and not self.sync.rewrite
+            and isinstance(self.df, polars.DataFrame)
+            and not set(batch.columns) & (sorted_columns | (set(HIDDEN_COLUMNS) - {"tag"}))
+        )
+
+    def get_edits(self) -> polars.DataFrame:
+        self.cancel_flush()
+        self.flush_edits()
+        return self.model.journal.delta()
+
+    def append_rows(self, df: polars.DataFrame, follow: bool = False):
+        # With follow, the view scrolls to the last row once the rows are in
+        self.appends((df, follow))
+
+    def flush_appends(self, chunks: list[tuple[polars.DataFrame, bool]]):
+        chunk = with_identities(polars.concat([df for df, _ in chunks], how="vertical_relaxed"))
+        follow = any(follow for _, follow in chunks)
+        frame = self.model.universe
+
+        if frame is None or frame.is_empty() or "iid" not in frame.columns:
+            if frame is not None and not frame.is_empty():
+                chunk = polars.concat([frame, chunk], how="diagonal_relaxed")
+            self.update_data(chunk if self.max_rows is None else chunk.tail(self.max_rows))
+        else:
+            self.show_appended(Appended.of(frame, chunk, self.max_rows), follow)
+
+    def show_appended(self, result: Appended, follow: bool = False):
+        # Only new rows are inserted and evicted ones deleted, unless a sort or an unfinished render needs a full update
+        assert self.model.universe is not None
+        evicted = self.model.universe.get_column("iid").head(result.evicted)
+        rows = self.model.append(result)
+
+        if self.virtual:
+            self.update_window()
+            if follow:
+                self.viewport.scroll_to(self.viewport.max_offset)
+                self.render_window()
+            return
+
+        self.sync.remove(self.treeview, evicted)
+        flat = "parent" not in rows.columns or not rows.get_column("parent").fill_null("").ne("").any()
+        if self.rendering is None and not self.model.sort_keys and flat:
+            self.sync.append(self.treeview, rows, source=(result.frame, result.matches))
+        else:
+            self.render()
+
+        if follow and not self.df.is_empty():
+            self.treeview.see(self.df.get_column("iid")[-1])
+
     def treeview_shift_down(self, event: Event):
+        if self.virtual:
+            return self.move_focus(1, extend=True)
+
         tree: Treeview = event.widget  # type: ignore
         cur_item = tree.focus()
 
@@ -179,6 +799,9 @@ class DataFrameViewer(Frame):
         return "break"
 
     def treeview_shift_up(self, event: Event):
+        if self.virtual:
+            return self.move_focus(-1, extend=True)
+
         tree: Treeview = event.widget  # type: ignore
         cur_item = tree.focus()
 
@@ -208,8 +831,9 @@ class DataFrameViewer(Frame):
             x += treeview.winfo_x()  # type: ignore
             pady = height // 2  # type:ignore
 
+            # Positions into the item's text and values, which hold the projected columns in their own order
             row = treeview.item(rowid)
-            column = int(column.replace("#", ""))
+            column = self.sync.columns.index(self.displayed_columns()[int(column.replace("#", ""))])
             if column == 0:
                 text = row["text"]
             else:
@@ -272,45 +896,171 @@ class TableEntryPopup(Entry):
         # self.tree.bind("<Key>", self.keypress_event_handler)
 
 
+class GroupTree(Frame):
+    # A grouping of a viewer's rows: one item per group, whose member rows are inserted the first time it is opened.
+    # Group positions are computed on the worker once the summary is shown; groups opened before then fill in
+    # when they arrive.
+    def __init__(self, parent: DataFrameViewer, grouping: Grouping, worker: BackgroundWorker):
+        super().__init__(parent)
+        self.viewer = parent
+        self.grouping = grouping
+        self.worker = worker
+        self.sync = TreeviewSync(lazy=True, display=DisplayCache(parent.display.format))
+        self.sync.expandable = grouping.groups()
+        self.rendering: ChunkedTask | None = None
+
+        self.scrollbar = Scrollbar(self, orient="vertical")
+        self.treeview = Treeview(self, yscrollcommand=self.scrollbar.set)
+        self.scrollbar.configure(command=self.treeview.yview)
+        self.treeview.grid(row=0, column=0, rowspan=1, columnspan=1, padx=0, pady=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, rowspan=1, columnspan=1, padx=0, pady=0, sticky="nsew")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.columns = [column for column in grouping.summary.columns if column not in HIDDEN_COLUMNS]
+        self.treeview["columns"] = self.columns[1:]
+        for i, column in enumerate(self.columns):
+            self.treeview.heading(f"#{i}", text=column)
+            self.treeview.column(f"#{i}", stretch=True)
+
+        self.treeview.bind("<<TreeviewOpen>>", self.on_open)
+        self.treeview.bind("<Control-Button-1>", self.on_control_click)
+
+        self.render()
+        if grouping.members is None:
+            self.worker.submit("group_index", grouping.index, on_done=self.show_index, on_error=self.show_index_error)
+
+    def show_index(self, members: polars.Series):
+        self.grouping.members = members
+        if self.sync.expanded:
+            self.render()
+
+    def show_index_error(self, error: BaseException):
+        # The summary stays, its groups cannot be opened
+        self.sync.expandable = set()
+        self.viewer.report(f"Grouping failed: {error}")
+
+    def on_open(self, event: Event | None = None):
+        if self.sync.open(self.treeview.focus()) and self.grouping.members is not None:
+            self.render()
+
+    def on_control_click(self, event: Event):
+        if self.treeview.identify_region(event.x, event.y) != "heading":
+            return
+
+        column = int(self.treeview.identify_column(event.x).replace("#", ""))
+        if self.columns[column] in self.grouping.by:
+            self.viewer.toggle_group(self.columns[column])
+        return "break"
+
+    def render(self):
+        self.cancel_render()
+        self.rendering = ChunkedTask(
+            self,
+            self.sync.steps(self.treeview, self.grouping.frame(self.sync.expanded, self.viewer.display.format)),
+            on_done=self.finish_render,
+        )
+        self.rendering.start(synchronous=self.worker.synchronous)
+
+    def finish_render(self, completed: bool):
+        self.rendering = None
+
+    def cancel_render(self):
+        if self.rendering is not None:
+            self.rendering.cancel()
+
+    def destroy(self):
+        self.worker.cancel("group_index")
+        self.cancel_render()
+        super().destroy()
+
+
 class DataFrameViewerFilter(Frame):
     def __init__(
         self,
         parent,
-        df: polars.DataFrame,
+        df: DataSource,
         iids: list | None = None,
         parents: list | None = None,
         filters: DataFrameViewerFilterTypes = "all",
+        virtual: bool = False,
+        background: bool = True,
+        debounce: int = 150,
+        spill: SpillStore | None = None,
+        callback: Callable[[int, int, str], None] | None = None,
+        max_rows: int | None = None,
+        display_format: DisplayFormat | None = None,
+        on_message: Callable[[str], None] | None = None,
+        release_closed: bool = False,
     ):
         super().__init__(parent)
         self.parent = parent
-        self.df = df
+        display = DisplayCache(display_format if display_format is not None else DisplayFormat())
+        self.model = FilterModel(df=open_source(df), filters=filters, spill=spill, display=display)
+        self.max_rows = max_rows
+        self.loading = False
+        # Appends wait for a filter in flight, and are then filtered with the value of the results shown
+        self.filtering = False
+        self.filtered_value: str | dict[str, str] = "" if filters == "all" else dict()
+        self.appends = Batcher(self, APPEND_INTERVAL, self.flush_appends)
         self.iids = iids
         self.parents = parents
         self.filters = filters
+        self.virtual = virtual
+        self.worker = BackgroundWorker(self, synchronous=not background, on_busy=self.on_busy)
+        self.debounced_update_filter = Debouncer(self, debounce, self.update_filter)
+        self.spill = spill
+        self.callback = callback
+        self.on_message = on_message
+        self.release_closed = release_closed
+
+        if isinstance(self.df, polars.LazyFrame):
+            if self.iids is not None or self.parents is not None:
+                raise ValueError("iids and parents are not supported for lazy sources")
+
+            # Lazy sources are flat and only ever collected a window at a time
+            self.model.df = with_row_iids(self.df)
+            self.virtual = True
+        else:
+            if self.iids is None:
+                self.iids = [str(uuid4()) for _ in range(self.df.shape[0])]
 
-        if self.iids is None:
-            self.iids = [str(uuid4()) for _ in range(self.df.shape[0])]
+            if self.parents is None:
+                self.parents = ["" for _ in range(self.df.shape[0])]
 
-        if self.parents is None:
-            self.parents = ["" for _ in range(self.df.shape[0])]
+            if len(self.iids) != self.df.shape[0]:
+                raise ValueError(f"length of iids: {len(self.iids)}, expected: {self.df.shape[0]}")
 
-        if len(self.iids) != self.df.shape[0]:
-            raise ValueError(f"length of iids: {len(self.iids)}, expected: {self.df.shape[0]}")
+            if len(self.parents) != self.df.shape[0]:
+                raise ValueError(f"length of parents: {len(self.parents)}, expected: {self.df.shape[0]}")
 
-        if len(self.parents) != self.df.shape[0]:
-            raise ValueError(f"length of parents: {len(self.parents)}, expected: {self.df.shape[0]}")
+            if "iid" not in self.df.columns:
+                self.model.df = self.df.insert_column(index=0, column=polars.Series(name="iid", values=self.iids))
 
-        if "iid" not in self.df.columns:
-            self.df = self.df.insert_column(index=0, column=polars.Series(name="iid", values=self.iids))
+            if "parent" not in self.df.columns:
+                self.model.df = self.df.insert_column(index=1, column=polars.Series(name="parent", values=self.parents))
 
-        if "parent" not in self.df.columns:
-            self.df = self.df.insert_column(index=1, column=polars.Series(name="parent", values=self.parents))
+            # Frames big enough to spill are only ever gathered a window at a time, smaller ones keep their hierarchy
+            if self.spill is not None and self.spill.should_spill(self.df):
+                self.virtual = True
 
         self.make_widgets()
         self.make_bindings()
 
         self.update_data(df=self.df)
 
+    @property
+    def df(self) -> polars.DataFrame | polars.LazyFrame:
+        return self.model.df
+
+    @property
+    def hierarchy(self) -> Hierarchy | None:
+        return self.model.hierarchy
+
+    @property
+    def search(self) -> SearchIndex | None:
+        return self.model.search
+
     def make_widgets(self):
         filter_dict: dict = {
             "all": self.make_all_filters,
@@ -318,21 +1068,29 @@ class DataFrameViewerFilter(Frame):
         }
         filter_dict[self.filters]()
 
-        self.dfv = DataFrameViewer(self, df=self.df)
-        self.dfv.grid(row=1, column=0, rowspan=1, columnspan=len(self.df.columns), sticky="nsew", padx=5, pady=2)
+        # Rows arrive through update_data once the worker has prepared them
+        schema = self.df.collect_schema()
+        self.dfv = DataFrameViewer(
+            self,
+            df=polars.DataFrame(schema=schema),
+            callback=self.callback,
+            on_message=self.on_message,
+            virtual=self.virtual,
+            worker=self.worker,
+            release_closed=self.release_closed,
+            on_edit=self.model.apply_edits,
+            max_rows=self.max_rows,
+            display=self.model.display,
+        )
+        self.dfv.grid(row=1, column=0, rowspan=1, columnspan=len(schema), sticky="nsew", padx=5, pady=2)
 
         self.rowconfigure(0, weight=0)
         self.rowconfigure(1, weight=1)
         self.columnconfigure(0, weight=1)
 
-    def drop_cols(self) -> polars.DataFrame:
-        drop_cols = ["iid", "parent", "treepath"]
-        df = self.df
-        for drop_col in drop_cols:
-            if drop_col in self.df.columns:
-                df = df.drop(drop_col)
-
-        return df
+    def drop_cols(self) -> list[str]:
+        drop_cols = ["iid", "parent"]
+        return [column for column in self.df.collect_schema().names() if column not in drop_cols]
 
     def make_all_filters(self):
         self.checkmarks: dict[str, Checkbutton] = dict()
@@ -341,7 +1099,7 @@ class DataFrameViewerFilter(Frame):
         self.entry: Entry = Entry(master=self)
         self.entry.grid(row=0, column=0, rowspan=1, columnspan=1, sticky="nsew", padx=5, pady=2)
 
-        for i, col in enumerate(self.drop_cols().columns):
+        for i, col in enumerate(self.drop_cols()):
             self.checkmarkvalues[col] = BooleanVar(self)
             self.checkmarks[col] = Checkbutton(
                 self,
@@ -353,143 +1111,119 @@ class DataFrameViewerFilter(Frame):
             self.checkmarks[col].grid(row=0, column=i + 1, rowspan=1, columnspan=1, padx=5, pady=2, sticky="nsew")
             self.columnconfigure(i + 1, weight=0)
 
-        self.entry.bind("<KeyRelease>", self.update_filter)
+        self.entry.bind("<KeyRelease>", self.debounced_update_filter)
 
     def make_by_column_filters(self):
         self.column_entries: dict[str, Entry] = dict()
 
-        for i, col in enumerate(self.drop_cols().columns):
+        for i, col in enumerate(self.drop_cols()):
             self.column_entries[col] = Entry(master=self)  # , width=self.dfv.col_widths[col])
             self.column_entries[col].grid(row=0, column=i, rowspan=1, columnspan=1, padx=0, pady=2, sticky="nsew")
             self.columnconfigure(i, weight=1)
-            self.column_entries[col].bind("<KeyRelease>", self.update_filter)
+            self.column_entries[col].bind("<KeyRelease>", self.debounced_update_filter)
 
     def make_bindings(self):
         pass
 
-    def update_filter(self, event: Event | None = None):
-        filter_dict: dict = {
-            "all": self.update_all_filter,
-            "by_column": self.update_by_column_filter,
-        }
-        results = filter_dict[self.filters]()
-
-        treepaths: set = set()
-        if "treepath" in results:
-            treepaths = set(results["treepath"].to_list())
-
-        keys: list[str] = list()
-        treepath: str
-        for treepath in treepaths:
-            keys.extend(treepath.split("|"))
+    def on_busy(self, busy: bool):
+        self.event_generate(DATAFRAMEVIEWER_BUSY if busy else DATAFRAMEVIEWER_IDLE)
 
-        df_keys: polars.DataFrame = polars.DataFrame({"iid": keys})
+    def destroy(self):
+        self.appends.cancel()
+        self.worker.shutdown()
+        super().destroy()
 
-        keys = list(set(keys))
+        if self.spill is not None:
+            self.model.df = self.df.clear()
+            self.spill.close()
 
-        if not keys:
-            self.dfv.update_data(df=polars.DataFrame())
+    @timed()
+    def update_filter(self, event: Event | None = None):
+        # Widget values are read here on the Tk thread, the polars work runs on the worker
+        value = self.entry.get() if self.filters == "all" else self.column_patterns()
+        on_done = partial(self.show_filter_results, value=value)
+        self.filtering = True
+
+        if self.model.lazy:
+            predicate = self.model.filter_expression(value)
+            self.worker.submit(
+                "filter", self.model.lazy_filter_results, predicate, on_done=on_done, on_error=self.show_filter_error
+            )
             return
 
-        results = self.df.filter(polars.col("iid").str.contains_any(keys))
-        results = results.filter(polars.col("iid").is_in(keys))
-
-        if results.shape[0]:
-            df_keys = df_keys.with_columns(polars.col("iid").fill_null("None"))
-            df_keys = df_keys.with_columns(polars.col("iid").cast(polars.String))
+        task = self.model.filter_task(value)
+        self.worker.submit("filter", self.model.filter_results, task, on_done=on_done, on_error=self.show_filter_error)
 
-            results = self.df.join(df_keys, on="iid", how="semi")
+    def column_patterns(self) -> dict[str, str]:
+        return {key: value.get() for key, value in self.column_entries.items() if value.get()}
 
-            if "treepath" in results.columns:
-                results = results.drop(["treepath"])
+    def show_filter_results(self, results: ViewRows, value: str | dict[str, str]):
+        # Cells edited while the filter ran are not in its results, it runs again over the current frame
+        self.filtering = False
+        if isinstance(results, RowView) and results.df is not self.model.df:
+            return self.update_filter()
 
+        self.filtered_value = value
         self.dfv.update_data(df=results)
-        self.event_generate(DATAFRAMEFILTER_FILTER_UPDATED)
-
-    def update_data(self, df: polars.DataFrame):
-        self.df = df
-
-        if "iid" not in self.df.columns:
-            self.df = self.df.with_columns(polars.Series("iid", [uuid4().hex for _ in range(self.df.shape[0])]))
-
-        if "parent" not in self.df.columns:
-            self.df = self.df.with_columns(polars.Series("parent", [str() for _ in range(self.df.shape[0])]))
-
-        self.update_family_tree()
-        self.dfv.update_data(self.df.drop("treepath"))
-
-    def update_all_filter(self) -> polars.DataFrame:
-        pattern = self.entry.get()
-        result = self.df
-
-        if not pattern:
-            return result
-
-        filter_df = self.df.with_columns(
-            polars.concat_str([polars.col(col) for col in self.df.columns], separator=" ", ignore_nulls=True).alias(
-                "concatenate"
-            )
-        )
-        # return self.df.filter(polars.any_horizontal(polars.all().cast(polars.String).str.contains(f"(?i){pattern}")))
-        return filter_df.filter(polars.col("concatenate").str.contains(f"(?i){pattern}")).drop("concatenate")
-
-    def update_by_column_filter(self) -> polars.DataFrame:
-        patterns = {key: value.get() for key, value in self.column_entries.items() if value.get()}
-
-        results = self.df
-
-        if not any(patterns.values()):
-            return results
-
-        filters: list = list()
-        for col, pattern in patterns.items():
-            filters.append(polars.col(col).cast(polars.String).str.contains(f"(?i){pattern}"))
-
-        if filters:
-            results = self.df.filter(filters)
-
-        return results
-
-    def update_family_tree(self):
-        if "treepath" in self.df.columns:
-            self.df = self.df.drop(["treepath"])
-
-        tree = Tree()
-        root = Node(identifier="")
-        tree.add_node(root)
-
-        for row in self.df.iter_rows(named=True):
-            node = Node(identifier=row["iid"])
-            parent = row["parent"]
-            tree.add_node(node, parent=parent)
-
-        # path_to_leaves = {leafpath[-1]: "|".join(leafpath[1:]) for leafpath in tree.paths_to_leaves()}
-
-        def get_treepath(iid: str) -> str:
-            branch: list = list()
-            for branch in tree.paths_to_leaves():
-                if iid in branch:
-                    break
-
-            results: list = list()
-            for leaf in branch:
-                results.append(leaf)
-                if iid == leaf:
-                    break
+        if not results.is_empty():
+            self.event_generate(DATAFRAMEFILTER_FILTER_UPDATED)
+
+    def show_filter_error(self, error: BaseException):
+        self.filtering = False
+        self.dfv.report(f"Filter failed: {error}")
+
+    def update_data(self, df: DataSource):
+        # Filter results still in flight were computed against the previous frame
+        df = open_source(df)
+        if not self.dfv.virtual and isinstance(df, polars.LazyFrame):
+            raise TypeError("lazy sources and files can only be shown with virtual=True")
+
+        self.worker.cancel("filter")
+        self.filtering = False
+        self.loading = True
+        self.worker.submit("load", self.model.prepare_data, df, on_done=self.show_data)
+
+    def show_data(self, result: PreparedData):
+        self.loading = False
+        self.filtered_value = "" if self.filters == "all" else dict()
+        rows = self.model.show_data(result)
+        if isinstance(rows, LazyRows):
+            self.dfv.model.selection.reset()
+        self.dfv.update_data(rows)
+
+        if self.hierarchy is not None and self.hierarchy.problems():
+            self.event_generate(DATAFRAMEFILTER_HIERARCHY_PROBLEM)
+
+    def append_rows(self, df: polars.DataFrame, follow: bool = False):
+        # Appends arriving together are filtered, indexed and inserted as one chunk; see DataFrameViewer.append_rows
+        if self.model.lazy:
+            raise ValueError("rows can only be appended to DataFrame sources")
+        self.appends((df, follow))
+
+    def flush_appends(self, chunks: list[tuple[polars.DataFrame, bool]]):
+        # Rows appended while a load or filter runs wait for it, they would be added to the frame its results replace
+        if self.loading or self.filtering:
+            for item in chunks:
+                self.appends(item)
+            return
 
-            # print(results)
-            result = "|".join(results)
-            if result[0] == "|":
-                result = result[1:]
+        chunk = polars.concat([df for df, _ in chunks], how="vertical_relaxed")
+        viewed = self.dfv.model.universe is self.model.df
+        result = self.model.append_rows(chunk, self.filtered_value, self.max_rows)
 
-            return result
+        if result is None:
+            frame = polars.concat([self.model.df, chunk], how="diagonal_relaxed")  # type: ignore
+            self.update_data(frame if self.max_rows is None else frame.tail(self.max_rows))
+        elif viewed:
+            self.dfv.show_appended(result, any(follow for _, follow in chunks))
+        else:
+            self.update_filter()
 
-        paths: dict[str, str] = dict()
-        for row in self.df.iter_rows(named=True):
-            # paths[row["iid"]] = path_to_leaves.get(row["iid"], row["iid"])  # type: ignore
-            paths[row["iid"]] = get_treepath(row["iid"])
+    def update_all_filter(self, pattern: str | None = None) -> polars.Series | None:
+        return self.model.update_all_filter(self.entry.get() if pattern is None else pattern)
 
-        self.df = self.df.insert_column(index=0, column=polars.Series(name="treepath", values=paths.values()))
+    def update_by_column_filter(self, patterns: dict[str, str] | None = None) -> polars.Series | None:
+        return self.model.update_by_column_filter(self.column_patterns() if patterns is None else patterns)
 
     def dfv_event_handler(self, event: Event):
         pass
@@ -499,67 +1233,174 @@ class DataFrameViewerApp(Tk):
     def __init__(
         self,
         title: str,
-        df: polars.DataFrame = polars.DataFrame(),
+        df: DataSource = polars.DataFrame(),
         iids: list | None = None,
         parents: list | None = None,
         filters: DataFrameViewerFilterTypes = "all",
+        virtual: bool = False,
+        background: bool = True,
+        spill: SpillStore | None = None,
+        profile: bool = False,
+        max_rows: int | None = None,
+        display_format: DisplayFormat | None = None,
+        release_closed: bool = False,
     ):
         super().__init__()
         self.title(title)
-        self.df = df
+        df = open_source(df)
         self.iids = iids
         self.parents = parents
         self.filters: DataFrameViewerFilterTypes = filters
+        self.virtual = virtual
+        self.background = background
+        self.spill = spill
+        self.max_rows = max_rows
+        self.display_format = display_format
+        self.release_closed = release_closed
 
-        if self.iids is None:
-            self.iids = [str(uuid4()) for _ in range(self.df.shape[0])]
+        # Recording is global, it is put back the way it was when this app is destroyed
+        self.spans_enabled = SPANS.enabled
+        if profile:
+            SPANS.enabled = True
 
-        if self.parents is None:
-            self.parents = ["" for _ in range(self.df.shape[0])]
+        # Lazy sources are passed through untouched, the filter gives them row number iids
+        if isinstance(df, polars.DataFrame):
+            if self.iids is None:
+                self.iids = [str(uuid4()) for _ in range(df.shape[0])]
 
-        if len(self.iids) != self.df.shape[0]:
-            raise ValueError(f"length of iids: {len(self.iids)}, expected: {self.df.shape[0]}")
+            if self.parents is None:
+                self.parents = ["" for _ in range(df.shape[0])]
 
-        if len(self.parents) != self.df.shape[0]:
-            raise ValueError(f"length of parents: {len(self.parents)}, expected: {self.df.shape[0]}")
+            if len(self.iids) != df.shape[0]:
+                raise ValueError(f"length of iids: {len(self.iids)}, expected: {df.shape[0]}")
 
-        if "iid" not in self.df.columns:
-            self.df = self.df.insert_column(index=0, column=polars.Series(name="iid", values=self.iids))
+            if len(self.parents) != df.shape[0]:
+                raise ValueError(f"length of parents: {len(self.parents)}, expected: {df.shape[0]}")
 
-        if "parent" not in self.df.columns:
-            self.df = self.df.insert_column(index=1, column=polars.Series(name="parent", values=self.parents))
+            if "iid" not in df.columns:
+                df = df.insert_column(index=0, column=polars.Series(name="iid", values=self.iids))
 
-        self.make_widgets()
+            if "parent" not in df.columns:
+                df = df.insert_column(index=1, column=polars.Series(name="parent", values=self.parents))
 
-    # TODO: add feature for returning the selected rows in the viewer - also add some indicator for what rows are selected
+        self.make_widgets(df)
 
-    def make_widgets(self):
-        self.dfv = DataFrameViewerFilter(self, df=self.df, iids=self.iids, parents=self.parents, filters=self.filters)
-        self.dfv.grid(row=1, column=0, rowspan=1, columnspan=len(self.df.columns), sticky="nsew", padx=5, pady=2)
+    @property
+    def df(self) -> polars.DataFrame | polars.LazyFrame:
+        # The filter's frame, so a spilled frame does not keep the one it was read from alive
+        return self.dfv.df
+
+    def make_widgets(self, df: polars.DataFrame | polars.LazyFrame):
+        columns = len(df.collect_schema())
+
+        # The status bar comes first so the viewer can report Treeview progress to it from the initial load on
+        self.status_bar = StatusBar(self)
+        self.status_bar.grid(row=2, column=0, rowspan=1, columnspan=columns + 1, sticky="nsew")
+        self.status_bar.update_status("Initialized Status Bar")
+
+        self.dfv = DataFrameViewerFilter(
+            self,
+            df=df,
+            iids=self.iids,
+            parents=self.parents,
+            filters=self.filters,
+            virtual=self.virtual,
+            background=self.background,
+            spill=self.spill,
+            callback=self.status_bar.update_progress,
+            max_rows=self.max_rows,
+            display_format=self.display_format,
+            on_message=self.status_bar.update_status,
+            release_closed=self.release_closed,
+        )
+        self.dfv.grid(row=1, column=0, rowspan=1, columnspan=columns, sticky="nsew", padx=5, pady=2)
 
         self.rowconfigure(0, weight=0)
         self.rowconfigure(1, weight=1)
         self.rowconfigure(2, weight=0)
         self.columnconfigure(0, weight=1)
 
-        self.status_bar = StatusBar(self)
-        self.status_bar.grid(row=2, column=0, rowspan=1, columnspan=len(self.df.columns) + 1, sticky="nsew")
-        self.status_bar.update_status("Initialized Status Bar")
-
         self.bind("<<StatusBar.DoubleClick.Left>>", self.show_status_log)
         self.bind("<<StatusBar.DoubleClick.Right>>", self.show_status_log)
+        self.bind("<<StatusBar.Cancel>>", self.cancel_render)
+        self.bind("<F12>", self.show_spans)
+        self.bind(DATAFRAMEVIEWER_BUSY, lambda event: self.status_bar.set_busy("Working"))
+        self.bind(DATAFRAMEVIEWER_IDLE, lambda event: self.status_bar.clear_busy())
+        self.bind(DATAFRAMEFILTER_HIERARCHY_PROBLEM, self.show_hierarchy_problems)
+        self.bind(DATAFRAMEVIEWER_SELECTION_CHANGED, self.show_selection_count)
+        self.bind(DATAFRAMEVIEWER_EDITED, self.show_edit_count)
+
+        # The initial load was submitted before these bindings existed
+        if self.dfv.worker.pending:
+            self.status_bar.set_busy("Working")
+
+    def destroy(self):
+        SPANS.enabled = self.spans_enabled
+        super().destroy()
+
+    def cancel_render(self, event: Event):
+        self.dfv.dfv.cancel_render()
+        self.status_bar.update_status("Cancelled loading, showing the rows inserted so far")
+
+    def get_selected_rows(self) -> polars.DataFrame:
+        return self.dfv.dfv.selected_rows()
+
+    def get_edits(self) -> polars.DataFrame:
+        return self.dfv.dfv.get_edits()
+
+    def append_rows(self, df: polars.DataFrame, follow: bool = False):
+        self.dfv.append_rows(df, follow)
+
+    def group_by(self, columns: list[str], aggregates: dict[str, str] | None = None):
+        self.dfv.dfv.group_by(columns, aggregates)
+
+    def show_edit_count(self, event: Event):
+        count = self.dfv.dfv.model.journal.count
+        self.status_bar.update_status(f"{count} cells edited", append_to_log=False)
+
+    def show_selection_count(self, event: Event):
+        count = self.dfv.dfv.model.selection.count
+        self.status_bar.update_status(f"{count} rows selected", side="right", append_to_log=False)
+
+    def show_hierarchy_problems(self, event: Event):
+        if self.dfv.hierarchy is not None:
+            self.status_bar.update_status(self.dfv.hierarchy.problems())
 
     def show_status_log(self, event: Event):
-        df = polars.DataFrame(self.status_bar.status_log)
+        df = self.status_bar.status_log.frame()
         show_dataframeviewer(title="Status Log", df=df)
 
+    def show_spans(self, event: Event):
+        # Spans are shown as a tree, each under the span it ran in
+        df = SPANS.frame().with_columns(
+            polars.col("id").cast(polars.String).alias("iid"),
+            polars.col("parent").cast(polars.String).fill_null("").alias("parent"),
+        )
+        show_dataframeviewer(title="Timings", df=df)
+
 
 def show_dataframeviewer(
     title: str = "Polars DataFrame Viewer",
-    df: polars.DataFrame = polars.DataFrame(),
+    df: DataSource = polars.DataFrame(),
     filter: DataFrameViewerFilterTypes = "all",
     iids: list | None = None,
     parents: list | None = None,
+    virtual: bool = False,
+    spill: SpillStore | None = None,
+    profile: bool = False,
+    display_format: DisplayFormat | None = None,
+    release_closed: bool = False,
 ):
-    app = DataFrameViewerApp(df=df, title=title, filters=filter, parents=parents, iids=iids)
+    app = DataFrameViewerApp(
+        df=df,
+        title=title,
+        filters=filter,
+        parents=parents,
+        iids=iids,
+        virtual=virtual,
+        spill=spill,
+        profile=profile,
+        display_format=display_format,
+        release_closed=release_closed,
+    )
     app.mainloop()
@@ -1,17 +1,26 @@
 import tkinter
 from collections import namedtuple
 from datetime import datetime
+from pathlib import Path
 from time import perf_counter
 from tkinter.constants import HORIZONTAL
 from tkinter.ttk import Progressbar
 from typing import Literal, TypeAlias
 
+from gui_library.status_log import StatusLog
+
 StatusBarSide: TypeAlias = Literal["left", "right"]
 StatusBarStatus = namedtuple("status", ["timestamp", "message", "side", "style"])
 
 
 class StatusBar(tkinter.Frame):
-    def __init__(self, master, progress_step_size: int = 5):
+    def __init__(
+        self,
+        master,
+        progress_step_size: int = 5,
+        log_capacity: int = 10_000,
+        log_directory: str | Path | None = None,
+    ):
         super().__init__(master)
 
         self.master = master
@@ -19,10 +28,11 @@ class StatusBar(tkinter.Frame):
         self.columnconfigure(0, weight=1)
         self.columnconfigure(1, weight=1)
         self.grid(sticky="nsew")
-        self._start_time: float = float()
+        # Tasks can nest, each finish_task closes the most recently started one
+        self._start_times: list[float] = list()
         self.progress_step_size: int = progress_step_size
 
-        self.status_log: list = list()
+        self.status_log = StatusLog(capacity=log_capacity, directory=log_directory)
 
         self.make_widgets()
         # self.update_status("Status Bar Initialized!")
@@ -32,6 +42,7 @@ class StatusBar(tkinter.Frame):
         self.right: tkinter.Label = tkinter.Label(self)
         self.progress = Progressbar(self, mode="determinate", length=100, orient=HORIZONTAL)
         self.progress["value"] = 0
+        self.cancel = tkinter.Button(self, text="Cancel", command=self.cancel_click)
 
         self.regrid()
 
@@ -43,34 +54,45 @@ class StatusBar(tkinter.Frame):
         self.right.grid(row=0, column=1, sticky="es")
 
     def update_progress(self, numerator: int, denominator: int, message: str):
-        if numerator >= denominator:
+        # Callers rate-limit by time and hand control back to Tk between chunks, so nothing is forced to redraw here
+        if numerator >= denominator or denominator <= 0:
             self.clear_progress()
-
-        if denominator <= 0:
             return
-        else:
-            prog = numerator / denominator * 100
 
+        prog = numerator / denominator * 100
         if prog < self.progress["value"] + self.progress_step_size:
             return
 
         self.progress.grid(row=0, column=2, sticky="nsew")
+        self.cancel.grid(row=0, column=3, sticky="nsew")
         self.columnconfigure(2, weight=1)
 
         self.progress["value"] = prog
         self.right.config(text=f"{message}, {numerator} / {denominator} ({prog:0.0f}%)")
 
-        self.master.update_idletasks()
+    def set_busy(self, message: str):
+        self.progress.configure(mode="indeterminate")
+        self.progress.grid(row=0, column=2, sticky="nsew")
+        self.columnconfigure(2, weight=1)
+        self.progress.start(10)
+        self.right.config(text=f"{message}...")
+
+    def clear_busy(self):
+        self.progress.stop()
+        self.progress.configure(mode="determinate")
+        self.right.config(text="")
+        self.clear_progress()
 
     def clear_progress(self):
         self.progress.grid_forget()
+        self.cancel.grid_forget()
         self.progress["value"] = 0
         self.right.grid_forget()
         self.regrid()
         self.columnconfigure(2, weight=0)
 
     def start_task(self) -> None:
-        self._start_time = perf_counter()
+        self._start_times.append(perf_counter())
 
     def finish_task(
         self,
@@ -79,10 +101,11 @@ class StatusBar(tkinter.Frame):
         side: StatusBarSide = "left",
         append_to_log: bool = True,
     ) -> None:
-        self._finish_time = perf_counter()
+        finish_time = perf_counter()
+        start_time = self._start_times.pop() if self._start_times else finish_time
 
         self.update_status(
-            message=f"{message} ({self._finish_time - self._start_time:0.4f} seconds)",
+            message=f"{message} ({finish_time - start_time:0.4f} seconds)",
             style=style,
             side=side,
             append_to_log=append_to_log,
@@ -101,7 +124,7 @@ class StatusBar(tkinter.Frame):
         status = StatusBarStatus(datetime.now(), message, side, style)
 
         if append_to_log:
-            self.status_log.append(status)
+            self.status_log.append(*status)
 
         if side == "left":
             self.left.config(text=f"{status.timestamp.strftime('%H:%M:%S')} | {status.message}")
@@ -114,16 +137,5 @@ class StatusBar(tkinter.Frame):
     def right_double_click(self, event: tkinter.Event):
         self.master.event_generate("<<StatusBar.DoubleClick.Right>>")
 
-
-#
-# def log_to_status_bar(path_to_status_bar: list[str]):
-#     def inner(func):
-#         @wraps(func)
-#         def wrapper(*args, **kwargs):
-#             status_bar.start_task()
-#             result = func(*args, **kwargs)
-#             status_bar.finish_task(f"{func.__qualname__}")
-#             status_bar.update_status(f'')
-#             return result
-#         return func
-#     return inner
+    def cancel_click(self):
+        self.master.event_generate("<<StatusBar.Cancel>>")
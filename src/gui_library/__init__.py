@@ -0,0 +1,24 @@
+from importlib import import_module
+
+# The windows pull in polars and tkinter, so they are only imported once one of them is asked for
+EXPORTS = {
+    "DataFrameViewerApp": "gui_library.DataFrameViewer",
+    "DataFrameViewerFilter": "gui_library.DataFrameViewer",
+    "show_dataframeviewer": "gui_library.DataFrameViewer",
+    "ChooserController": "gui_library.DataFrameChooser",
+}
+
+__all__ = list(EXPORTS)
+
+
+def __getattr__(name: str) -> object:
+    if name not in EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *EXPORTS])
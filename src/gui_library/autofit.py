@@ -0,0 +1,60 @@
+from functools import lru_cache
+from typing import Any, Callable
+
+import polars
+
+NESTED_SAMPLE_SIZE = 1000
+FLOAT_SAMPLE_SIZE = 100_000
+
+
+def measurer(font: Any, maxsize: int = 8192) -> Callable[[str], int]:
+    # An LRU over one font's measure, so repeated autofits only pay for strings they have not seen. Its owner keeps
+    # it, it is only valid for that font's Tk interpreter and configuration.
+    return lru_cache(maxsize=maxsize)(font.measure)
+
+
+def candidate_strings(df: polars.DataFrame, top_k: int = 8, sample: int | None = None) -> dict[str, list[str]]:
+    if sample is not None and df.height > sample:
+        df = df.sample(sample, seed=0)
+
+    candidates: dict[str, list[str]] = dict()
+    expressions: list[polars.Expr] = list()
+    for column, dtype in df.schema.items():
+        value = polars.col(column)
+        if dtype.is_nested() or dtype == polars.Object:
+            candidates[column] = [str(value) for value in df.get_column(column).head(NESTED_SAMPLE_SIZE)]
+            continue
+        elif dtype.is_integer() or dtype.is_temporal() or dtype == polars.Boolean:
+            # The extremes are also the longest renderings, no need to format every value
+            extremes = polars.concat_list([value.min(), value.max()]).cast(polars.List(polars.String))
+            expressions.append(extremes.first().alias(column))
+            continue
+        elif dtype.is_float():
+            value = value.head(FLOAT_SAMPLE_SIZE)
+
+        # Character count is a cheap stand-in for pixel width, only the longest few strings get measured
+        text = value.cast(polars.String).drop_nulls()
+        expressions.append(text.top_k_by(text.str.len_chars(), k=top_k).implode().alias(column))
+
+    # One select so polars works through the columns in parallel
+    if expressions:
+        for column, values in df.select(expressions).row(0, named=True).items():
+            candidates[column] = list({value for value in values if value is not None})
+
+    return {column: candidates[column] for column in df.columns}
+
+
+def column_widths(
+    df: polars.DataFrame,
+    measure: Callable[[str], int],
+    measure_heading: Callable[[str], int],
+    top_k: int = 8,
+    sample: int | None = None,
+    padding: float = 1.2,
+) -> dict[str, int]:
+    widths: dict[str, int] = dict()
+    for column, values in candidate_strings(df, top_k=top_k, sample=sample).items():
+        width = max([measure_heading(column), *(measure(value) for value in values)])
+        widths[column] = int(width * padding)
+
+    return widths
@@ -0,0 +1,439 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, TypeAlias
+
+import polars
+
+from gui_library.DataFrameChooser import ChooserModel
+from gui_library.model import FilterModel, visible_columns
+
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+DEPTH = 64
+WIDE_COLUMNS = 100
+# Non-virtual viewers insert every row into the Treeview, past this they are benchmarked virtual
+VIRTUAL_ROWS = 100_000
+WINDOW = 50
+
+# Run before timing and then timed, the setup is not part of the measurement
+Operation: TypeAlias = tuple[Callable[[], Any], Callable[[], Any]]
+
+
+def scrambled(n: int, modulus: int, salt: int = 0) -> polars.Expr:
+    # Deterministic pseudo random integers, generated inside polars so 10M rows take a moment rather than minutes
+    return ((polars.int_range(n, dtype=polars.UInt64) + salt) * 2654435761 % 4294967291 % modulus).cast(polars.UInt32)
+
+
+def words(codes: polars.Expr) -> polars.Expr:
+    return codes.replace_strict(dict(enumerate(WORDS)), return_dtype=polars.String)
+
+
+def identity(n: int, parent: polars.Expr | None = None) -> polars.DataFrame:
+    iid = polars.int_range(n).cast(polars.String).alias("iid")
+    parent = polars.lit("") if parent is None else parent
+    return polars.select(iid, parent.alias("parent"))
+
+
+def flat_frame(n: int) -> polars.DataFrame:
+    return identity(n).with_columns(
+        polars.int_range(n).alias("id"),
+        words(scrambled(n, len(WORDS))).alias("name"),
+        (scrambled(n, 1_000_000, salt=1) / 100).alias("value"),
+        (scrambled(n, 2, salt=2) == 1).alias("flag"),
+        (polars.date(2020, 1, 1) + polars.duration(days=scrambled(n, 2000, salt=3))).alias("day"),
+    )
+
+
+def wide_frame(n: int) -> polars.DataFrame:
+    columns = list()
+    for i in range(WIDE_COLUMNS):
+        value = scrambled(n, 10_000, salt=i)
+        if i % 3 == 1:
+            value = value / 10
+        elif i % 3 == 2:
+            value = words(value % len(WORDS))
+        columns.append(value.alias(f"c{i:03d}"))
+    return identity(n).with_columns(columns)
+
+
+def nested_frame(n: int) -> polars.DataFrame:
+    # Chains DEPTH rows deep, every row the child of the row before it
+    row = polars.int_range(n)
+    parent = polars.when(row % DEPTH == 0).then(polars.lit("")).otherwise((row - 1).cast(polars.String))
+    return identity(n, parent).with_columns(
+        words(scrambled(n, len(WORDS))).alias("name"),
+        (row % DEPTH).alias("depth"),
+    )
+
+
+def strings_frame(n: int) -> polars.DataFrame:
+    sentence = polars.concat_str([words(scrambled(n, len(WORDS), salt=i)) for i in range(12)], separator=" ")
+    return identity(n).with_columns(
+        words(scrambled(n, len(WORDS))).alias("name"),
+        sentence.alias("description"),
+        polars.format("item-{}-{}", scrambled(n, 100_000, salt=20), scrambled(n, 1000, salt=21)).alias("code"),
+    )
+
+
+def nulls_frame(n: int) -> polars.DataFrame:
+    df = flat_frame(n)
+    missing = scrambled(n, 2, salt=30) == 0
+    columns = [column for column in df.columns if column not in ("iid", "parent", "id")]
+    return df.with_columns(polars.when(~missing).then(polars.col(column)).alias(column) for column in columns)
+
+
+SHAPES: dict[str, Callable[[int], polars.DataFrame]] = {
+    "flat": flat_frame,
+    "wide": wide_frame,
+    "nested": nested_frame,
+    "strings": strings_frame,
+    "nulls": nulls_frame,
+}
+
+
+def first_text_column(df: polars.DataFrame) -> str:
+    return next(column for column in visible_columns(df.columns) if df.schema[column] == polars.String)
+
+
+def chosen_iids(df: polars.DataFrame) -> tuple[str, ...]:
+    # One row in a hundred, spread over the whole frame
+    return tuple(df.get_column("iid").gather_every(100).to_list())
+
+
+def headless_operations(df: polars.DataFrame, virtual: bool) -> dict[str, Operation]:
+    # The viewer's own pipeline, rendered into a HeadlessTreeview instead of Tk
+    from gui_library.headless import HeadlessViewer
+
+    filters = {kind: FilterModel(df=df, filters=kind) for kind in ("all", "by_column")}
+    rows = filters["all"].show_data(filters["all"].prepare_data(df))
+    filters["by_column"].show_data(filters["by_column"].prepare_data(df))
+    viewer = HeadlessViewer(None, polars.DataFrame(schema=df.schema), virtual=virtual)
+    viewer.viewport.resize(height=WINDOW)
+    column = first_text_column(df)
+    chooser = ChooserModel(df=df)
+    root = df.get_column("iid")[0]
+
+    def settled(func: Callable[[], Any]) -> Callable[[], None]:
+        def run():
+            func()
+            viewer.run_pending()
+
+        return run
+
+    def load():
+        viewer.update_data(rows)
+        viewer.run_pending()
+
+    def filtered(kind: str, value: str | dict[str, str]) -> Callable[[], None]:
+        def run():
+            viewer.update_data(filters[kind].filter_results(filters[kind].filter_task(value)))
+            viewer.run_pending()
+
+        return run
+
+    def collapsed():
+        load()
+        viewer.sync.close(viewer.treeview, root)
+
+    def expand():
+        viewer.treeview.focus(root)
+        viewer.on_treeview_open()
+
+    return {
+        "load": (viewer.clear, load),
+        "sort": (load, settled(lambda: viewer.sort_df(column))),
+        "autofit": (load, settled(viewer.autofit_columns)),
+        "filter_all": (load, filtered("all", WORDS[0])),
+        "filter_by_column": (load, filtered("by_column", {column: WORDS[0]})),
+        "expand": (collapsed, settled(expand)),
+        "family_tree": (lambda: None, lambda: filters["all"].update_family_tree(df)),
+        "chooser_select": (lambda: None, lambda: chooser.select(chosen_iids(df))),
+    }
+
+
+def widget_operations(root: Any, df: polars.DataFrame, virtual: bool) -> dict[str, Operation]:
+    # Real widgets, driven without mainloop; update_idletasks lets Tk lay out what each call changed
+    from gui_library.DataFrameViewer import DataFrameViewerFilter
+
+    def make(kind: str) -> DataFrameViewerFilter:
+        iids, parents = df.get_column("iid").to_list(), df.get_column("parent").to_list()
+        widget = DataFrameViewerFilter(
+            root, df, iids=iids, parents=parents, filters=kind, virtual=virtual, background=False
+        )
+        widget.grid(row=0, column=0, sticky="nsew")
+        root.update_idletasks()
+        return widget
+
+    filters = {kind: make(kind) for kind in ("all", "by_column")}
+    column = first_text_column(df)
+    chooser = ChooserModel(df=df)
+
+    def settled(func: Callable[[], Any]) -> Callable[[], None]:
+        def run():
+            func()
+            root.update_idletasks()
+
+        return run
+
+    def reset():
+        for widget in filters.values():
+            widget.dfv.update_data(widget.model.view)
+        root.update_idletasks()
+
+    def cold():
+        filters["all"].dfv.clear()
+        root.update_idletasks()
+
+    def filtered(kind: str, value: str) -> Callable[[], None]:
+        widget = filters[kind]
+        entry = widget.entry if kind == "all" else widget.column_entries[column]
+
+        def run():
+            entry.delete(0, "end")
+            entry.insert(0, value)
+            widget.update_filter()
+            root.update_idletasks()
+            entry.delete(0, "end")
+
+        return run
+
+    def autofit():
+        # Measured from a cold cache, like the first fit of a new viewer
+        filters["all"].dfv.measures = None
+        filters["all"].dfv.autofit_columns()
+
+    viewer = filters["all"].dfv
+    root_iid = df.get_column("iid")[0]
+
+    def collapsed():
+        reset()
+        viewer.sync.close(viewer.treeview, root_iid)
+
+    def expand():
+        viewer.treeview.focus(root_iid)
+        viewer.on_treeview_open()
+
+    return {
+        "load": (cold, settled(lambda: viewer.update_data(filters["all"].model.view))),
+        "sort": (reset, settled(lambda: viewer.sort_df(column))),
+        "autofit": (reset, settled(autofit)),
+        "filter_all": (reset, filtered("all", WORDS[0])),
+        "filter_by_column": (reset, filtered("by_column", WORDS[0])),
+        "expand": (collapsed, settled(expand)),
+        "family_tree": (lambda: None, lambda: filters["all"].model.update_family_tree(df)),
+        "chooser_select": (lambda: None, lambda: chooser.select(chosen_iids(df))),
+    }
+
+
+def resident_bytes() -> int | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+@dataclass
+class PeakMemory:
+    # Polars allocates outside the Python heap, so the resident set is sampled while the operation runs
+    interval: float = 0.002
+    start: int | None = None
+    peak: int = 0
+    stopped: threading.Event = field(default_factory=threading.Event)
+    thread: threading.Thread | None = None
+
+    def __enter__(self) -> "PeakMemory":
+        self.start = resident_bytes()
+        if self.start is not None:
+            self.peak = self.start
+            self.thread = threading.Thread(target=self.sample, name="peak-memory", daemon=True)
+            self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.peak = max(self.peak, resident_bytes() or 0)
+
+    def sample(self):
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, resident_bytes() or 0)
+
+    @property
+    def megabytes(self) -> float | None:
+        if self.start is None:
+            return None
+        return (self.peak - self.start) / 2**20
+
+
+@dataclass
+class Measurement:
+    seconds: float
+    peak_mb: float | None
+
+
+def measure(operation: Operation, repeat: int) -> Measurement:
+    # Best of repeat runs, with the largest memory growth any of them needed
+    setup, run = operation
+    seconds: list[float] = list()
+    peaks: list[float] = list()
+    for _ in range(repeat):
+        setup()
+        gc.collect()
+        with PeakMemory() as memory:
+            start = perf_counter()
+            run()
+            seconds.append(perf_counter() - start)
+        if memory.megabytes is not None:
+            peaks.append(memory.megabytes)
+
+    return Measurement(min(seconds), max(peaks) if peaks else None)
+
+
+def open_display() -> Any | None:
+    try:
+        from tkinter import Tk, TclError
+    except ImportError:
+        return None
+
+    try:
+        root = Tk()
+    except TclError:
+        return None
+
+    root.withdraw()
+    root.rowconfigure(0, weight=1)
+    root.columnconfigure(0, weight=1)
+    return root
+
+
+def run(
+    sizes: list[int],
+    shapes: list[str],
+    operations: list[str] | None = None,
+    repeat: int = 3,
+    headless: bool = False,
+    report: Callable[[str], None] = print,
+) -> dict[str, Any]:
+    root = None if headless else open_display()
+    mode = "headless" if root is None else "widgets"
+    results: dict[str, dict[str, float | None]] = dict()
+
+    for shape in shapes:
+        for rows in sizes:
+            df = SHAPES[shape](rows)
+            virtual = rows > VIRTUAL_ROWS
+            if root is None:
+                cases = headless_operations(df, virtual)
+            else:
+                cases = widget_operations(root, df, virtual)
+
+            for name, operation in cases.items():
+                if operations and name not in operations:
+                    continue
+                result = measure(operation, repeat if rows < 1_000_000 else 1)
+                key = f"{mode}/{shape}/{rows}/{name}"
+                results[key] = asdict(result)
+                peak = "" if result.peak_mb is None else f" {result.peak_mb:9.1f} MB"
+                report(f"{key:48} {result.seconds * 1000:10.2f} ms{peak}")
+
+            if root is not None:
+                for child in root.winfo_children():
+                    child.destroy()
+            del cases, df
+
+    if root is not None:
+        root.destroy()
+
+    return {"environment": environment(mode), "results": results}
+
+
+def environment(mode: str) -> dict[str, str]:
+    return {
+        "mode": mode,
+        "python": platform.python_version(),
+        "polars": polars.__version__,
+        "machine": platform.machine(),
+        "system": platform.platform(),
+    }
+
+
+def compare(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float = 0.25,
+    min_seconds: float = 0.005,
+    min_mb: float = 16,
+) -> list[str]:
+    # Only cases in both runs are compared; tiny absolute differences are noise, not regressions
+    regressions: list[str] = list()
+    for key, result in current["results"].items():
+        if key not in baseline["results"]:
+            continue
+        before = baseline["results"][key]
+
+        slower = result["seconds"] - before["seconds"]
+        if slower > min_seconds and result["seconds"] > before["seconds"] * (1 + threshold):
+            regressions.append(f"{key}: {before['seconds'] * 1000:.2f} ms -> {result['seconds'] * 1000:.2f} ms")
+
+        if result["peak_mb"] is None or before["peak_mb"] is None:
+            continue
+        grown = result["peak_mb"] - before["peak_mb"]
+        if grown > min_mb and result["peak_mb"] > before["peak_mb"] * (1 + threshold):
+            regressions.append(f"{key}: {before['peak_mb']:.1f} MB -> {result['peak_mb']:.1f} MB")
+
+    return regressions
+
+
+def parse_size(text: str) -> int:
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    suffix = text[-1].lower()
+    if suffix in multipliers:
+        return int(float(text[:-1]) * multipliers[suffix])
+    return int(text)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Time the viewer pipeline on synthetic frames")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[1_000, 10_000, 100_000], help="e.g. 1k 10M")
+    parser.add_argument("--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument("--operations", nargs="+", help="only time these operations")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--headless", action="store_true", help="use the models even if a display is available")
+    parser.add_argument("--baseline", type=Path, default=Path("benchmarks/baseline.json"))
+    parser.add_argument("--save", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 is 25%%")
+    parser.add_argument("--noise-ms", type=float, default=5, help="slowdowns smaller than this are ignored")
+    args = parser.parse_args(argv)
+
+    current = run(args.sizes, args.shapes, args.operations, repeat=args.repeat, headless=args.headless)
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(current, indent=2))
+        print(f"saved baseline to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}, run with --save to record one")
+        return 0
+
+    regressions = compare(
+        current, json.loads(args.baseline.read_text()), threshold=args.threshold, min_seconds=args.noise_ms / 1000
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
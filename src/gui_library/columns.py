@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+
+from gui_library.viewport import ScrollUnits
+
+# Width Tk gives a Treeview column that was never fit
+DEFAULT_WIDTH = 200
+
+
+@dataclass
+class ColumnWindow:
+    # The columns of a wide frame that are on screen. The first column is the tree column and always shown, the rest
+    # are shown in order minus the hidden ones, from offset on as far as width reaches. Only the projected columns,
+    # the visible ones plus overscan either side, are formatted into Treeview items; scrolling or hiding columns
+    # within the projection only changes the Treeview's displaycolumns.
+    columns: list[str] = field(default_factory=list)
+    order: list[str] = field(default_factory=list)
+    hidden: set[str] = field(default_factory=set)
+    widths: dict[str, int] = field(default_factory=dict)
+    offset: int = 0
+    width: int = 1
+    overscan: int = 8
+    projected: list[str] = field(default_factory=list)
+
+    @property
+    def tree_column(self) -> str | None:
+        return self.columns[0] if self.columns else None
+
+    def reset(self, columns: list[str]):
+        # A frame with other columns; the order and hidden columns carry over for the columns it still has
+        kept = [column for column in self.order if column in columns[1:]]
+        self.order = kept + [column for column in columns[1:] if column not in kept]
+        self.hidden &= set(columns)
+        self.columns = list(columns)
+        self.widths, self.projected = dict(), list()
+        self.offset = self.clamp(self.offset)
+
+    def shown(self) -> list[str]:
+        return [column for column in self.order if column not in self.hidden]
+
+    def clamp(self, offset: int) -> int:
+        return min(max(offset, 0), max(len(self.shown()) - 1, 0))
+
+    def visible(self) -> list[str]:
+        # Up to and including the column that crosses the right edge
+        available = self.width - self.widths.get(self.tree_column or "", DEFAULT_WIDTH)
+        visible: list[str] = list()
+        for column in self.shown()[self.offset :]:
+            visible.append(column)
+            available -= self.widths.get(column, DEFAULT_WIDTH)
+            if available <= 0:
+                break
+
+        return visible
+
+    def projection(self) -> list[str]:
+        return [self.columns[0], *self.projected] if self.columns else list()
+
+    def displayed(self) -> list[str]:
+        # The visible columns the Treeview holds, the ones past a projection made with estimated widths wait for the
+        # next one
+        projected = set(self.projected)
+        return [column for column in self.visible() if column in projected]
+
+    def needs_projection(self) -> bool:
+        projected = set(self.projected)
+        return any(column not in projected for column in self.visible())
+
+    def project(self) -> list[str]:
+        shown = self.shown()
+        stop = self.offset + len(self.visible())
+        self.projected = shown[max(self.offset - self.overscan, 0) : stop + self.overscan]
+        return self.projected
+
+    def resize(self, width: int):
+        self.width = max(width, 1)
+
+    def scroll_to(self, offset: int):
+        self.offset = self.clamp(offset)
+
+    def scroll(self, number: int, what: ScrollUnits = "units"):
+        step = max(len(self.visible()) - 1, 1) if what == "pages" else 1
+        self.scroll_to(self.offset + number * step)
+
+    def moveto(self, fraction: float):
+        self.scroll_to(int(fraction * len(self.shown())))
+
+    def fractions(self) -> tuple[float, float]:
+        total = len(self.shown())
+        if total == 0:
+            return 0.0, 1.0
+        return self.offset / total, min(self.offset + len(self.visible()), total) / total
+
+    def hide(self, columns: list[str]):
+        self.hidden |= {column for column in columns if column in self.order}
+        self.offset = self.clamp(self.offset)
+
+    def show(self, columns: list[str]):
+        self.hidden -= set(columns)
+
+    def move(self, column: str, index: int):
+        # index among all columns but the tree column, hidden ones included
+        self.order.remove(column)
+        self.order.insert(min(max(index, 0), len(self.order)), column)
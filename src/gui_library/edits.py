@@ -0,0 +1,180 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+import polars
+
+from gui_library.formatting import DisplayFormat
+from gui_library.predicates import parse_value
+from gui_library.treeview_sync import HIDDEN_COLUMNS
+
+DELTA_SCHEMA = {
+    "iid": polars.String,
+    "column": polars.String,
+    "before": polars.String,
+    "after": polars.String,
+}
+
+
+def typed_value(text: str, dtype: polars.DataType, display: DisplayFormat = DisplayFormat()) -> Any:
+    # Cell text, as display shows it, as a value of the column's dtype; ValueError if it is not one
+    if dtype == polars.String:
+        return text
+    if dtype.is_nested() or dtype == polars.Object:
+        raise ValueError(f"{dtype} cells cannot be edited")
+    if text in ("", display.null):
+        return None
+
+    try:
+        value = parse_value(text, dtype, display)
+    except ValueError as error:
+        # Text is only cast as it is for dtypes parse_value has no reading of
+        if dtype.is_numeric() or dtype in (polars.Date, polars.Time) or isinstance(dtype, polars.Datetime):
+            raise ValueError(f"{text!r} is not a {dtype} value") from error
+        value = text
+
+    if dtype.is_integer() and isinstance(value, float):
+        raise ValueError(f"{text!r} is not a {dtype} value")
+
+    try:
+        return polars.select(polars.lit(value).cast(dtype, strict=True)).item()
+    except (polars.exceptions.PolarsError, TypeError, OverflowError) as error:
+        raise ValueError(f"{text!r} is not a {dtype} value") from error
+
+
+def display_text(value: Any) -> str | None:
+    return None if value is None else str(value)
+
+
+@dataclass
+class Edit:
+    iid: str
+    column: str
+    before: Any
+    after: Any
+
+
+@dataclass
+class EditBatch:
+    # The frame with a batch of edits written, and where: rows are positions into the frame
+    frame: polars.DataFrame
+    rows: polars.Series
+    columns: list[str]
+
+
+@dataclass
+class EditJournal:
+    # Edits by iid and column. Recorded edits wait until apply writes them into the frame with one scatter per
+    # column, and each applied batch is undone or redone as a whole. Every cell an applied edit touched keeps its
+    # value from before the first edit and its current one, so the changed cells are counted as batches come and go.
+    pending: list[Edit] = field(default_factory=list)
+    done: list[list[Edit]] = field(default_factory=list)
+    undone: list[list[Edit]] = field(default_factory=list)
+    frame: polars.DataFrame | None = None
+    index: dict[str, int] = field(default_factory=dict)
+    cells: dict[tuple[str, str], list[Any]] = field(default_factory=dict)
+    changed: set[tuple[str, str]] = field(default_factory=set)
+
+    def rows(self, frame: polars.DataFrame) -> dict[str, int]:
+        # Built once per loaded frame, edited frames keep their rows and take the index over
+        if frame is not self.frame:
+            self.frame = frame
+            self.index = {iid: row for row, iid in enumerate(frame.get_column("iid").to_list())}
+
+        return self.index
+
+    def reset(self):
+        self.pending, self.done, self.undone = list(), list(), list()
+        self.frame, self.index = None, dict()
+        self.cells, self.changed = dict(), set()
+
+    def record(
+        self, frame: polars.DataFrame, iid: str, column: str, text: str, display: DisplayFormat = DisplayFormat()
+    ) -> bool:
+        # False when the text is what the cell already holds
+        if column in HIDDEN_COLUMNS or column not in frame.columns:
+            raise ValueError(f"column {column!r} cannot be edited")
+
+        after = typed_value(text, frame.schema[column], display)
+        pending = [edit for edit in self.pending if (edit.iid, edit.column) == (iid, column)]
+        before = pending[-1].after if pending else frame.get_column(column)[self.rows(frame)[iid]]
+        if after == before:
+            return False
+
+        self.pending.append(Edit(iid, column, before, after))
+        return True
+
+    def write(self, frame: polars.DataFrame, changes: list[tuple[str, str, Any]]) -> EditBatch:
+        # Rows evicted from a streamed frame since their edit are skipped
+        index = self.rows(frame)
+        values: dict[str, dict[int, Any]] = dict()
+        for iid, column, value in changes:
+            if iid in index:
+                values.setdefault(column, dict())[index[iid]] = value
+
+        # Cloned first, frames from before the edit may still be read by the worker
+        columns = [
+            frame.get_column(column)
+            .clone()
+            .scatter(list(cells), polars.Series(list(cells.values()), dtype=frame.schema[column]))
+            for column, cells in values.items()
+        ]
+        edited = frame.with_columns(columns)
+        rows = polars.Series("row", sorted({row for cells in values.values() for row in cells}), dtype=polars.UInt32)
+
+        self.frame = edited
+        return EditBatch(edited, rows, list(values))
+
+    def apply(self, frame: polars.DataFrame) -> EditBatch | None:
+        if not self.pending:
+            return None
+
+        batch, self.pending = self.pending, list()
+        self.done.append(batch)
+        self.undone.clear()
+        self.track([(edit.iid, edit.column, edit.before, edit.after) for edit in batch])
+        return self.write(frame, [(edit.iid, edit.column, edit.after) for edit in batch])
+
+    def undo(self, frame: polars.DataFrame) -> EditBatch | None:
+        if not self.done:
+            return None
+
+        # Newest first, so a cell edited twice in one batch gets its oldest value back
+        batch = self.done.pop()
+        self.undone.append(batch)
+        self.track([(edit.iid, edit.column, edit.after, edit.before) for edit in reversed(batch)])
+        return self.write(frame, [(edit.iid, edit.column, edit.before) for edit in reversed(batch)])
+
+    def redo(self, frame: polars.DataFrame) -> EditBatch | None:
+        if not self.undone:
+            return None
+
+        batch = self.undone.pop()
+        self.done.append(batch)
+        self.track([(edit.iid, edit.column, edit.before, edit.after) for edit in batch])
+        return self.write(frame, [(edit.iid, edit.column, edit.after) for edit in batch])
+
+    def track(self, changes: list[tuple[str, str, Any, Any]]):
+        # Only the cells of the batch are compared again
+        for iid, column, before, after in changes:
+            cell = self.cells.setdefault((iid, column), [before, after])
+            cell[1] = after
+            if cell[0] == after:
+                self.changed.discard((iid, column))
+            else:
+                self.changed.add((iid, column))
+
+    @property
+    def count(self) -> int:
+        return len(self.changed)
+
+    def delta(self) -> polars.DataFrame:
+        # One row per cell whose applied edits changed it, with the text of its value before and after them
+        return polars.DataFrame(
+            [
+                (iid, column, display_text(before), display_text(after))
+                for (iid, column), (before, after) in self.cells.items()
+                if (iid, column) in self.changed
+            ],
+            schema=DELTA_SCHEMA,
+            orient="row",
+        )
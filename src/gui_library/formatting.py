@@ -0,0 +1,174 @@
+from dataclasses import dataclass, field
+from threading import Lock
+
+import polars
+
+# Appended frames and their strings gain a chunk per append, past this many they are rechunked so gathers stay fast
+MAX_CHUNKS = 64
+
+
+def with_thousands(text: polars.Expr, separator: str) -> polars.Expr:
+    # text holds integers, a separator goes between every three digits counted from the right
+    reversed_separator = separator[::-1]
+    digits = (
+        text.str.strip_prefix("-")
+        .str.reverse()
+        .str.replace_all(r"(\d{3})", "${1}" + reversed_separator.replace("$", "$$"))
+        .str.strip_suffix(reversed_separator)
+        .str.reverse()
+    )
+    return polars.when(text.str.starts_with("-")).then(polars.lit("-") + digits).otherwise(digits)
+
+
+def fixed_point(value: polars.Expr, precision: int, separator: str = "") -> polars.Expr:
+    # Exactly precision decimals; NaN, infinities and values too large to scale are left to polars
+    scale = 10**precision
+    scaled = (value.abs() * scale).round().cast(polars.Int64, strict=False)
+    whole = (scaled // scale).cast(polars.String)
+    text = with_thousands(whole, separator) if separator else whole
+    if precision:
+        text = text + "." + (scaled % scale).cast(polars.String).str.zfill(precision)
+
+    sign = polars.when((value < 0) & (scaled != 0)).then(polars.lit("-")).otherwise(polars.lit(""))
+    return polars.when(scaled.is_null() & value.is_not_null()).then(value.cast(polars.String)).otherwise(sign + text)
+
+
+@dataclass(frozen=True)
+class DisplayFormat:
+    # How cells read on screen. Every column is turned into text by one polars expression, chosen by its dtype;
+    # thousands separators apply to integers and to floats with a fixed precision.
+    null: str = ""
+    float_precision: int | None = None
+    thousands: str = ""
+    date: str = "%Y-%m-%d"
+    datetime: str = "%Y-%m-%d %H:%M:%S%.f"
+    time: str = "%H:%M:%S%.f"
+    booleans: tuple[str, str] = ("False", "True")
+
+    def expression(self, column: str, dtype: polars.DataType) -> polars.Expr:
+        return self.text(polars.col(column), dtype).fill_null(self.null).alias(column)
+
+    def series(self, values: polars.Series) -> polars.Series:
+        return values.to_frame().select(self.expression(values.name, values.dtype)).to_series()
+
+    def frame(self, df: polars.DataFrame, columns: list[str]) -> polars.DataFrame:
+        return df.select([self.expression(column, df.schema[column]) for column in columns])
+
+    def text(self, value: polars.Expr, dtype: polars.DataType) -> polars.Expr:
+        # Nulls stay null, expression fills them in once the whole column is text
+        if dtype == polars.String:
+            return value
+        elif dtype == polars.Boolean:
+            false, true = self.booleans
+            return polars.when(value).then(polars.lit(true)).when(~value).then(polars.lit(false))
+        elif dtype.is_integer():
+            text = value.cast(polars.String)
+            return with_thousands(text, self.thousands) if self.thousands else text
+        elif dtype.is_float():
+            if self.float_precision is None:
+                return value.cast(polars.String)
+            return fixed_point(value, self.float_precision, self.thousands)
+        elif dtype == polars.Date:
+            return value.dt.to_string(self.date)
+        elif isinstance(dtype, polars.Datetime):
+            return value.dt.to_string(self.datetime + ("%:z" if dtype.time_zone else ""))
+        elif dtype == polars.Time:
+            return value.dt.to_string(self.time)
+        elif isinstance(dtype, polars.Duration):
+            return value.dt.to_string("polars")
+        elif isinstance(dtype, (polars.List, polars.Array)):
+            values = value.arr.to_list() if isinstance(dtype, polars.Array) else value
+            elements = self.text(polars.element(), dtype.inner).fill_null(self.null)  # type: ignore
+            return "[" + values.list.eval(elements).list.join(", ") + "]"
+        elif isinstance(dtype, polars.Struct):
+            return value.struct.json_encode()
+        elif dtype == polars.Binary:
+            return value.bin.encode("hex")
+        elif dtype == polars.Null:
+            return polars.lit(None, dtype=polars.String)
+        elif dtype == polars.Object:
+            # The only cells polars cannot turn into text itself
+            return value.map_elements(format, return_dtype=polars.String)
+
+        return value.cast(polars.String)
+
+
+@dataclass
+class DisplayCache:
+    # Display strings by frame and column, made the first time a column of a frame is shown, measured or searched.
+    # The few most recent frames are kept: rendering, autofit and the filters read the same frames from both threads.
+    # Frames made by edits and appends start with the strings of the frame they replace.
+    format: DisplayFormat = field(default_factory=DisplayFormat)
+    size: int = 4
+    frames: list[tuple[polars.DataFrame, dict[str, polars.Series]]] = field(default_factory=list)
+    lock: Lock = field(default_factory=Lock)
+
+    def entry(self, frame: polars.DataFrame) -> dict[str, polars.Series]:
+        with self.lock:
+            cached = next((strings for other, strings in self.frames if other is frame), dict())
+            self.frames = [(other, strings) for other, strings in self.frames if other is not frame]
+            self.frames.append((frame, cached))
+            del self.frames[: -self.size]
+
+        return cached
+
+    def cached(self, frame: polars.DataFrame) -> dict[str, polars.Series]:
+        # A copy of what is kept for the frame, without making it the most recent
+        with self.lock:
+            return dict(next((strings for other, strings in self.frames if other is frame), dict()))
+
+    def strings(self, frame: polars.DataFrame, columns: list[str] | None = None) -> dict[str, polars.Series]:
+        # The frame's cached columns, after formatting the given columns it did not have yet together in one select
+        cached = self.entry(frame)
+        missing = [column for column in columns or list() if column not in cached]
+        if missing:
+            cached.update(self.format.frame(frame, missing).to_dict())
+
+        return cached
+
+    def edited(self, old: polars.DataFrame, new: polars.DataFrame, rows: polars.Series, columns: list[str]):
+        # new is old with the given cells written, only they are formatted again
+        previous = self.cached(old)
+        if not previous or self.cached(new):
+            return
+
+        edited = self.format.frame(new[rows], [column for column in previous if column in columns])
+        strings = {
+            column: text.clone().scatter(rows, edited.get_column(column)) if column in edited.columns else text
+            for column, text in previous.items()
+        }
+        self.carry(new, strings)
+
+    def appended(self, old: polars.DataFrame, new: polars.DataFrame, added: polars.DataFrame, evicted: int):
+        # new is old past its evicted rows with added after them, only the added rows are formatted
+        previous = self.cached(old)
+        if not previous or self.cached(new):
+            return
+
+        texts = self.format.frame(added, list(previous))
+        strings: dict[str, polars.Series] = dict()
+        for column, text in previous.items():
+            text = polars.concat([text, texts.get_column(column)], rechunk=False).slice(evicted)
+            strings[column] = text.rechunk() if text.n_chunks() > MAX_CHUNKS else text
+        self.carry(new, strings)
+
+    def carry(self, frame: polars.DataFrame, strings: dict[str, polars.Series]):
+        # Columns the frame got formatted already, by another thread or an earlier carry, are kept
+        cached = self.entry(frame)
+        for column, text in strings.items():
+            cached.setdefault(column, text)
+
+    def column(self, frame: polars.DataFrame, column: str) -> polars.Series:
+        return self.strings(frame, [column])[column]
+
+    def frame(self, frame: polars.DataFrame, columns: list[str]) -> polars.DataFrame:
+        strings = self.strings(frame, columns)
+        return polars.DataFrame([strings[column] for column in columns])
+
+    def gather(self, frame: polars.DataFrame, columns: list[str], rows: polars.Series) -> polars.DataFrame:
+        # Views of a frame, sorted or filtered, share its strings and only pick their rows
+        return self.frame(frame, columns)[rows]
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+from typing import Iterable
+
+import polars
+
+from gui_library.formatting import DisplayFormat
+from gui_library.sources import LazyRows
+from gui_library.treeview_sync import HIDDEN_COLUMNS
+
+AGGREGATES = ("sum", "mean", "min", "max")
+# Group items get iids no frame can hold, so they never collide with the iids of their member rows
+GROUP = "\x1fgroup:"
+ROW = "\x1frow"
+
+
+def count_column(columns: list[str]) -> str:
+    return "count" if "count" not in columns else "group count"
+
+
+def can_aggregate(name: str, dtype: polars.DataType) -> bool:
+    if name == "sum":
+        return dtype.is_numeric() or dtype == polars.Boolean or isinstance(dtype, polars.Duration)
+    elif name == "mean":
+        return dtype.is_numeric() or dtype == polars.Boolean or dtype.is_temporal() and dtype != polars.Time
+    return not dtype.is_nested() and dtype not in (polars.Object, polars.Null)
+
+
+def checked_aggregates(schema: polars.Schema, by: list[str], aggregates: dict[str, str] | None) -> dict[str, str]:
+    # ValueError for a grouping that cannot be computed, aggregates of key columns are dropped
+    aggregates = {column: name for column, name in (aggregates or dict()).items() if column not in by}
+    missing = [column for column in [*by, *aggregates] if column not in schema]
+    if missing or not by:
+        raise ValueError(f"cannot group by {by}, missing columns: {missing}")
+
+    unknown = [name for name in aggregates.values() if name not in AGGREGATES]
+    if unknown:
+        raise ValueError(f"unknown aggregates {unknown}, expected one of {AGGREGATES}")
+
+    invalid = [
+        f"{name} of {column} ({schema[column]})"
+        for column, name in aggregates.items()
+        if not can_aggregate(name, schema[column])
+    ]
+    if invalid:
+        raise ValueError(f"cannot aggregate {', '.join(invalid)}")
+
+    return aggregates
+
+
+@dataclass
+class Grouping:
+    # One summary row per group of df: its key, its row count and the aggregates, under df's own column names so
+    # the member rows line up below it. members holds each group's row positions into df, in summary order; it is
+    # computed after the summary, which has to be shown first. Lazy sources are grouped in their plans, only the
+    # summary, the key columns and the rows of opened groups are ever read from them.
+    df: polars.DataFrame | LazyRows
+    by: list[str]
+    aggregates: dict[str, str]
+    summary: polars.DataFrame
+    members: polars.Series | None = None
+
+    @classmethod
+    def build(
+        cls, df: polars.DataFrame | LazyRows, by: list[str], aggregates: dict[str, str] | None = None
+    ) -> "Grouping":
+        schema = df.collect_schema()
+        aggregates = checked_aggregates(schema, by, aggregates)
+
+        # Sorted by key, so the summary and the member positions computed later agree on the order of the groups.
+        # The key columns come first, the first of them names each group item.
+        columns = [*by, *[column for column in schema.names() if column not in HIDDEN_COLUMNS and column not in by]]
+        count = count_column(columns)
+        grouped = (
+            cls.source(df)
+            .group_by(by)
+            .agg(
+                polars.len().alias(count),
+                *[getattr(polars.col(column), name)() for column, name in aggregates.items()],
+            )
+            .sort(by)
+            .collect(engine="streaming")
+        )
+
+        summary = grouped.select(
+            (GROUP + polars.int_range(polars.len()).cast(polars.String)).alias("iid"),
+            polars.lit("", dtype=polars.String).alias("parent"),
+            *[
+                polars.col(column) if column in grouped.columns else polars.lit(None, schema[column]).alias(column)
+                for column in columns
+            ],
+            polars.col(count),
+        )
+        return cls(df, by, aggregates, summary)
+
+    @staticmethod
+    def source(df: polars.DataFrame | LazyRows) -> polars.LazyFrame:
+        # Lazy sources are grouped in source order, their rows are gathered by source row number
+        return df.lf if isinstance(df, LazyRows) else df.lazy()
+
+    def index(self) -> polars.Series:
+        # One more pass over df, for the row positions of every group
+        return (
+            self.source(self.df)
+            .with_row_index(ROW)
+            .group_by(self.by)
+            .agg(polars.col(ROW))
+            .sort(self.by)
+            .collect(engine="streaming")
+            .get_column(ROW)
+        )
+
+    def groups(self) -> set[str]:
+        return set(self.summary.get_column("iid"))
+
+    def frame(self, expanded: Iterable[str], display: DisplayFormat = DisplayFormat()) -> polars.DataFrame:
+        # The summary with the member rows of every expanded group below it, as display text: aggregates have dtypes
+        # of their own, a member's cells are formatted from the dtypes of df before the rows are put together
+        summary = display.frame(self.summary, self.summary.columns)
+        groups = sorted(int(iid.removeprefix(GROUP)) for iid in expanded if iid.startswith(GROUP))
+        if not groups or self.members is None:
+            return summary
+
+        members = polars.DataFrame(
+            {"parent": self.summary.get_column("iid").gather(groups), "row": self.members.gather(groups)}
+        ).explode("row", empty_as_null=False)
+        rows = members.get_column("row")
+        df = self.df.gather(rows) if isinstance(self.df, LazyRows) else self.df[rows]
+        iids = df.get_column("iid") if "iid" in df.columns else rows
+
+        count = self.summary.columns[-1]
+        gathered = df.select(
+            iids.cast(polars.String).alias("iid"),
+            members.get_column("parent"),
+            *[display.expression(column, df.schema[column]) for column in self.summary.columns[2:-1]],
+            polars.lit(display.null, dtype=polars.String).alias(count),
+        )
+        return polars.concat([summary, gathered])
@@ -0,0 +1,213 @@
+from collections import Counter
+from tkinter.ttk import Frame
+from typing import Any
+
+import polars
+
+from gui_library.DataFrameViewer import DataFrameViewer, DataFrameViewerFilter
+
+
+class HeadlessTreeview:
+    # Stands in for a ttk.Treeview where there is no display. It keeps the same item tree and counts every item
+    # each call touches, so tests can check how much widget work an update issues.
+    def __init__(self):
+        self.children: dict[str, list[str]] = {"": []}
+        self.parents: dict[str, str | None] = dict()
+        self.values: dict[str, tuple] = dict()
+        self.tags: dict[str, Any] = dict()
+        self.selected: tuple[str, ...] = tuple()
+        self.focused: str = ""
+        self.opened: set[str] = set()
+        self.operations: Counter[str] = Counter()
+
+    def get_children(self, item: str = "") -> tuple[str, ...]:
+        return tuple(self.children[item])
+
+    def exists(self, iid: str) -> bool:
+        return iid in self.parents
+
+    def _unlink(self, iid: str):
+        parent = self.parents[iid]
+        if parent is not None:
+            self.children[parent].remove(iid)
+        self.parents[iid] = None
+
+    def insert(self, parent: str, index: Any, iid: str, text: Any = "", values: Any = (), tags: Any = ""):
+        if iid in self.parents:
+            raise ValueError(f"Item {iid} already exists")
+
+        self.operations["insert"] += 1
+        self.children[iid] = []
+        self.parents[iid] = parent
+        self.children[parent].insert(len(self.children[parent]) if index == "end" else index, iid)
+        self.values[iid] = (text, *values)
+        self.tags[iid] = tags
+        return iid
+
+    def move(self, iid: str, parent: str, index: Any):
+        self.operations["move"] += 1
+        self._unlink(iid)
+        self.parents[iid] = parent
+        self.children[parent].insert(len(self.children[parent]) if index == "end" else index, iid)
+
+    def detach(self, *iids: str):
+        # Each parent's children are filtered once, so detaching a whole level is not quadratic
+        self.operations["detach"] += len(iids)
+        detached = set(iids)
+        for parent in {self.parents[iid] for iid in iids} - {None}:
+            self.children[parent] = [child for child in self.children[parent] if child not in detached]  # type: ignore
+        for iid in iids:
+            self.parents[iid] = None
+
+    def delete(self, *iids: str):
+        for iid in iids:
+            self.operations["delete"] += 1
+            self._delete(iid)
+
+    def _delete(self, iid: str):
+        self._unlink(iid)
+        for child in list(self.children[iid]):
+            self._delete(child)
+        del self.children[iid], self.parents[iid], self.values[iid], self.tags[iid]
+        self.opened.discard(iid)
+
+    def item(
+        self, iid: str, text: Any = None, values: Any = None, tags: Any = None, open: bool | None = None
+    ) -> dict | None:
+        if text is None and values is None and tags is None and open is None:
+            return {
+                "text": self.values[iid][0],
+                "values": list(self.values[iid][1:]),
+                "tags": self.tags[iid],
+                "open": iid in self.opened,
+            }
+
+        self.operations["item"] += 1
+        current = self.values[iid]
+        self.values[iid] = (current[0] if text is None else text, *(current[1:] if values is None else values))
+        if tags is not None:
+            self.tags[iid] = tags
+        if open is not None:
+            (self.opened.add if open else self.opened.discard)(iid)
+        return None
+
+    def selection(self) -> tuple[str, ...]:
+        return self.selected
+
+    def selection_set(self, *items: Any):
+        self.operations["selection_set"] += 1
+        iids = items[0] if len(items) == 1 and isinstance(items[0], (list, tuple)) else items
+        missing = [iid for iid in iids if iid not in self.parents]
+        if missing:
+            raise ValueError(f"Item {missing[0]} not found")
+        self.selected = tuple(iids)
+
+    def focus(self, iid: str | None = None) -> str:
+        if iid is None:
+            return self.focused
+        self.focused = iid
+        return iid
+
+    def rows(self, parent: str = "") -> list[tuple]:
+        # Attached items depth first, as (iid, parent, text, *values)
+        result = list()
+        for iid in self.children[parent]:
+            result.append((iid, parent, *self.values[iid]))
+            result.extend(self.rows(iid))
+        return result
+
+
+class ViewerTreeview(HeadlessTreeview):
+    # The Treeview options and geometry calls the viewer makes on top of its items
+    def __init__(self):
+        super().__init__()
+        self.options: dict[str, tuple] = {"columns": (), "displaycolumns": ()}
+        self.seen: str | None = None
+
+    def __setitem__(self, key: str, value: Any):
+        self.options[key] = tuple(value)
+
+    def __getitem__(self, key: str) -> tuple:
+        return self.options[key]
+
+    def column(self, *args: Any, **kwargs: Any):
+        pass
+
+    def heading(self, *args: Any, **kwargs: Any):
+        pass
+
+    def yview_moveto(self, fraction: float):
+        pass
+
+    def see(self, iid: str):
+        self.seen = iid
+
+
+class HeadlessScrollbar:
+    def set(self, *args: Any):
+        self.fractions = args
+
+
+class HeadlessFrame(Frame):
+    # Sits between the viewer and ttk.Frame, so the viewer's own __init__ runs without a Tk interpreter
+    def __init__(self, parent: Any = None):
+        self.scheduled: dict[str, Any] = dict()
+        self.events: list[str] = list()
+
+    def after(self, delay: int, func: Any, *args: Any) -> str:
+        after_id = f"after#{len(self.scheduled)}"
+        self.scheduled[after_id] = lambda: func(*args)
+        return after_id
+
+    def after_idle(self, func: Any, *args: Any) -> str:
+        return self.after(0, func, *args)
+
+    def after_cancel(self, after_id: str):
+        self.scheduled.pop(after_id, None)
+
+    def run_pending(self):
+        while self.scheduled:
+            self.scheduled.pop(next(iter(self.scheduled)))()
+
+    def event_generate(self, sequence: str, **kwargs: Any):
+        self.events.append(sequence)
+
+    def winfo_screenwidth(self) -> int:
+        return 1920
+
+    def destroy(self):
+        pass
+
+
+class HeadlessViewer(DataFrameViewer, HeadlessFrame):
+    treeview: ViewerTreeview
+
+    def make_widgets(self):
+        self.treeview = ViewerTreeview()
+        self.scrollbar = HeadlessScrollbar()  # type: ignore
+        self.xscrollbar = HeadlessScrollbar()  # type: ignore
+
+    def make_bindings(self):
+        pass
+
+    def font_measures(self):
+        return len, len
+
+
+class HeadlessFilter(DataFrameViewerFilter, HeadlessFrame):
+    # The filter's model and viewer without its entries, driven through update_data and update_filter's tasks
+    dfv: HeadlessViewer
+
+    def make_widgets(self):
+        self.dfv = HeadlessViewer(
+            self,
+            df=polars.DataFrame(schema=self.df.collect_schema()),
+            callback=self.callback,
+            on_message=self.on_message,
+            virtual=self.virtual,
+            worker=self.worker,
+            release_closed=self.release_closed,
+            on_edit=self.model.apply_edits,
+            max_rows=self.max_rows,
+            display=self.model.display,
+        )
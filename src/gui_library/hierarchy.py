@@ -0,0 +1,203 @@
+from dataclasses import dataclass, field
+from math import ceil, log2
+
+import polars
+
+ANCESTORS = polars.List(polars.UInt32)
+# Ancestor lists cost one UInt32 per (row, ancestor) pair, past these limits expansion walks the parents instead
+MAX_ANCESTOR_ENTRIES = 25_000_000
+MAX_ANCESTOR_LEVELS = 256
+
+
+@dataclass
+class Hierarchy:
+    iids: polars.Series
+    parent_index: polars.Series
+    depth: polars.Series
+    missing_parents: list[str] = field(default_factory=list)
+    cycles: list[str] = field(default_factory=list)
+    duplicates: list[str] = field(default_factory=list)
+    ancestors: polars.Series | None = None
+
+    @classmethod
+    def flat(cls, iids: polars.Series) -> "Hierarchy":
+        # Every row at the top level, for frames that only ever had rows without parents appended
+        parent_index = polars.repeat(None, iids.len(), dtype=polars.UInt32, eager=True).alias("index")
+        return cls(iids, parent_index, polars.zeros(iids.len(), polars.UInt32, eager=True).alias("depth"))
+
+    @property
+    def max_depth(self) -> int:
+        return int(self.depth.max() or 0)  # type: ignore
+
+    def problems(self) -> list[str]:
+        problems: list[str] = list()
+        if self.missing_parents:
+            problems.append(f"{len(self.missing_parents)} rows with missing parents: {preview(self.missing_parents)}")
+        if self.cycles:
+            problems.append(f"{len(self.cycles)} parent cycles broken at: {preview(self.cycles)}")
+        if self.duplicates:
+            problems.append(f"{len(self.duplicates)} duplicated iids: {preview(self.duplicates)}")
+        return problems
+
+    def parents(self) -> polars.Series:
+        # Parent column with broken links (missing parents, cut cycles) moved to the top level
+        return self.iids.gather(self.parent_index).fill_null("").alias("parent")
+
+    def expand(self, rows: polars.Series) -> polars.Series:
+        # Row positions of the given rows plus all of their ancestors, sorted and without duplicates
+        keep = polars.repeat(False, self.iids.len(), eager=True)
+
+        if self.ancestors is not None:
+            rows = polars.concat([rows.cast(polars.UInt32), self.ancestors.gather(rows).explode(empty_as_null=False)])
+            return keep.scatter(rows, True).arg_true()
+
+        # Stopping at rows already kept means every ancestor is visited once, however many matches share it
+        frontier = rows.cast(polars.UInt32)
+        while frontier.len():
+            keep = keep.scatter(frontier, True)
+            parents = self.parent_index.gather(frontier).drop_nulls()
+            frontier = parents.filter(~keep.gather(parents)).unique()
+
+        return keep.arg_true()
+
+
+@dataclass
+class ChildIndex:
+    # Every row's children as one run of order: the roots come first, then each row's children in row order,
+    # so row r's children are order[offsets[r]:offsets[r + 1]] and are found without scanning the frame
+    order: polars.Series
+    offsets: polars.Series
+
+    @classmethod
+    def build(cls, parent_rows: polars.Series) -> "ChildIndex":
+        rows = parent_rows.len()
+        order = (
+            polars.DataFrame({"parent": parent_rows.cast(polars.UInt32)})
+            .with_row_index("row")
+            .sort("parent", nulls_last=False, maintain_order=True)
+            .get_column("row")
+        )
+
+        counts = parent_rows.drop_nulls().value_counts(name="count")
+        children = polars.zeros(rows, dtype=polars.UInt32, eager=True)
+        if counts.height:
+            children = children.scatter(counts.get_column(parent_rows.name), counts.get_column("count"))
+
+        roots = parent_rows.null_count()
+        offsets = polars.concat([polars.Series([roots], dtype=polars.UInt32), roots + children.cum_sum()])
+        return cls(order, offsets.cast(polars.UInt32))
+
+    def roots(self) -> polars.Series:
+        return self.order.slice(0, self.offsets[0])
+
+    def children(self, rows: polars.Series) -> polars.Series:
+        spans = polars.int_ranges(self.starts(rows), self.stops(rows), dtype=polars.UInt32, eager=True)
+        return self.order.gather(spans.explode(empty_as_null=False))
+
+    def starts(self, rows: polars.Series) -> polars.Series:
+        return self.offsets.gather(rows)
+
+    def stops(self, rows: polars.Series) -> polars.Series:
+        return self.offsets.gather(rows + 1)
+
+    def has_children(self, rows: polars.Series) -> polars.Series:
+        return self.stops(rows) > self.starts(rows)
+
+    def parents(self) -> polars.Series:
+        # Rows with at least one child
+        counts = self.offsets.diff().slice(1)
+        return counts.gt(0).arg_true().cast(polars.UInt32)
+
+
+def preview(iids: list[str], limit: int = 5) -> str:
+    text = ", ".join(str(iid) for iid in iids[:limit])
+    return f"{text}, ..." if len(iids) > limit else text
+
+
+def pointer_jump(parent_index: polars.Series) -> tuple[polars.Series, polars.Series]:
+    # Each round doubles how far every row has looked up its ancestor chain, so log2(n) rounds reach every root
+    ancestor = parent_index
+    depth = parent_index.is_not_null().cast(polars.UInt32)
+    rounds = ceil(log2(max(parent_index.len(), 2))) + 1
+
+    for _ in range(rounds):
+        if ancestor.null_count() == ancestor.len():
+            break
+        depth = depth + depth.gather(ancestor).fill_null(0)
+        ancestor = ancestor.gather(ancestor)
+
+    return ancestor, depth
+
+
+def cycle_minimums(parent_index: polars.Series, on_cycle: polars.Series) -> polars.Series:
+    # Spreading the smallest row index around each cycle picks exactly one row per cycle to cut
+    label = polars.int_range(parent_index.len(), dtype=polars.UInt32, eager=True)
+    ancestor = parent_index
+    for _ in range(ceil(log2(max(parent_index.len(), 2))) + 1):
+        ahead = label.gather(ancestor).fill_null(label)
+        label = label.zip_with(label <= ahead, ahead)
+        ancestor = ancestor.gather(ancestor)
+
+    return label.gather(on_cycle).unique().sort()
+
+
+def ancestor_lists(parent_index: polars.Series, depth: polars.Series) -> polars.Series:
+    # Built a level at a time: a row's ancestors are its parent's ancestors followed by the parent
+    rows = polars.DataFrame(
+        {
+            "row": polars.int_range(parent_index.len(), dtype=polars.UInt32, eager=True),
+            "parent": parent_index,
+            "depth": depth,
+        }
+    )
+    if rows.is_empty():
+        return polars.Series("ancestors", [], dtype=ANCESTORS)
+
+    levels = rows.partition_by("depth", as_dict=True)
+    level = levels[(0,)].select("row", polars.lit([], dtype=ANCESTORS).alias("ancestors"))
+    done = [level]
+    for index in range(1, int(depth.max()) + 1):  # type: ignore
+        level = (
+            levels[(index,)]
+            .join(level, left_on="parent", right_on="row", how="left")
+            .select("row", polars.concat_list("ancestors", "parent").alias("ancestors"))
+        )
+        done.append(level)
+
+    return polars.concat(done).sort("row").get_column("ancestors")
+
+
+def build_hierarchy(iids: polars.Series, parents: polars.Series) -> Hierarchy:
+    iids = iids.cast(polars.String).alias("iid")
+    parents = parents.cast(polars.String).fill_null("").alias("parent")
+
+    first = iids.is_first_distinct()
+    index = polars.DataFrame(iids).with_row_index("index").filter(first)
+    parent_index = (
+        polars.DataFrame(parents)
+        .join(index, left_on="parent", right_on="iid", how="left", maintain_order="left")
+        .get_column("index")
+    )
+
+    hierarchy = Hierarchy(iids=iids, parent_index=parent_index, depth=parent_index)
+    hierarchy.duplicates = iids.filter(~first).unique(maintain_order=True).to_list()
+    hierarchy.missing_parents = iids.filter((parents != "") & parent_index.is_null()).to_list()
+
+    ancestor, depth = pointer_jump(parent_index)
+
+    # Rows still holding an ancestor after enough rounds to cover every row sit on or below a cycle,
+    # and that ancestor is on the cycle itself
+    on_cycle = ancestor.drop_nulls().unique()
+    if on_cycle.len():
+        cut = cycle_minimums(parent_index, on_cycle)
+        hierarchy.cycles = iids.gather(cut).to_list()
+        parent_index = parent_index.scatter(cut, None)
+        ancestor, depth = pointer_jump(parent_index)
+
+    hierarchy.parent_index = parent_index
+    hierarchy.depth = depth.alias("depth")
+
+    if int(depth.sum()) <= MAX_ANCESTOR_ENTRIES and hierarchy.max_depth <= MAX_ANCESTOR_LEVELS:
+        hierarchy.ancestors = ancestor_lists(parent_index, hierarchy.depth)
+
+    return hierarchy
@@ -1,25 +1,40 @@
 import os
 import sysconfig
 import tomllib
+from functools import lru_cache
 from pathlib import Path
+from typing import Any
 
-from gui_library.library import find
+from gui_library.library import locate
 
 thispath = Path(__file__).parent
 
-PROJECT_ROOT = find("pyproject.toml", return_parent=True, return_path_not_found=thispath)
-PROJECT_TOML = find("pyproject.toml", return_parent=False, return_path_not_found=PROJECT_ROOT)
-VERSION_PATH = find("__version__.py", return_parent=False, return_path_not_found=PROJECT_ROOT)
-CONFIG_PATH = find("settings.toml", return_parent=False, return_path_not_found=PROJECT_ROOT)
-APP_NAME_PATH = find("__app_name__.py", return_parent=False, return_path_not_found=PROJECT_ROOT)
+# Every file is found in the same walk up from this package
+FOUND = locate(("pyproject.toml", "__version__.py", "settings.toml", "__app_name__.py"))
+
+PROJECT_ROOT = FOUND.get("pyproject.toml", thispath)
+
+
+def found(name: str) -> Path:
+    return FOUND[name].joinpath(name) if name in FOUND else PROJECT_ROOT
 
-USER_SCRIPTS_PATH = sysconfig.get_path("scripts", f"{os.name}_user")
 
-if PROJECT_ROOT is None:
-    exit
+PROJECT_TOML = found("pyproject.toml")
+VERSION_PATH = found("__version__.py")
+CONFIG_PATH = found("settings.toml")
+APP_NAME_PATH = found("__app_name__.py")
+
+USER_SCRIPTS_PATH = sysconfig.get_path("scripts", f"{os.name}_user")
 
-assert PROJECT_TOML
 
-if Path(PROJECT_TOML).exists():
+@lru_cache(maxsize=None)
+def pyproject() -> dict[str, Any]:
     with PROJECT_TOML.open("rb") as toml_file:
-        PYPROJECT = tomllib.load(toml_file)
+        return tomllib.load(toml_file)
+
+
+def __getattr__(name: str) -> Any:
+    # pyproject.toml is only read once something asks for it
+    if name == "PYPROJECT" and PROJECT_TOML.is_file():
+        return pyproject()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
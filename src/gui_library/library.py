@@ -1,19 +1,32 @@
+from functools import lru_cache
 from pathlib import Path
 
 
+@lru_cache(maxsize=None)
+def locate(names: tuple[str, ...], start: Path = Path(__file__).parent) -> dict[str, Path]:
+    # One walk up from start, each name maps to the nearest directory holding it; names never found are left out
+    found: dict[str, Path] = dict()
+    current = start
+
+    while current != current.parent and len(found) < len(names):
+        for name in names:
+            if name not in found and current.joinpath(name).exists():
+                found[name] = current
+
+        current = current.parent
+
+    return found
+
+
 def find(
     name: str,
     return_path_not_found: Path,
     return_parent: bool = True,
 ) -> Path:
-    current: Path = Path(__file__).parent
-
-    while current != current.parent:
-        if current.joinpath(name).exists():
-            if return_parent:
-                return current
-            return current.joinpath(name)
-
-        current = current.parent
+    parent = locate((name,)).get(name)
 
-    return return_path_not_found
+    if parent is None:
+        return return_path_not_found
+    if return_parent:
+        return parent
+    return parent.joinpath(name)
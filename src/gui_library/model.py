@@ -0,0 +1,527 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Literal, TypeAlias
+from uuid import uuid4
+
+import polars
+
+from gui_library.edits import EditBatch, EditJournal
+from gui_library.formatting import MAX_CHUNKS, DisplayCache
+from gui_library.hierarchy import Hierarchy, build_hierarchy
+from gui_library.predicates import ColumnFilter, column_predicates
+from gui_library.search import SearchIndex, text_contains, text_expression
+from gui_library.selection import SelectionModel
+from gui_library.sorting import SortEngine, SortKey
+from gui_library.sources import VERSIONS, LazyRows, RowView, with_row_iids
+from gui_library.spans import timed
+from gui_library.spill import SpillStore
+from gui_library.treeview_sync import HIDDEN_COLUMNS, Source
+
+DataFrameViewerFilterTypes: TypeAlias = Literal["all", "by_column"]
+ViewRows: TypeAlias = polars.DataFrame | LazyRows | RowView
+PreparedData: TypeAlias = tuple[ViewRows, Hierarchy | None, SearchIndex | None]
+SortedRows: TypeAlias = tuple[int, ViewRows, polars.Series]
+
+
+def empty_positions() -> polars.Series:
+    return polars.Series("row", [], dtype=polars.UInt32)
+
+
+def visible_columns(columns: list[str]) -> list[str]:
+    return [column for column in columns if column not in HIDDEN_COLUMNS]
+
+
+def collected(rows: ViewRows) -> polars.DataFrame:
+    # The rows as one frame, lazy sources are read whole
+    if isinstance(rows, (LazyRows, RowView)):
+        return rows.collect()
+    return rows
+
+
+def compacted(df: polars.DataFrame) -> polars.DataFrame:
+    return df.rechunk() if df.n_chunks() > MAX_CHUNKS else df
+
+
+def with_identities(df: polars.DataFrame) -> polars.DataFrame:
+    if "iid" not in df.columns:
+        df = df.with_columns(polars.Series("iid", [uuid4().hex for _ in range(df.shape[0])]))
+
+    if "parent" not in df.columns:
+        df = df.with_columns(polars.Series("parent", [str() for _ in range(df.shape[0])]))
+
+    return df
+
+
+@dataclass
+class Appended:
+    # Rows added to the end of a loaded frame, from position first on. The frame's oldest evicted rows were
+    # dropped to stay within the retention limit; matches are the new rows that pass the active filter.
+    frame: polars.DataFrame
+    evicted: int
+    first: int
+    matches: polars.Series
+
+    @classmethod
+    def of(cls, df: polars.DataFrame, chunk: polars.DataFrame, max_rows: int | None = None) -> "Appended":
+        frame = polars.concat([df, chunk.select(df.columns).cast(df.schema)], rechunk=False)  # type: ignore
+        evicted = max(frame.height - max_rows, 0) if max_rows is not None else 0
+        frame = compacted(frame.slice(evicted))
+
+        first = max(df.height - evicted, 0)
+        return cls(frame, evicted, first, polars.int_range(first, frame.height, dtype=polars.UInt32, eager=True))
+
+    @property
+    def added(self) -> polars.DataFrame:
+        return self.frame.slice(self.first)
+
+
+@dataclass
+class ViewerModel:
+    # The rows a DataFrameViewer shows, their order and which are selected. Nothing here touches Tk, the widget
+    # renders whatever this holds.
+    virtual: bool = False
+    df: ViewRows = field(default_factory=polars.DataFrame)
+    unsorted_df: ViewRows = field(default_factory=polars.DataFrame)
+    # Row positions into the loaded frame, in view order; they address the selection
+    positions: polars.Series = field(default_factory=empty_positions)
+    unsorted_positions: polars.Series = field(default_factory=empty_positions)
+    universe: polars.DataFrame | None = None
+    # A filter's rows, shown with the paths to every match opened
+    filtered: bool = False
+    selection: SelectionModel = field(default_factory=SelectionModel)
+    sort_engine: SortEngine = field(default_factory=SortEngine)
+    sort_keys: list[SortKey] = field(default_factory=list)
+    sort: dict[str, bool] = field(default_factory=dict)
+    version: int = field(default_factory=lambda: next(VERSIONS))
+    journal: EditJournal = field(default_factory=EditJournal)
+    # Display strings of the loaded frame, carried over to the frames its edits and appends make
+    display: DisplayCache = field(default_factory=DisplayCache)
+
+    def load(self, df: ViewRows | polars.LazyFrame) -> bool:
+        # False when there is nothing to show, the view is then emptied but keeps its columns
+        if isinstance(df, polars.LazyFrame):
+            df = LazyRows.open(df)
+            self.selection.reset()
+
+        if df.is_empty():
+            self.df = self.unsorted_df = self.df.clear()
+            self.positions = self.unsorted_positions = empty_positions()
+            return False
+
+        self.filtered = isinstance(df, RowView) and not df.full
+
+        # Views of the same frame keep its selection, any other frame starts without one
+        positions = polars.int_range(df.height, dtype=polars.UInt32, eager=True)
+        if isinstance(df, RowView):
+            if df.df is not self.universe:
+                self.universe = df.df
+                self.selection.reset(df.df.height)
+                self.journal.reset()
+
+            positions = df.rows
+            if not self.virtual:
+                df = df.collect()
+        elif isinstance(df, polars.DataFrame):
+            if self.virtual and "iid" not in df.columns:
+                df = df.with_columns(polars.int_range(polars.len()).cast(polars.String).alias("iid"))
+
+            self.universe = df
+            self.selection.reset(df.height)
+            self.journal.reset()
+        else:
+            self.universe = None
+            self.journal.reset()
+
+        self.unsorted_df = df
+        self.unsorted_positions = positions
+        self.version = next(VERSIONS)
+
+        columns = visible_columns(df.columns)
+        if set(self.sort) != set(columns):
+            self.sort = {column: False for column in columns}
+            self.sort_keys = list()
+
+        self.apply_sort()
+        return True
+
+    def frame_row(self, iid: str) -> int | None:
+        # Where an iid sits in the loaded frame, from an index built once per frame
+        if self.universe is None or "iid" not in self.universe.columns:
+            return None
+        return self.journal.rows(self.universe).get(iid)
+
+    def record_edit(self, iid: str, column: str, text: str) -> bool:
+        # Lazy sources are read-only; ValueError when the text is not a value of the column
+        if self.universe is None or "iid" not in self.universe.columns:
+            return False
+        return self.journal.record(self.universe, iid, column, text, self.display.format)
+
+    def write_values(self, column: str, iids: list[str], values: list[Any]) -> EditBatch | None:
+        # Values the application sets itself go straight into the frame, they are not edits to count or undo
+        if self.universe is None or "iid" not in self.universe.columns:
+            return None
+        return self.replace_frame(
+            self.journal.write(self.universe, [(iid, column, value) for iid, value in zip(iids, values)])
+        )
+
+    def flush_edits(self) -> EditBatch | None:
+        return self.replace_frame(self.journal.apply(self.universe)) if self.universe is not None else None
+
+    def undo(self) -> EditBatch | None:
+        self.flush_edits()
+        return self.replace_frame(self.journal.undo(self.universe)) if self.universe is not None else None
+
+    def redo(self) -> EditBatch | None:
+        self.flush_edits()
+        return self.replace_frame(self.journal.redo(self.universe)) if self.universe is not None else None
+
+    def replace_frame(self, batch: EditBatch | None) -> EditBatch | None:
+        # The edited frame takes the place of the loaded one without a reload: rows, selection and the orders of
+        # columns that were not edited all carry over
+        if batch is None:
+            return None
+
+        if self.universe is not None:
+            self.display.edited(self.universe, batch.frame, batch.rows, batch.columns)
+        self.universe = batch.frame
+        self.sort_engine.forget(batch.columns)
+        if isinstance(self.unsorted_df, RowView):
+            view = self.unsorted_df
+            self.unsorted_df = RowView(batch.frame, view.rows, version=view.version, full=view.full)
+        else:
+            self.unsorted_df = batch.frame[self.unsorted_positions]
+
+        self.apply_sort()
+        return batch
+
+    def append(self, result: Appended) -> polars.DataFrame:
+        # Positions shift down by the evicted rows, so do the selection flags; returns the rows the view gained
+        if isinstance(self.unsorted_df, LazyRows):
+            raise ValueError("rows can only be appended to frames")
+
+        if self.universe is not None:
+            self.display.appended(self.universe, result.frame, result.added, result.evicted)
+        self.universe = result.frame
+        self.selection.mask = self.selection.mask.slice(result.evicted)
+
+        # Unsorted positions ascend, the evicted ones are all at the start
+        kept = self.unsorted_positions.search_sorted(result.evicted)
+        self.unsorted_positions = polars.concat([self.unsorted_positions.slice(kept) - result.evicted, result.matches])
+        self.version = next(VERSIONS)
+
+        rows = result.frame[result.matches]
+        if isinstance(self.unsorted_df, RowView):
+            self.unsorted_df = RowView(result.frame, self.unsorted_positions, self.version, self.unsorted_df.full)
+        else:
+            self.unsorted_df = compacted(polars.concat([self.unsorted_df.slice(kept), rows], rechunk=False))
+
+        self.apply_sort()
+        return rows
+
+    def source(self, start: int = 0, length: int | None = None) -> Source | None:
+        # The loaded frame and the positions of the view's rows in it, for views of it that are frames themselves;
+        # their display strings are made for the loaded frame once and gathered in view order
+        if self.universe is None or not isinstance(self.df, polars.DataFrame):
+            return None
+        return self.universe, self.positions.slice(start, length)
+
+    def sample(self) -> polars.DataFrame:
+        # Lazy and spilled sources are autofit and aligned from their first page
+        sample = self.df if isinstance(self.df, polars.DataFrame) else self.df.head()
+        return sample.select(visible_columns(sample.columns))
+
+    def dataframe_copy(self) -> polars.DataFrame:
+        if isinstance(self.df, LazyRows):
+            return self.df.collect()
+        elif isinstance(self.df, RowView):
+            return self.df.df[self.df.rows]
+        return self.df.clone()
+
+    def toggle_sort(self, column: str, add: bool = False) -> list[SortKey]:
+        self.sort[column] = not self.sort[column]
+        key = (column, self.sort[column])
+
+        columns = [sort_column for sort_column, _ in self.sort_keys]
+        if add and column in columns:
+            self.sort_keys[columns.index(column)] = key
+        elif add:
+            self.sort_keys.append(key)
+        else:
+            self.sort_keys = [key]
+
+        return list(self.sort_keys)
+
+    def apply_sort(self):
+        # Lazy sources are shown unsorted until the worker has sorted them, see sort_pending
+        if self.sort_keys and not isinstance(self.unsorted_df, LazyRows):
+            _, self.df, self.positions = self.sorted_frame(
+                self.unsorted_df, self.unsorted_positions, self.sort_keys, self.version
+            )
+        else:
+            self.df, self.positions = self.unsorted_df, self.unsorted_positions
+
+    @timed(rows=lambda self, df, *args: df.height)
+    def sorted_frame(self, df: ViewRows, positions: polars.Series, keys: list[SortKey], version: int) -> SortedRows:
+        if isinstance(df, RowView):
+            # Orderings of the whole frame are cached across filters, rows are gathered as they are realized
+            rows = df.reorder(self.sort_engine.permutation(df.df, keys, df.version))
+            return version, rows, rows.rows
+
+        if isinstance(df, LazyRows):
+            # The sorted rows are collected here on the worker once, the Tk thread only slices pages out of them
+            rows = df.sort(keys)
+            return version, rows, positions
+
+        permutation = self.sort_engine.permutation(df, keys, version)
+        return version, df[permutation], positions.gather(permutation)
+
+    def sort_pending(self) -> bool:
+        return bool(self.sort_keys) and isinstance(self.unsorted_df, LazyRows) and self.df is self.unsorted_df
+
+    def show_sorted(self, result: SortedRows) -> bool:
+        # Sorts of a frame that has since been replaced are dropped
+        version, df, positions = result
+        if version != self.version:
+            return False
+
+        self.df, self.positions = df, positions
+        return True
+
+    def find(self, iid: str) -> int | None:
+        # Lazy sources only learn where a row is again once it is realized
+        if not isinstance(self.df, polars.DataFrame):
+            return None
+
+        matches = self.df.get_column("iid").eq(iid).arg_true()
+        return matches[0] if len(matches) else None
+
+    def window_positions(self, start: int, rows: polars.DataFrame) -> polars.Series:
+        if isinstance(self.df, LazyRows):
+            return rows.get_column("iid").cast(polars.UInt32, strict=False)
+        return self.positions.slice(start, rows.height)
+
+    def view_positions(self, offset: int = 0, length: int | None = None) -> polars.Series:
+        if isinstance(self.df, LazyRows):
+            # Lazy sources are numbered by their iids, rows with iids of their own cannot be selected
+            if offset == 0 and length is None:
+                iids = self.df.get_column("iid")
+            else:
+                iids = self.df.slice(offset, length).get_column("iid")
+            return iids.cast(polars.UInt32, strict=False).drop_nulls()
+
+        return self.positions.slice(offset, length)
+
+    def selected_rows(self) -> polars.DataFrame:
+        # Selected rows of the current view, in view order; rows hidden by a filter stay selected
+        if isinstance(self.df, LazyRows):
+            selected = self.selection.selected()
+            return self.df.filter(polars.col("iid").cast(polars.UInt32, strict=False).is_in(selected.implode()))
+
+        flags = self.selection.is_selected(self.positions)
+        if isinstance(self.df, RowView):
+            return self.df.df[self.positions.filter(flags)]
+        return self.df.filter(flags)
+
+    def update_selection(self, positions: polars.Series, flags: polars.Series) -> bool:
+        # Rows outside the realized window, or hidden by a filter, keep their flags
+        known = positions.is_not_null()
+        positions, flags = positions.filter(known), flags.filter(known)
+        if self.selection.is_selected(positions).equals(flags):
+            return False
+
+        self.selection.set(positions, flags)
+        return True
+
+    def select_all(self):
+        self.selection.set(self.view_positions())
+
+    def clear_selection(self):
+        self.selection.reset(self.selection.mask.len())
+
+    def invert_selection(self):
+        self.selection.toggle(self.view_positions())
+
+    def select_range(self, start: int, stop: int, extend: bool = False):
+        positions = self.view_positions(start, max(stop - start, 0))
+        if extend:
+            self.selection.set(positions)
+        else:
+            self.selection.replace(positions)
+
+    def select_where(self, predicate: polars.Expr, extend: bool = False):
+        if isinstance(self.df, LazyRows):
+            iids = self.df.filter(predicate).get_column("iid")
+            positions = iids.cast(polars.UInt32, strict=False).drop_nulls()
+        else:
+            if isinstance(self.df, RowView):
+                matched = self.df.matches(predicate)
+            else:
+                matched = self.df.select(predicate).to_series()
+            positions = self.positions.filter(matched.fill_null(False))
+
+        if extend:
+            self.selection.set(positions)
+        else:
+            self.selection.replace(positions)
+
+
+@dataclass
+class FilterModel:
+    # The loaded frame of a DataFrameViewerFilter with its hierarchy and search structures. prepare_data and the
+    # filters run on the worker thread, so they only read state that show_data replaces wholesale.
+    df: polars.DataFrame | polars.LazyFrame = field(default_factory=polars.DataFrame)
+    filters: DataFrameViewerFilterTypes = "all"
+    spill: SpillStore | None = None
+    hierarchy: Hierarchy | None = None
+    search: SearchIndex | None = None
+    column_filter: ColumnFilter | None = None
+    view: RowView | None = None
+    # Display strings, shared with the viewer so the filters search the text it shows
+    display: DisplayCache = field(default_factory=DisplayCache)
+
+    @property
+    def lazy(self) -> bool:
+        return isinstance(self.df, polars.LazyFrame)
+
+    @timed(rows=lambda self, df: getattr(df, "height", None))
+    def prepare_data(self, df: polars.DataFrame | polars.LazyFrame) -> PreparedData:
+        if isinstance(df, polars.LazyFrame):
+            if self.spill is not None and self.spill.should_spill(df):
+                return RowView.all(self.spill.spill(with_row_iids(df))), None, None
+
+            rows = LazyRows.open(df)
+            rows.head()
+            return rows, None, None
+
+        df = with_identities(df)
+        df, hierarchy = self.update_family_tree(df)
+        if self.spill is not None and self.spill.should_spill(df):
+            # Searches scan the mapped frame instead of holding its text in memory
+            return RowView.all(self.spill.spill(df)), hierarchy, None
+
+        search = SearchIndex.build(df, display=self.display) if self.filters == "all" else None
+
+        return RowView.all(df), hierarchy, search
+
+    def append_rows(
+        self, chunk: polars.DataFrame, value: str | dict[str, str], max_rows: int | None = None
+    ) -> Appended | None:
+        # Only the chunk is filtered and indexed. None when it cannot be appended in place: lazy sources, empty
+        # frames and rows with parents are loaded again instead.
+        chunk = with_identities(chunk)
+        flat = self.hierarchy is None or self.hierarchy.max_depth == 0
+        if (
+            self.lazy
+            or self.view is None
+            or self.df.is_empty()
+            or not flat
+            or chunk.get_column("parent").fill_null("").ne("").any()
+        ):
+            return None
+
+        result = Appended.of(self.df, chunk, max_rows)  # type: ignore
+        added = result.added
+        predicate = self.filter_expression(value)
+        if predicate is not None:
+            result.matches = added.select(predicate.fill_null(False).arg_true()).to_series() + result.first
+
+        self.display.appended(self.df, result.frame, added, result.evicted)  # type: ignore
+        self.df = result.frame
+        self.view = RowView.all(result.frame)
+        if self.hierarchy is not None:
+            self.hierarchy = Hierarchy.flat(result.frame.get_column("iid"))
+        if self.search is not None:
+            self.search = self.search.appended(result.frame, added.height, result.evicted)
+        if self.column_filter is not None:
+            self.column_filter = self.column_filter.appended(result.frame, added.height, result.evicted)
+
+        return result
+
+    def apply_edits(self, batch: EditBatch):
+        # Only the edited rows are indexed again, filters over untouched columns keep their cached text
+        self.display.edited(self.df, batch.frame, batch.rows, batch.columns)  # type: ignore
+        self.df = batch.frame
+        if self.view is not None:
+            self.view = RowView(batch.frame, self.view.rows, version=self.view.version, full=self.view.full)
+        if self.search is not None:
+            self.search = self.search.updated(batch.rows, batch.frame)
+        if self.column_filter is not None:
+            self.column_filter = self.column_filter.updated(batch.frame, batch.columns)
+
+    def show_data(self, result: PreparedData) -> ViewRows:
+        rows, self.hierarchy, self.search = result
+        if isinstance(rows, LazyRows):
+            self.df, self.view = rows.lf, None
+        else:
+            self.df, self.view = rows.df, rows
+        return rows
+
+    @timed(rows=lambda self, df: df.height)
+    def update_family_tree(self, df: polars.DataFrame) -> tuple[polars.DataFrame, Hierarchy]:
+        hierarchy = build_hierarchy(df.get_column("iid"), df.get_column("parent"))
+
+        # Missing parents and cut cycles end up at the top level instead of failing the Treeview insert
+        return df.with_columns(hierarchy.parents()), hierarchy
+
+    def filter_task(self, value: str | dict[str, str]) -> Callable[[], polars.Series | None]:
+        if isinstance(value, dict):
+            return lambda: self.update_by_column_filter(value)
+        return lambda: self.update_all_filter(value)
+
+    @timed(rows=lambda self, task: None if self.view is None else self.view.height)
+    def filter_results(self, task: Callable[[], polars.Series | None]) -> polars.DataFrame | RowView:
+        view, hierarchy = self.view, self.hierarchy
+        rows = task()
+
+        if view is None or rows is None:
+            return polars.DataFrame() if view is None else view
+
+        if rows.is_empty():
+            return polars.DataFrame()
+
+        # Ancestors of every match stay visible so the matches keep their place in the tree
+        if hierarchy is not None:
+            rows = hierarchy.expand(rows)
+
+        return view.subset(rows)
+
+    def filter_expression(self, value: str | dict[str, str]) -> polars.Expr | None:
+        if isinstance(value, dict):
+            return self.by_column_filter_expression(value)
+        return self.all_filter_expression(value)
+
+    def lazy_filter_results(self, predicate: polars.Expr | None) -> LazyRows:
+        # Counting the matches and reading their first page are the only passes over the source
+        rows = LazyRows.open(self.df if predicate is None else self.df.filter(predicate))  # type: ignore
+        rows.head()
+        return rows
+
+    @timed(rows=lambda self, *args: getattr(self.df, "height", None))
+    def update_all_filter(self, pattern: str) -> polars.Series | None:
+        if not pattern:
+            return None
+
+        # Spilled frames have no index, their text is scanned from the mapped buffers instead
+        search = self.search
+        if search is None:
+            return self.df.select(self.all_filter_expression(pattern).arg_true()).to_series()  # type: ignore
+
+        return search.search(pattern)
+
+    def all_filter_expression(self, pattern: str) -> polars.Expr | None:
+        if not pattern:
+            return None
+        return text_contains(text_expression(self.df.collect_schema(), self.display.format), pattern)
+
+    def by_column_filter_expression(self, patterns: dict[str, str]) -> polars.Expr | None:
+        predicates = column_predicates(patterns, self.df.collect_schema(), display=self.display.format)
+        return polars.all_horizontal(predicates) if predicates else None
+
+    @timed(rows=lambda self, *args: getattr(self.df, "height", None))
+    def update_by_column_filter(self, patterns: dict[str, str]) -> polars.Series | None:
+        # String casts for text matches are cached until the next data load replaces self.df. Both are read once,
+        # the Tk thread swaps them for new ones when rows are appended or edited.
+        column_filter, df = self.column_filter, self.df
+        if column_filter is None or column_filter.df is not df:
+            column_filter = self.column_filter = ColumnFilter(df, self.display)  # type: ignore
+
+        return column_filter.rows(patterns)
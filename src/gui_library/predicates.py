@@ -0,0 +1,203 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from typing import Any, Callable
+from zoneinfo import ZoneInfo
+
+import polars
+
+from gui_library.formatting import DisplayCache, DisplayFormat
+from gui_library.search import is_literal, text_contains
+
+COMPARISONS = (">=", "<=", "!=", ">", "<", "=")
+RANGE = ".."
+
+
+def parse_predicate(pattern: str) -> tuple[bool, str, str]:
+    # "!foo" negates, ">=1", "=null", "1..100" and "2024-01-01..2024-02-01" compare, anything else is a text match
+    negate = pattern.startswith("!") and not pattern.startswith("!=")
+    if negate:
+        pattern = pattern[1:]
+
+    for operator in COMPARISONS:
+        if pattern.startswith(operator):
+            return negate, operator, pattern[len(operator) :].strip()
+
+    if RANGE in pattern:
+        return negate, RANGE, pattern.strip()
+
+    return negate, "~", pattern
+
+
+def displayed_time(operand: str, dtype: polars.DataType, format: str) -> Any:
+    # None unless operand reads in the display's format
+    try:
+        return polars.Series([operand]).str.strptime(dtype, format, strict=True).item()  # type: ignore
+    except polars.exceptions.PolarsError:
+        return None
+
+
+def parse_value(operand: str, dtype: polars.DataType, display: DisplayFormat = DisplayFormat()) -> Any:
+    # Operands read as display writes values, as well as plain numbers, true/false and ISO dates and times
+    if display.thousands and dtype.is_numeric():
+        operand = operand.replace(display.thousands, "")
+
+    if dtype.is_integer():
+        try:
+            return int(operand)
+        except ValueError:
+            return float(operand)
+    elif dtype.is_float() or dtype.is_decimal():
+        return float(operand)
+    elif dtype == polars.Boolean:
+        labels = {
+            "false": False,
+            "true": True,
+            **{label.lower(): value for value, label in enumerate(display.booleans)},
+        }
+        if operand.lower() in labels:
+            return bool(labels[operand.lower()])
+    elif dtype == polars.Date:
+        value = displayed_time(operand, dtype, display.date)
+        return value if value is not None else date.fromisoformat(operand)
+    elif dtype == polars.Datetime:
+        time_zone = getattr(dtype, "time_zone", None)
+        value = displayed_time(operand, dtype, display.datetime + ("%:z" if time_zone else ""))
+        if value is not None:
+            return value
+
+        value = datetime.fromisoformat(operand)
+        # Text without an offset is a time in the column's zone, times with one are converted to it
+        if time_zone and value.tzinfo is None:
+            return value.replace(tzinfo=ZoneInfo(time_zone))
+        elif time_zone:
+            return value.astimezone(ZoneInfo(time_zone))
+        return value
+    elif dtype == polars.Time:
+        value = displayed_time(operand, dtype, display.time)
+        return value if value is not None else time.fromisoformat(operand)
+    elif dtype == polars.String:
+        return operand
+
+    raise ValueError(f"no typed predicates for {dtype}")
+
+
+def compile_predicate(
+    column: str, dtype: polars.DataType, operator: str, operand: str, display: DisplayFormat = DisplayFormat()
+) -> polars.Expr:
+    value = polars.col(column)
+
+    if operator in ("=", "!=") and operand.lower() == "null":
+        return value.is_null() if operator == "=" else value.is_not_null()
+
+    if operator == RANGE:
+        if dtype == polars.String:
+            raise ValueError("ranges need an ordered, non-text column")
+
+        low, high = (bound.strip() for bound in operand.split(RANGE, 1))
+        bounds = [value.is_not_null()]
+        if low:
+            bounds.append(value >= parse_value(low, dtype, display))
+        if high:
+            bounds.append(value <= parse_value(high, dtype, display))
+        return polars.all_horizontal(bounds)
+
+    comparisons = {
+        ">=": value.__ge__,
+        "<=": value.__le__,
+        "!=": value.__ne__,
+        ">": value.__gt__,
+        "<": value.__lt__,
+        "=": value.__eq__,
+    }
+    return comparisons[operator](parse_value(operand, dtype, display))
+
+
+def lazy_text_match(
+    column: str, pattern: str, dtype: polars.DataType = polars.String, display: DisplayFormat = DisplayFormat()
+) -> polars.Expr:
+    return text_contains(display.text(polars.col(column), dtype).str.to_lowercase(), pattern)
+
+
+def column_predicates(
+    patterns: dict[str, str],
+    schema: polars.Schema,
+    text_match: Callable[[str, str], polars.Expr] | None = None,
+    display: DisplayFormat = DisplayFormat(),
+) -> list[polars.Expr]:
+    # Text matches are made against the displayed text, unless text_match makes them
+    predicates: list[polars.Expr] = list()
+    for column, pattern in patterns.items():
+        negate, operator, operand = parse_predicate(pattern)
+        if not operand:
+            # Still being typed, ">" or "!" alone do not filter anything yet
+            continue
+
+        predicate: polars.Expr | None = None
+        if operator != "~":
+            try:
+                predicate = compile_predicate(column, schema[column], operator, operand, display)
+            except ValueError:
+                # Operands that do not parse for the column's dtype are matched as text, as typed
+                operand = operand if operator == RANGE else f"{operator}{operand}"
+
+        if predicate is None and text_match is not None:
+            predicate = text_match(column, operand)
+        elif predicate is None:
+            predicate = lazy_text_match(column, operand, schema[column], display)
+
+        predicate = predicate.fill_null(False)
+        predicates.append(~predicate if negate else predicate)
+
+    return predicates
+
+
+@dataclass
+class ColumnFilter:
+    df: polars.DataFrame
+    # Shared with the viewer, a column shown or fit before its first text match is not formatted again
+    display: DisplayCache = field(default_factory=DisplayCache)
+    # Lowercased display strings, made the first time a column gets a text match and kept for this frame
+    strings: dict[str, polars.Series] = field(default_factory=dict)
+
+    def text(self, column: str) -> polars.Series:
+        if column not in self.strings:
+            self.strings[column] = self.display.column(self.df, column).str.to_lowercase()
+
+        return self.strings[column]
+
+    def appended(self, df: polars.DataFrame, added: int, evicted: int = 0) -> "ColumnFilter":
+        # Renderings made so far are extended with the added rows' display strings, df is the frame after the append
+        # with the added rows at its end. The worker may be adding renderings to this filter meanwhile, so they are
+        # copied out before they are read.
+        strings = {
+            column: polars.concat([text, self.display.column(df, column).tail(added).str.to_lowercase()]).slice(evicted)
+            for column, text in dict(self.strings).items()
+        }
+        return ColumnFilter(df, self.display, strings)
+
+    def updated(self, df: polars.DataFrame, columns: list[str]) -> "ColumnFilter":
+        # An edited frame keeps the renderings of the columns that were not edited
+        strings = {column: text for column, text in dict(self.strings).items() if column not in columns}
+        return ColumnFilter(df, self.display, strings)
+
+    def text_mask(self, column: str, pattern: str) -> polars.Series:
+        text = self.text(column)
+        if not is_literal(pattern):
+            try:
+                return text.str.contains(f"(?i){pattern}")
+            except polars.exceptions.ComputeError:
+                pass
+
+        return text.str.contains(pattern.lower(), literal=True)
+
+    def rows(self, patterns: dict[str, str]) -> polars.Series | None:
+        predicates = column_predicates(
+            patterns,
+            self.df.schema,
+            lambda column, pattern: polars.lit(self.text_mask(column, pattern)),
+            self.display.format,
+        )
+        if not predicates:
+            return None
+
+        return self.df.select(polars.all_horizontal(predicates).arg_true()).to_series()
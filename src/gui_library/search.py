@@ -0,0 +1,168 @@
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+
+import polars
+
+from gui_library.formatting import DisplayCache, DisplayFormat
+
+# Building trigram postings costs far more than a literal scan, so only smaller frames get them
+MAX_INDEX_CHARS = 5_000_000
+GRAM_SIZE = 3
+REGEX_METACHARACTERS = set(".^$*+?{}[]\\|()")
+
+
+def is_literal(pattern: str) -> bool:
+    return not any(character in REGEX_METACHARACTERS for character in pattern)
+
+
+def joined_text(texts: list[polars.Expr]) -> polars.Expr:
+    # Rows are searched as they are displayed, empty cells are left out
+    texts = [polars.when(text != "").then(text) for text in texts]
+    return polars.concat_str(texts, separator=" ", ignore_nulls=True).str.to_lowercase().alias("text")
+
+
+def text_expression(schema: polars.Schema, display: DisplayFormat = DisplayFormat()) -> polars.Expr:
+    return joined_text([display.expression(column, dtype) for column, dtype in schema.items()])
+
+
+def search_text(strings: polars.DataFrame) -> polars.Series:
+    # strings holds the display strings of every column, from a DisplayCache
+    return strings.select(joined_text([polars.col(column) for column in strings.columns])).to_series()
+
+
+def text_contains(text: polars.Expr, pattern: str) -> polars.Expr:
+    # Lazy plans cannot catch a bad regex when they run, so patterns Python cannot compile are matched literally
+    if not is_literal(pattern):
+        try:
+            re.compile(pattern)
+            return text.str.contains(f"(?i){pattern}")
+        except re.error:
+            pass
+
+    return text.str.contains(pattern.lower(), literal=True)
+
+
+def trigram_postings(text: polars.Series) -> tuple[dict[str, int], polars.Series]:
+    starts = polars.int_ranges(0, polars.col("text").str.len_chars().cast(polars.Int64) - GRAM_SIZE + 1)
+    postings = (
+        polars.DataFrame({"row": polars.int_range(text.len(), dtype=polars.UInt32, eager=True), "text": text})
+        .lazy()
+        .with_columns(starts.alias("start"))
+        .explode("start", empty_as_null=False)
+        .select("row", polars.col("text").str.slice("start", GRAM_SIZE).alias("gram"))
+        .group_by("gram")
+        .agg(polars.col("row").unique().sort())
+        .collect()
+    )
+    grams = {gram: index for index, gram in enumerate(postings.get_column("gram").to_list())}
+    return grams, postings.get_column("row")
+
+
+@dataclass
+class SearchIndex:
+    # Edits and appends make a new index rather than change this one, a filter on the worker may still be reading it.
+    # Text is joined from the display strings the viewer shows, edits and appends only format the rows they touch.
+    text: polars.Series
+    display: DisplayCache = field(default_factory=DisplayCache)
+    grams: dict[str, int] | None = None
+    postings: polars.Series | None = None
+    # Recent literal results, a longer pattern containing one of these only needs to look at its rows
+    recent: OrderedDict[tuple[str, bool], polars.Series] = field(default_factory=OrderedDict)
+    recent_size: int = 32
+    # Rows edited since the postings were built, they are always scanned
+    stale: polars.Series = field(default_factory=lambda: polars.Series("row", [], dtype=polars.UInt32))
+
+    @classmethod
+    def build(
+        cls, df: polars.DataFrame, max_chars: int = MAX_INDEX_CHARS, display: DisplayCache | None = None
+    ) -> "SearchIndex":
+        display = display if display is not None else DisplayCache()
+        index = cls(search_text(display.frame(df, df.columns)), display)
+        if int(index.text.str.len_chars().sum()) <= max_chars:
+            index.grams, index.postings = trigram_postings(index.text)
+
+        return index
+
+    def updated(self, rows: polars.Series, df: polars.DataFrame) -> "SearchIndex":
+        # df is the edited frame and rows the positions edited in it; their postings are left as they are
+        return replace(
+            self,
+            text=self.text.clone().scatter(rows, search_text(self.display.gather(df, df.columns, rows))),
+            stale=polars.concat([self.stale, rows]).unique().sort(),
+            recent=OrderedDict(),
+        )
+
+    def appended(self, df: polars.DataFrame, added: int, evicted: int = 0) -> "SearchIndex":
+        # df is the frame after the append, with the added rows at its end. Frames that keep growing are scanned
+        # rather than indexed, postings would be out of date with every append.
+        text = search_text(self.display.frame(df, df.columns).tail(added))
+        return replace(
+            self,
+            text=polars.concat([self.text, text], rechunk=False).slice(evicted),
+            grams=None,
+            postings=None,
+            stale=self.stale.clear(),
+            recent=OrderedDict(),
+        )
+
+    def search(self, pattern: str) -> polars.Series:
+        literal = is_literal(pattern)
+        needle = pattern.lower() if literal else pattern
+        key = (needle, literal)
+
+        if key in self.recent:
+            self.recent.move_to_end(key)
+            return self.recent[key]
+
+        try:
+            rows = self.scan(needle, literal)
+        except polars.exceptions.ComputeError:
+            # Half typed regexes such as "foo(" are searched for as they read
+            needle, literal = pattern.lower(), True
+            rows = self.scan(needle, literal)
+
+        self.recent[key] = rows
+        if len(self.recent) > self.recent_size:
+            self.recent.popitem(last=False)
+
+        return rows
+
+    def candidates(self, needle: str) -> polars.Series | None:
+        candidates: polars.Series | None = None
+        for (previous, literal), rows in self.recent.items():
+            if literal and previous in needle and (candidates is None or rows.len() < candidates.len()):
+                candidates = rows
+
+        if self.grams is None or self.postings is None or len(needle) < GRAM_SIZE:
+            return candidates
+
+        grams = {needle[i : i + GRAM_SIZE] for i in range(len(needle) - GRAM_SIZE + 1)}
+        if not grams <= self.grams.keys():
+            return self.stale
+
+        # Intersect from the rarest trigram up, the candidate set only shrinks
+        postings = sorted((self.postings[self.grams[gram]] for gram in grams), key=len)
+        if candidates is not None:
+            postings.append(candidates)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if candidates.is_empty():
+                break
+            candidates = candidates.filter(candidates.is_in(posting.implode()))
+
+        if self.stale.len():
+            candidates = polars.concat([candidates, self.stale]).unique().sort()
+        return candidates
+
+    def scan(self, needle: str, literal: bool) -> polars.Series:
+        candidates = self.candidates(needle) if literal else None
+        text = self.text if candidates is None else self.text.gather(candidates)
+
+        if literal:
+            hits = text.str.contains(needle, literal=True)
+        else:
+            hits = text.str.contains(f"(?i){needle}")
+
+        rows = hits.arg_true()
+        return rows if candidates is None else candidates.gather(rows)
@@ -0,0 +1,41 @@
+from dataclasses import dataclass, field
+
+import polars
+
+
+@dataclass
+class SelectionModel:
+    # One flag per row of the loaded frame, views address it through row positions instead of Treeview items
+    mask: polars.Series = field(default_factory=lambda: polars.Series("selected", [], dtype=polars.Boolean))
+
+    @property
+    def count(self) -> int:
+        return int(self.mask.sum())
+
+    def reset(self, size: int = 0):
+        self.mask = polars.repeat(False, size, eager=True).alias("selected")
+
+    def fit(self, positions: polars.Series):
+        # Lazy sources learn their size as rows are read, the mask grows with them
+        if not positions.is_empty():
+            size = int(positions.max()) + 1  # type: ignore
+            if size > self.mask.len():
+                self.mask = self.mask.extend_constant(False, size - self.mask.len())
+
+    def is_selected(self, positions: polars.Series) -> polars.Series:
+        self.fit(positions)
+        return self.mask.gather(positions)
+
+    def set(self, positions: polars.Series, selected: bool | polars.Series = True):
+        self.fit(positions)
+        self.mask = self.mask.scatter(positions, selected)
+
+    def toggle(self, positions: polars.Series):
+        self.set(positions, ~self.is_selected(positions))
+
+    def replace(self, positions: polars.Series):
+        self.reset(self.mask.len())
+        self.set(positions)
+
+    def selected(self) -> polars.Series:
+        return self.mask.arg_true()
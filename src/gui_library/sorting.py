@@ -0,0 +1,66 @@
+from dataclasses import dataclass, field
+from threading import Lock
+
+import polars
+
+SortKey = tuple[str, bool]
+
+
+@dataclass
+class SortEngine:
+    version: int = -1
+    orderings: dict[SortKey, polars.Series] = field(default_factory=dict)
+    ranks: dict[SortKey, polars.Series] = field(default_factory=dict)
+    permutations: dict[tuple[SortKey, ...], polars.Series] = field(default_factory=dict)
+    # Permutations may be computed on a worker thread while Tk re-applies the sort to new rows
+    lock: Lock = field(default_factory=Lock)
+
+    def invalidate(self, version: int):
+        if version != self.version:
+            self.version = version
+            self.orderings.clear()
+            self.ranks.clear()
+            self.permutations.clear()
+
+    def forget(self, columns: list[str]):
+        # Edited columns lose their cached orders, every other column keeps them
+        with self.lock:
+            edited = set(columns)
+            for cache in (self.orderings, self.ranks):
+                for key in [key for key in cache if key[0] in edited]:
+                    del cache[key]
+            for keys in [keys for keys in self.permutations if any(column in edited for column, _ in keys)]:
+                del self.permutations[keys]
+
+    def ordering(self, df: polars.DataFrame, key: SortKey) -> polars.Series:
+        if key not in self.orderings:
+            column, descending = key
+            self.orderings[key] = df.get_column(column).arg_sort(descending=descending)
+
+        return self.orderings[key]
+
+    def rank(self, df: polars.DataFrame, key: SortKey) -> polars.Series:
+        # Dense ranks fall out of the cached ordering: walk the sorted values and bump the rank on every change
+        if key not in self.ranks:
+            ordering = self.ordering(df, key)
+            ordered = df.get_column(key[0]).gather(ordering)
+            changed = ordered.ne_missing(ordered.shift(1)).fill_null(True).cast(polars.UInt32)
+            self.ranks[key] = polars.zeros(df.height, polars.UInt32, eager=True).scatter(ordering, changed.cum_sum())
+
+        return self.ranks[key]
+
+    def permutation(self, df: polars.DataFrame, keys: list[SortKey], version: int) -> polars.Series:
+        with self.lock:
+            self.invalidate(version)
+            cache_key = tuple(keys)
+
+            if cache_key not in self.permutations:
+                if len(keys) == 1:
+                    self.permutations[cache_key] = self.ordering(df, keys[0])
+                else:
+                    ranks = polars.DataFrame([self.rank(df, key).alias(str(i)) for i, key in enumerate(keys)])
+                    self.permutations[cache_key] = ranks.select(
+                        polars.arg_sort_by(ranks.columns, maintain_order=True)
+                    ).to_series()
+
+            return self.permutations[cache_key]
@@ -0,0 +1,206 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property, partial
+from itertools import count
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, TypeAlias
+
+import polars
+
+from gui_library.sorting import SortKey
+
+DataSource: TypeAlias = polars.DataFrame | polars.LazyFrame | str | Path
+
+# Every frame wrapped by RowView.all gets its own version, so cached sort orderings are never shared by mistake
+VERSIONS = count()
+
+# Source row numbers while sorting and gathering lazy rows
+ROW_NUMBER = "__row_number"
+
+SCANNERS: dict[str, Callable[..., polars.LazyFrame]] = {
+    ".parquet": polars.scan_parquet,
+    ".pq": polars.scan_parquet,
+    ".csv": polars.scan_csv,
+    ".tsv": partial(polars.scan_csv, separator="\t"),
+    ".ipc": polars.scan_ipc,
+    ".arrow": polars.scan_ipc,
+    ".feather": polars.scan_ipc,
+}
+
+
+def open_source(source: DataSource) -> polars.DataFrame | polars.LazyFrame:
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        if path.suffix.lower() not in SCANNERS:
+            raise ValueError(f"no scanner for {path.suffix!r} files: {path}")
+        return SCANNERS[path.suffix.lower()](path)
+
+    return source
+
+
+def with_row_iids(lf: polars.LazyFrame) -> polars.LazyFrame:
+    # Row numbers of the unfiltered source keep iids stable across filters and sorts
+    if "iid" in lf.collect_schema().names():
+        return lf
+    return lf.with_row_index("iid").with_columns(polars.col("iid").cast(polars.String))
+
+
+@dataclass
+class LazyRows:
+    lf: polars.LazyFrame
+    height: int
+    page_size: int = 1000
+    max_pages: int = 32
+    # The source in view order once sorted, collected in one pass on the worker; pages are slices of it rather than
+    # scans of the source, whose sorted rows are spread all over it
+    ordered: polars.DataFrame | None = None
+    pages: OrderedDict[int, polars.DataFrame] = field(default_factory=OrderedDict)
+    # Tk reads pages while the worker warms the first page of the next plan
+    lock: Lock = field(default_factory=Lock)
+
+    @classmethod
+    def open(cls, lf: polars.LazyFrame, **kwargs: Any) -> "LazyRows":
+        lf = with_row_iids(lf)
+        height = lf.select(polars.len()).collect(engine="streaming").item()
+        return cls(lf, height, **kwargs)
+
+    @cached_property
+    def schema(self) -> polars.Schema:
+        return self.lf.collect_schema()
+
+    def collect_schema(self) -> polars.Schema:
+        return self.schema
+
+    @property
+    def columns(self) -> list[str]:
+        return self.schema.names()
+
+    def is_empty(self) -> bool:
+        return self.height == 0
+
+    def clear(self) -> polars.DataFrame:
+        return polars.DataFrame(schema=self.schema)
+
+    def page(self, index: int) -> polars.DataFrame:
+        with self.lock:
+            if index in self.pages:
+                self.pages.move_to_end(index)
+                return self.pages[index]
+
+        if self.ordered is None:
+            # Slices are pushed into the scan, so only the rows of this page are read
+            page = self.lf.slice(index * self.page_size, self.page_size).collect()
+        else:
+            page = self.ordered.slice(index * self.page_size, self.page_size)
+
+        with self.lock:
+            self.pages[index] = page
+            while len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+
+        return page
+
+    def slice(self, offset: int, length: int | None = None) -> polars.DataFrame:
+        stop = self.height if length is None else min(offset + length, self.height)
+        if offset >= stop:
+            return self.clear()
+
+        first, last = offset // self.page_size, (stop - 1) // self.page_size
+        rows = polars.concat([self.page(index) for index in range(first, last + 1)])
+        return rows.slice(offset - first * self.page_size, stop - offset)
+
+    def head(self, n: int | None = None) -> polars.DataFrame:
+        return self.slice(0, self.page_size if n is None else n)
+
+    def gather(self, rows: polars.Series) -> polars.DataFrame:
+        # Rows by source row number, read from the one slice of the source that holds them all
+        if rows.is_empty():
+            return self.clear()
+
+        first, last = rows.min(), rows.max()
+        found = (
+            self.lf.slice(first, last - first + 1)  # type: ignore
+            .with_row_index(ROW_NUMBER, offset=first)  # type: ignore
+            .filter(polars.col(ROW_NUMBER).is_in(rows.implode()))
+            .collect()
+        )
+        order = rows.rename(ROW_NUMBER).cast(polars.UInt32).to_frame()
+        return order.join(found, on=ROW_NUMBER, how="left", maintain_order="left").drop(ROW_NUMBER)
+
+    def collect(self) -> polars.DataFrame:
+        return self.lf.collect() if self.ordered is None else self.ordered
+
+    def filter(self, *predicates: polars.Expr) -> polars.DataFrame:
+        return self.lf.filter(*predicates).collect(engine="streaming")
+
+    def get_column(self, name: str) -> polars.Series:
+        return self.lf.select(name).collect(engine="streaming").to_series()
+
+    def sort(self, keys: list[SortKey]) -> "LazyRows":
+        # One streaming pass sorts the whole source, later pages only slice the result
+        ordered = self.lf.sort(
+            [column for column, _ in keys], descending=[descending for _, descending in keys], maintain_order=True
+        ).collect(engine="streaming")
+        return LazyRows(self.lf, self.height, page_size=self.page_size, max_pages=self.max_pages, ordered=ordered)
+
+
+@dataclass
+class RowView:
+    # Rows of df in the given order, gathered a window at a time so a memory-mapped df is never copied whole.
+    # The row positions double as selection and sort positions into df.
+    df: polars.DataFrame
+    rows: polars.Series
+    version: int = 0
+    full: bool = False
+
+    @classmethod
+    def all(cls, df: polars.DataFrame) -> "RowView":
+        rows = polars.int_range(df.height, dtype=polars.UInt32, eager=True)
+        return cls(df, rows, version=next(VERSIONS), full=True)
+
+    def subset(self, rows: polars.Series) -> "RowView":
+        return RowView(self.df, rows, version=self.version)
+
+    def collect(self) -> polars.DataFrame:
+        return self.df if self.full else self.df[self.rows]
+
+    @property
+    def height(self) -> int:
+        return self.rows.len()
+
+    def collect_schema(self) -> polars.Schema:
+        return self.df.schema
+
+    @property
+    def columns(self) -> list[str]:
+        return self.df.columns
+
+    def is_empty(self) -> bool:
+        return self.rows.is_empty()
+
+    def clear(self) -> polars.DataFrame:
+        return self.df.clear()
+
+    def slice(self, offset: int, length: int | None = None) -> polars.DataFrame:
+        return self.df[self.rows.slice(offset, length)]
+
+    def head(self, n: int = 1000) -> polars.DataFrame:
+        return self.slice(0, n)
+
+    def filter(self, *predicates: polars.Expr) -> polars.DataFrame:
+        return self.df[self.rows.filter(self.matches(*predicates))]
+
+    def matches(self, *predicates: polars.Expr) -> polars.Series:
+        return self.df.select(polars.all_horizontal(predicates)).to_series().gather(self.rows)
+
+    def get_column(self, name: str) -> polars.Series:
+        return self.df.get_column(name).gather(self.rows)
+
+    def reorder(self, permutation: polars.Series) -> "RowView":
+        # permutation orders all of df, keep the rows of this view in that order
+        if self.rows.len() == self.df.height:
+            return self.subset(permutation)
+
+        keep = polars.repeat(False, self.df.height, eager=True).scatter(self.rows, True)
+        return self.subset(permutation.filter(keep.gather(permutation)))
@@ -0,0 +1,138 @@
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from functools import wraps
+from itertools import count
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Any, Callable, Iterator, TypeVar
+
+import polars
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+SPAN_SCHEMA = {
+    "id": polars.UInt64,
+    "parent": polars.UInt64,
+    "name": polars.String,
+    "thread": polars.String,
+    "depth": polars.UInt32,
+    "start_ms": polars.Float64,
+    "duration_ms": polars.Float64,
+    "rows": polars.Int64,
+}
+
+
+@dataclass
+class Span:
+    name: str
+    rows: int | None = None
+    id: int = 0
+    parent: int | None = None
+    depth: int = 0
+    thread: str = ""
+    start: int = 0
+    duration: int = 0
+    recorder: "SpanRecorder | None" = field(default=None, repr=False)
+
+    def __enter__(self) -> "Span":
+        if self.recorder is not None:
+            self.recorder.enter(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.recorder is not None:
+            self.recorder.exit(self)
+
+
+# Handed out while recording is off; entering it does nothing and whatever is set on it is never read
+NULL_SPAN = Span("disabled")
+
+
+@dataclass
+class SpanRecorder:
+    # Finished spans, newest capacity kept. Each thread nests its own spans, the worker's spans are not children
+    # of the Tk call that submitted them.
+    enabled: bool = False
+    capacity: int = 100_000
+    spans: deque[Span] = field(init=False)
+    ids: Iterator[int] = field(default_factory=lambda: count(1))
+    origin: int = field(default_factory=perf_counter_ns)
+    local: threading.local = field(default_factory=threading.local)
+
+    def __post_init__(self):
+        self.spans = deque(maxlen=self.capacity)
+
+    def span(self, name: str, rows: int | None = None) -> Span:
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(name, rows, recorder=self)
+
+    def stack(self) -> list[Span]:
+        if not hasattr(self.local, "stack"):
+            self.local.stack = list()
+        return self.local.stack
+
+    def enter(self, span: Span):
+        stack = self.stack()
+        span.id = next(self.ids)
+        span.parent = stack[-1].id if stack else None
+        span.depth = len(stack)
+        span.thread = threading.current_thread().name
+        stack.append(span)
+        span.start = perf_counter_ns()
+
+    def exit(self, span: Span):
+        span.duration = perf_counter_ns() - span.start
+        stack = self.stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+        self.spans.append(span)
+
+    def clear(self):
+        self.spans.clear()
+
+    def frame(self) -> polars.DataFrame:
+        spans = list(self.spans)
+        df = polars.DataFrame(
+            {
+                "id": [span.id for span in spans],
+                "parent": [span.parent for span in spans],
+                "name": [span.name for span in spans],
+                "thread": [span.thread for span in spans],
+                "depth": [span.depth for span in spans],
+                "start_ms": [(span.start - self.origin) / 1e6 for span in spans],
+                "duration_ms": [span.duration / 1e6 for span in spans],
+                "rows": [span.rows for span in spans],
+            },
+            schema=SPAN_SCHEMA,
+        )
+        rows_per_sec = polars.col("rows") / (polars.col("duration_ms") / 1000)
+        return df.with_columns(rows_per_sec.alias("rows_per_sec")).sort("start_ms")
+
+    def write_json(self, path: str | Path):
+        self.frame().write_json(path)
+
+    def write_csv(self, path: str | Path):
+        self.frame().write_csv(path)
+
+
+SPANS = SpanRecorder()
+
+
+def timed(name: str | None = None, rows: Callable[..., int | None] | None = None) -> Callable[[F], F]:
+    # rows is called with the same arguments as the decorated function, before it runs
+    def decorator(func: F) -> F:
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not SPANS.enabled:
+                return func(*args, **kwargs)
+
+            with SPANS.span(label, rows(*args, **kwargs) if rows else None):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorator
@@ -0,0 +1,49 @@
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import polars
+
+
+@dataclass
+class SpillStore:
+    # Frames at least threshold bytes are written to Arrow IPC in directory and read back memory-mapped. Lazy sources
+    # have no cheap size, they are paged from the source unless spill_lazy asks for a mapped copy, which gives sorts
+    # and filters random access at the cost of writing the whole source to disk.
+    directory: str | Path | None = None
+    threshold: int = 512 * 1024 * 1024
+    cleanup: bool = True
+    spill_lazy: bool = False
+    paths: list[Path] = field(default_factory=list)
+
+    def should_spill(self, df: polars.DataFrame | polars.LazyFrame) -> bool:
+        if isinstance(df, polars.LazyFrame):
+            return self.spill_lazy
+        return df.estimated_size() >= self.threshold
+
+    def spill(self, df: polars.DataFrame | polars.LazyFrame) -> polars.DataFrame:
+        handle, name = tempfile.mkstemp(prefix="gui_library-", suffix=".arrow", dir=self.directory)
+        os.close(handle)
+        path = Path(name)
+        self.paths.append(path)
+
+        # Memory mapping needs uncompressed buffers, lazy sources stream to disk without being collected
+        if isinstance(df, polars.LazyFrame):
+            df.sink_ipc(path, compression="uncompressed")
+        else:
+            df.write_ipc(path, compression="uncompressed")
+
+        return polars.read_ipc(path, memory_map=True)
+
+    def close(self):
+        if not self.cleanup:
+            return
+
+        for path in list(self.paths):
+            try:
+                path.unlink(missing_ok=True)
+                self.paths.remove(path)
+            except OSError:
+                # Windows keeps files open while any mapped frame is still alive
+                pass
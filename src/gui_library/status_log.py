@@ -0,0 +1,126 @@
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import polars
+
+EPOCH = datetime(1970, 1, 1)
+SIDES = polars.Enum(["left", "right"])
+
+STATUS_SCHEMA = {
+    "timestamp": polars.Datetime("ns"),
+    "message": polars.String,
+    "side": SIDES,
+    "style": polars.Categorical,
+}
+
+
+def timestamp_ns(timestamp: datetime) -> int:
+    # Wall clock nanoseconds, read back by polars as the same naive datetime
+    return (timestamp.replace(tzinfo=None) - EPOCH) // timedelta(microseconds=1) * 1000
+
+
+@dataclass
+class StatusLog:
+    # The newest capacity statuses in a ring of columns. With a directory, each full ring of statuses not yet
+    # written is rolled over to an Arrow IPC segment before it starts being overwritten.
+    capacity: int = 10_000
+    directory: str | Path | None = None
+    timestamps: array = field(init=False)
+    messages: list[str] = field(init=False)
+    sides: list[str] = field(init=False)
+    styles: list[str] = field(init=False)
+    head: int = 0
+    size: int = 0
+    unwritten: int = 0
+    segments: list[Path] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.capacity <= 0:
+            raise ValueError(f"capacity must be positive, got {self.capacity}")
+
+        self.timestamps = array("q", bytes(8 * self.capacity))
+        self.messages = [""] * self.capacity
+        self.sides = ["left"] * self.capacity
+        self.styles = [""] * self.capacity
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, timestamp: datetime, message: str, side: str, style: str):
+        if self.directory is not None and self.unwritten == self.capacity:
+            self.roll_over()
+
+        self.timestamps[self.head] = timestamp_ns(timestamp)
+        self.messages[self.head] = message
+        self.sides[self.head] = side
+        self.styles[self.head] = style
+
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.unwritten += 1
+
+    def index(self, position: int) -> int:
+        # Ring index of the position-th oldest status held
+        return (self.head - self.size + position) % self.capacity
+
+    def position(self, timestamp: datetime | None, default: int) -> int:
+        if timestamp is None:
+            return default
+
+        return bisect_left(range(self.size), timestamp_ns(timestamp), key=lambda i: self.timestamps[self.index(i)])
+
+    def span(self, start: datetime | None = None, stop: datetime | None = None) -> tuple[int, int]:
+        # Statuses are appended in time order, so a time range is found by bisection before anything is copied
+        return self.position(start, 0), self.position(stop, self.size)
+
+    def rows(self, first: int, last: int) -> polars.DataFrame:
+        # At most two contiguous runs of the ring, each copied into the frame in one go
+        runs: list[tuple[int, int]] = list()
+        if first < last:
+            begin, end = self.index(first), self.index(last - 1) + 1
+            runs = [(begin, end)] if begin < end else [(begin, self.capacity), (0, end)]
+
+        return polars.DataFrame(
+            {
+                "timestamp": polars.concat(
+                    [polars.Series(self.timestamps[a:b], dtype=polars.Int64) for a, b in runs]
+                    or [polars.Series([], dtype=polars.Int64)]
+                ),
+                "message": [message for a, b in runs for message in self.messages[a:b]],
+                "side": [side for a, b in runs for side in self.sides[a:b]],
+                "style": [style for a, b in runs for style in self.styles[a:b]],
+            }
+        ).cast(STATUS_SCHEMA)  # type: ignore
+
+    def frame(self, start: datetime | None = None, stop: datetime | None = None) -> polars.DataFrame:
+        return self.rows(*self.span(start, stop))
+
+    def roll_over(self):
+        directory = Path(self.directory)  # type: ignore
+        directory.mkdir(parents=True, exist_ok=True)
+
+        path = directory.joinpath(f"status-{len(self.segments):06d}.arrow")
+        self.rows(self.size - self.unwritten, self.size).write_ipc(path)
+        self.segments.append(path)
+        self.unwritten = 0
+
+    def scan(self, start: datetime | None = None, stop: datetime | None = None) -> polars.LazyFrame:
+        # Rolled over segments are scanned lazily, so the range is filtered without reading whole segments first
+        frames: list[polars.LazyFrame] = list()
+        if self.segments:
+            history = polars.concat([polars.scan_ipc(path) for path in self.segments])
+            if start is not None:
+                history = history.filter(polars.col("timestamp") >= start)
+            if stop is not None:
+                history = history.filter(polars.col("timestamp") < stop)
+            frames.append(history)
+
+        # Statuses still held in memory that were already written to a segment are only taken from the segment
+        first, last = self.span(start, stop)
+        if self.segments:
+            first = max(first, self.size - self.unwritten)
+        frames.append(self.rows(first, max(first, last)).lazy())
+        return polars.concat(frames)
@@ -0,0 +1,466 @@
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Callable, Generator, Iterator, TypeAlias
+from uuid import uuid4
+
+import polars
+
+from gui_library.formatting import DisplayCache
+from gui_library.hierarchy import ChildIndex
+
+HIDDEN_COLUMNS = ("iid", "parent", "tag")
+
+# A frame and positions into it, of the rows of a view gathered from it
+Source: TypeAlias = tuple[polars.DataFrame, polars.Series]
+
+KNOWN_SCHEMA = {
+    "iid": polars.String,
+    "parent": polars.String,
+    "hash": polars.UInt64,
+    "position": polars.UInt32,
+}
+
+# Prefix of the empty child given to unexpanded items, so Tk draws an open indicator for them
+PLACEHOLDER = "\x1fplaceholder:"
+
+
+@dataclass
+class SyncStats:
+    inserted: int = 0
+    moved: int = 0
+    updated: int = 0
+    detached: int = 0
+    deleted: int = 0
+
+    @property
+    def operations(self) -> int:
+        return self.inserted + self.moved + self.updated + self.detached + self.deleted
+
+
+def longest_increasing_subsequence(values: list[int]) -> list[int]:
+    tails: list[int] = list()
+    tails_index: list[int] = list()
+    previous: list[int] = [-1] * len(values)
+
+    for i, value in enumerate(values):
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tails_index.append(i)
+        else:
+            tails[k] = value
+            tails_index[k] = i
+        previous[i] = tails_index[k - 1] if k else -1
+
+    result: list[int] = list()
+    i = tails_index[-1] if tails_index else -1
+    while i >= 0:
+        result.append(i)
+        i = previous[i]
+
+    return result[::-1]
+
+
+@dataclass
+class TreeviewSync:
+    # Detached items are kept alive so rows that come back (e.g. a loosened filter) are re-attached, not re-inserted
+    keep_detached: bool = True
+    # With lazy, only the roots and the children of expanded items are inserted
+    lazy: bool = False
+    columns: list[str] = field(default_factory=list)
+    known: polars.DataFrame = field(default_factory=lambda: polars.DataFrame(schema=KNOWN_SCHEMA))
+    expanded: set[str] = field(default_factory=set)
+    # Opened only to show a filter's matches, they close again with the next unfiltered frame
+    revealed: set[str] = field(default_factory=set)
+    expanded_rows: polars.Series = field(default_factory=lambda: polars.Series("row", [], dtype=polars.UInt32))
+    placeholders: set[str] = field(default_factory=set)
+    # Items whose children are not part of the frame until they are expanded, they get a placeholder regardless
+    expandable: set[str] = field(default_factory=set)
+    # The columns formatted into items, in order and the first as their text; None for every column of the frame
+    projection: list[str] | None = None
+    # Set when the projection changed, the next update rewrites the values of every known item
+    rewrite: bool = False
+    # Items get the display strings of their cells, formatted a column at a time and kept per source frame
+    display: DisplayCache = field(default_factory=DisplayCache)
+    frame: polars.DataFrame | None = None
+    full: polars.DataFrame | None = None
+    index: ChildIndex | None = None
+    shown: polars.DataFrame = field(
+        default_factory=lambda: polars.DataFrame(schema={"iid": polars.String, "row": polars.UInt32})
+    )
+
+    def clear(self, treeview: Any):
+        detached = self.known.filter(polars.col("position").is_null()).get_column("iid").to_list()
+        treeview.delete(*treeview.get_children(), *detached)
+        self.known = self.known.clear()
+        self.expanded, self.revealed, self.placeholders = set(), set(), set()
+        self.expanded_rows = self.expanded_rows.clear()
+        self.frame = self.full = self.index = None
+        self.shown = self.shown.clear()
+
+    def project(self, treeview: Any, columns: list[str] | None):
+        # Items keep their place and only get new values, detached ones are deleted rather than rewritten
+        if columns == self.projection:
+            return
+
+        self.projection = columns
+        detached = self.known.filter(polars.col("position").is_null())
+        if self.keep_detached and detached.height:
+            treeview.delete(
+                *detached.filter(~polars.col("parent").is_in(detached.get_column("iid").implode())).get_column("iid")
+            )
+            self.known = self.known.filter(polars.col("position").is_not_null())
+        self.rewrite = not self.known.is_empty()
+
+    def shown_columns(self, df: polars.DataFrame) -> list[str]:
+        columns = (
+            df.columns if self.projection is None else [column for column in self.projection if column in df.columns]
+        )
+        return [column for column in columns if column not in HIDDEN_COLUMNS]
+
+    def attached(self) -> polars.Series:
+        return self.known.filter(polars.col("position").is_not_null()).get_column("iid")
+
+    def row_hashes(self, df: polars.DataFrame) -> polars.Series:
+        hashed = [column for column in (*self.columns, "tag") if column in df.columns]
+        return polars.Series("hash", df.select(hashed).hash_rows() if hashed else [0] * df.height, dtype=polars.UInt64)
+
+    def parent_expression(self, df: polars.DataFrame, flat: bool) -> polars.Expr:
+        if "parent" in df.columns and not flat:
+            return polars.col("parent").cast(polars.String).fill_null("")
+        return polars.lit("", dtype=polars.String)
+
+    def target(self, df: polars.DataFrame, flat: bool) -> polars.DataFrame:
+        target = df.select(polars.col("iid").cast(polars.String), self.parent_expression(df, flat).alias("parent"))
+        target = target.with_columns(
+            self.row_hashes(df),
+            polars.int_range(polars.len(), dtype=polars.UInt32).alias("row"),
+        )
+
+        # Rows whose parent is not part of this update are shown at the top level
+        parents_present = target.get_column("parent").is_in(target.get_column("iid").implode())
+        target = target.with_columns(polars.when(parents_present).then(polars.col("parent")).otherwise(polars.lit("")))
+
+        return target.with_columns(polars.int_range(polars.len(), dtype=polars.UInt32).over("parent").alias("index"))
+
+    def realized(self, df: polars.DataFrame, flat: bool, open_paths: bool) -> polars.DataFrame:
+        # The child index is built once per frame, opening an item only gathers and hashes the rows now realized
+        if df is not self.frame:
+            rows = df.select(polars.col("iid").cast(polars.String), self.parent_expression(df, flat).alias("parent"))
+            first = rows.select("iid").with_row_index("parent_row").filter(polars.col("iid").is_first_distinct())
+            parent_rows = (
+                rows.join(first, left_on="parent", right_on="iid", how="left", maintain_order="left")
+                .get_column("parent_row")
+                .cast(polars.UInt32)
+            )
+
+            # Rows whose parent is not part of this update are shown at the top level
+            full = rows.select(
+                "iid",
+                polars.when(parent_rows.is_not_null()).then(polars.col("parent")).otherwise(polars.lit("")),
+                polars.int_range(polars.len(), dtype=polars.UInt32).alias("row"),
+            )
+            self.frame, self.full = df, full
+            self.index = ChildIndex.build(parent_rows)
+
+            # A filtered frame holds the matches and their ancestors, opening every parent shows each match
+            self.revealed = set()
+            if open_paths:
+                self.revealed = set(full.get_column("iid").gather(self.index.parents())) - self.expanded
+
+            expanded = polars.Series(list(self.expanded | self.revealed), dtype=polars.String)
+            self.expanded_rows = full.filter(polars.col("iid").is_in(expanded.implode())).get_column("row")
+
+        assert self.full is not None and self.index is not None
+        level = self.index.roots()
+        levels = [level]
+        while level.len():
+            level = self.index.children(level.filter(level.is_in(self.expanded_rows.implode())))
+            levels.append(level)
+
+        # Level by level, so parents are always inserted before their children whatever order the view is in
+        self.shown = self.full[polars.concat(levels)]
+        return self.shown.with_columns(
+            self.row_hashes(df[self.shown.get_column("row")]),
+            polars.int_range(polars.len(), dtype=polars.UInt32).over("parent").alias("index"),
+        )
+
+    def open(self, iid: str) -> bool:
+        # True when iid's children still have to be inserted, by the next update with the same frame
+        if iid in self.revealed:
+            # Opened again by hand, it stays open once the filter is cleared
+            self.revealed.discard(iid)
+            self.expanded.add(iid)
+
+        if not self.lazy or iid in self.expanded or iid not in self.attached():
+            return False
+
+        self.expanded.add(iid)
+        rows = self.shown.filter(polars.col("iid") == iid).get_column("row")
+        self.expanded_rows = polars.concat([self.expanded_rows, rows])
+        return True
+
+    def close(self, treeview: Any, iid: str):
+        # Releases the items below iid; they are inserted again from the frame when it is next opened
+        if iid not in self.expanded | self.revealed:
+            return
+
+        attached = self.known.filter(polars.col("position").is_not_null())
+        released = polars.Series("iid", [iid], dtype=polars.String)
+        level = released
+        while level.len():
+            level = attached.filter(polars.col("parent").is_in(level.implode())).get_column("iid")
+            released = polars.concat([released, level])
+
+        self.expanded.difference_update(released)
+        self.revealed.difference_update(released)
+        self.placeholders.difference_update(released)
+        closed = self.shown.filter(polars.col("iid").is_in(released.implode())).get_column("row")
+        self.expanded_rows = self.expanded_rows.filter(~self.expanded_rows.is_in(closed.implode()))
+
+        treeview.delete(*treeview.get_children(iid))
+        self.known = self.known.filter(~polars.col("iid").is_in(released.slice(1).implode()))
+        treeview.insert(parent=iid, index="end", iid=PLACEHOLDER + iid, text="")
+        self.placeholders.add(iid)
+
+    def unexpanded(self, target: polars.DataFrame) -> set[str]:
+        # Realized items with children that are not realized yet, each of them needs a placeholder
+        if not self.lazy or self.index is None or target.is_empty():
+            return set()
+
+        rows = target.get_column("row")
+        expandable = target.get_column("iid").is_in(polars.Series(list(self.expandable), dtype=polars.String).implode())
+        flags = (self.index.has_children(rows) | expandable) & ~rows.is_in(self.expanded_rows.implode())
+        return set(target.get_column("iid").filter(flags))
+
+    def update(
+        self,
+        treeview: Any,
+        df: polars.DataFrame,
+        flat: bool = False,
+        callback: Callable[[int, int, str], None] | None = None,
+        open_paths: bool = False,
+        source: Source | None = None,
+    ) -> SyncStats:
+        stats = SyncStats()
+        denominator = 0
+        for numerator, denominator in self.steps(treeview, df, flat, stats, open_paths, source):
+            if callback:
+                callback(numerator, denominator, "Updating Treeview")
+
+        if callback:
+            callback(denominator, denominator, "Finished Updating Treeview")
+
+        return stats
+
+    def steps(
+        self,
+        treeview: Any,
+        df: polars.DataFrame,
+        flat: bool = False,
+        stats: SyncStats | None = None,
+        open_paths: bool = False,
+        source: Source | None = None,
+    ) -> Generator[tuple[int, int], None, None]:
+        # Yields (done, total) after every Treeview call; closing the generator early keeps what was applied so far.
+        # With open_paths, a lazy sync expands every item of the frame that has children. A source is the frame df
+        # was gathered from and the positions of df's rows in it, items then get the source's display strings.
+        stats = stats if stats is not None else SyncStats()
+        columns = self.shown_columns(df)
+        if (columns != self.columns and not self.rewrite) or "iid" not in df.columns:
+            self.clear(treeview)
+        self.columns = columns
+
+        if "iid" not in df.columns:
+            df = df.with_columns(polars.Series("iid", [uuid4().hex for _ in range(df.height)]))
+
+        revealed = set(self.revealed)
+        target = self.realized(df, flat, open_paths) if self.lazy else self.target(df, flat)
+        opened, closed = self.revealed - revealed, revealed - self.revealed - self.expanded
+
+        # Items that were just expanded lose their placeholder before their children are put in its place
+        for parent in self.placeholders & (self.expanded | self.revealed):
+            if treeview.exists(PLACEHOLDER + parent):
+                treeview.delete(PLACEHOLDER + parent)
+        self.placeholders -= self.expanded | self.revealed
+        unexpanded = self.unexpanded(target)
+
+        joined = target.join(
+            self.known.rename({"parent": "known_parent", "hash": "known_hash"}),
+            on="iid",
+            how="left",
+            maintain_order="left",
+        )
+
+        known = polars.col("known_hash").is_not_null()
+        attached = polars.col("position").is_not_null()
+
+        # Known items keep their place if their relative order survives, everything else gets moved
+        candidates = joined.filter(attached & (polars.col("parent") == polars.col("known_parent")))
+        positions = candidates.get_column("position")
+        stable_rows = candidates.get_column("row")
+        if positions.len() > 1 and positions.diff().drop_nulls().min() < 0:  # type: ignore
+            stable_rows = stable_rows.gather(longest_increasing_subsequence(positions.to_list()))
+
+        joined = joined.with_columns(polars.col("row").is_in(stable_rows.implode()).alias("stable"))
+
+        removed = self.known.filter(
+            polars.col("position").is_not_null() & ~polars.col("iid").is_in(target.get_column("iid").implode())
+        )
+        moves = joined.filter(known & ~polars.col("stable"))
+        actions = joined.filter(~known | ~polars.col("stable"))
+        updates = joined.filter(known & ((polars.col("hash") != polars.col("known_hash")) | self.rewrite))
+
+        # Detach everything that will be repositioned, so each parent only holds its stable children in order
+        attached_moves = moves.filter(attached).get_column("iid").to_list()
+        if attached_moves:
+            treeview.detach(*attached_moves)
+
+        if self.keep_detached:
+            if removed.height:
+                treeview.detach(*removed.get_column("iid"))
+            stats.detached = removed.height
+        else:
+            removed_iids = removed.get_column("iid")
+            topmost = removed.filter(~polars.col("parent").is_in(removed_iids.implode())).get_column("iid").to_list()
+            if topmost:
+                treeview.delete(*topmost)
+            stats.deleted = removed.height
+
+        ordinal = polars.int_range(polars.len(), dtype=polars.UInt32)
+        known_now = target.select("iid", "parent", "hash", ordinal.alias("position"))
+        if self.keep_detached:
+            detached = self.known.filter(~polars.col("iid").is_in(target.get_column("iid").implode()))
+            known_now = polars.concat(
+                [known_now, detached.with_columns(polars.lit(None, dtype=polars.UInt32).alias("position"))]
+            )
+
+        denominator = actions.height + updates.height
+        applied = 0
+        updated = 0
+        try:
+            inserts = iter(self.items(df, actions.filter(~known).get_column("row"), source))
+            for iid, parent, index, is_known in actions.select("iid", "parent", "index", known).iter_rows():
+                if is_known:
+                    treeview.move(iid, parent, index)
+                    stats.moved += 1
+                else:
+                    _, text, values, tag = next(inserts)
+                    treeview.insert(parent=parent, index=index, iid=iid, text=text, values=values, tags=tag)
+                    stats.inserted += 1
+                    if iid in unexpanded:
+                        self.add_placeholder(treeview, iid)
+
+                applied += 1
+                yield applied, denominator
+
+            # Known items that gained children, and paths a filter opened, once their children are in place
+            for parent in unexpanded - self.placeholders:
+                self.add_placeholder(treeview, parent)
+                yield applied, denominator
+
+            for iid in opened | closed:
+                if treeview.exists(iid):
+                    treeview.item(iid, open=iid in opened)
+
+            for iid, text, values, tag in self.items(df, updates.get_column("row"), source):
+                treeview.item(iid, text=text, values=values, tags=tag)
+                stats.updated += 1
+
+                updated += 1
+                yield applied + updated, denominator
+        finally:
+            if applied + updated < denominator:
+                known_now = self.applied(known_now, actions.slice(applied), updates.slice(updated))
+            else:
+                self.rewrite = False
+            self.known = known_now
+
+    def append(self, treeview: Any, df: polars.DataFrame, source: Source | None = None):
+        # Top level rows after every known item, without diffing the rest of the frame
+        if df.is_empty():
+            return
+
+        start = self.known.get_column("position").max()
+        rows = polars.int_range(df.height, dtype=polars.UInt32, eager=True)
+        for iid, text, values, tag in self.items(df, rows, source):
+            treeview.insert(parent="", index="end", iid=iid, text=text, values=values, tags=tag)
+
+        added = df.select(
+            polars.col("iid").cast(polars.String),
+            polars.lit("", dtype=polars.String).alias("parent"),
+            self.row_hashes(df),
+            (rows + (0 if start is None else start + 1)).cast(polars.UInt32).alias("position"),  # type: ignore
+        )
+        self.known = polars.concat([self.known, added])
+
+    def refresh(self, treeview: Any, df: polars.DataFrame, rows: polars.Series, source: Source | None = None) -> int:
+        # Rewrites the attached items of df's given rows in place, for edits that leave every row where it was.
+        # Items not in the Treeview keep their old hash and are rewritten by the next update; returns the rewrites.
+        iids = df.get_column("iid").gather(rows)
+        rows = rows.filter(iids.is_in(self.attached().implode()))
+        for iid, text, values, tag in self.items(df, rows, source):
+            treeview.item(iid, text=text, values=values, tags=tag)
+
+        hashes = dict(zip(df.get_column("iid").gather(rows), self.row_hashes(df[rows])))
+        self.known = self.known.with_columns(
+            polars.col("iid")
+            .replace_strict(hashes, default=polars.col("hash"), return_dtype=polars.UInt64)
+            .alias("hash")
+        )
+        return rows.len()
+
+    def remove(self, treeview: Any, iids: polars.Series):
+        # Rows that will not come back, attached or detached their items are deleted
+        removed = self.known.filter(polars.col("iid").is_in(iids.cast(polars.String).implode()))
+        if removed.is_empty():
+            return
+
+        treeview.delete(
+            *removed.filter(~polars.col("parent").is_in(removed.get_column("iid").implode())).get_column("iid")
+        )
+        self.known = self.known.filter(~polars.col("iid").is_in(removed.get_column("iid").implode()))
+
+    def add_placeholder(self, treeview: Any, parent: str):
+        if not treeview.exists(PLACEHOLDER + parent):
+            treeview.insert(parent=parent, index="end", iid=PLACEHOLDER + parent, text="")
+        self.placeholders.add(parent)
+
+    def applied(
+        self, known_now: polars.DataFrame, pending: polars.DataFrame, updates: polars.DataFrame
+    ) -> polars.DataFrame:
+        # Pending inserts were never made and pending moves are still detached, pending updates keep their old hash
+        inserts = pending.filter(polars.col("known_hash").is_null()).get_column("iid")
+        moves = pending.filter(polars.col("known_hash").is_not_null()).get_column("iid")
+        hashes = dict(updates.select("iid", "known_hash").iter_rows())
+
+        return known_now.filter(~polars.col("iid").is_in(inserts.implode())).with_columns(
+            polars.when(polars.col("iid").is_in(moves.implode()))
+            .then(polars.lit(None, dtype=polars.UInt32))
+            .otherwise(polars.col("position"))
+            .alias("position"),
+            polars.col("iid")
+            .replace_strict(hashes, default=polars.col("hash"), return_dtype=polars.UInt64)
+            .alias("hash"),
+        )
+
+    def items(
+        self,
+        df: polars.DataFrame,
+        rows: polars.Series,
+        source: Source | None = None,
+    ) -> Iterator[tuple[str, Any, list, Any]]:
+        # Only the shown columns are formatted, a wide frame's other columns are never read. Strings are kept for
+        # the source, so sorting or filtering it formats nothing; frames of their own only format the rows asked for.
+        frame = df.select([column for column in ("iid", "tag") if column in df.columns])[rows]
+        tags = frame.get_column("tag") if "tag" in frame.columns else [""] * frame.height
+        if not self.columns:
+            texts = [()] * frame.height
+        elif source is not None:
+            texts = self.display.gather(source[0], self.columns, source[1].gather(rows)).iter_rows()
+        else:
+            texts = self.display.format.frame(df[rows], self.columns).iter_rows()
+
+        for iid, tag, row in zip(frame.get_column("iid"), tags, texts):
+            text, values = (row[0], list(row[1:])) if row else ("", [])
+            yield iid, text, values, "" if tag is None else tag
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from typing import Literal, TypeAlias
+
+ScrollUnits: TypeAlias = Literal["units", "pages"]
+
+
+@dataclass
+class Viewport:
+    total: int = 0
+    offset: int = 0
+    height: int = 1
+    overscan: int = 20
+    realized_start: int = 0
+    realized_stop: int = 0
+
+    @property
+    def max_offset(self) -> int:
+        return max(self.total - self.height, 0)
+
+    @property
+    def visible_stop(self) -> int:
+        return min(self.offset + self.height, self.total)
+
+    def clamp(self, offset: int) -> int:
+        return min(max(offset, 0), self.max_offset)
+
+    def resize(self, total: int | None = None, height: int | None = None):
+        if total is not None:
+            self.total = max(total, 0)
+        if height is not None:
+            self.height = max(height, 1)
+        self.offset = self.clamp(self.offset)
+
+    def scroll_to(self, offset: int):
+        self.offset = self.clamp(offset)
+
+    def scroll(self, number: int, what: ScrollUnits = "units"):
+        step = self.height if what == "pages" else 1
+        self.scroll_to(self.offset + number * step)
+
+    def moveto(self, fraction: float):
+        self.scroll_to(int(fraction * self.total))
+
+    def ensure_visible(self, row: int):
+        if row < self.offset:
+            self.scroll_to(row)
+        elif row >= self.offset + self.height:
+            self.scroll_to(row - self.height + 1)
+
+    def fractions(self) -> tuple[float, float]:
+        if self.total <= 0:
+            return 0.0, 1.0
+        return self.offset / self.total, self.visible_stop / self.total
+
+    def window(self) -> tuple[int, int]:
+        start = max(self.offset - self.overscan, 0)
+        stop = min(self.offset + self.height + self.overscan, self.total)
+        return start, stop
+
+    def needs_render(self) -> bool:
+        if self.realized_stop <= self.realized_start:
+            return self.total > 0
+        return self.offset < self.realized_start or self.visible_stop > self.realized_stop
+
+    def realize(self) -> tuple[int, int]:
+        self.realized_start, self.realized_stop = self.window()
+        return self.realized_start, self.realized_stop
+
+    def invalidate(self):
+        self.realized_start = self.realized_stop = 0
+
+    def is_realized(self, row: int) -> bool:
+        return self.realized_start <= row < self.realized_stop
+
+    def realized_fraction(self) -> float:
+        count = self.realized_stop - self.realized_start
+        if count <= 0:
+            return 0.0
+        # Nudge a quarter row into the target so Tk's rounding lands on the intended first item
+        return (self.offset - self.realized_start + 0.25) / count
@@ -0,0 +1,256 @@
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from math import inf
+from queue import Empty, Queue
+from time import perf_counter
+from typing import Any, Callable, Generator
+
+
+@dataclass
+class WorkerResult:
+    channel: str
+    generation: int
+    result: Any = None
+    error: BaseException | None = None
+    on_done: Callable[[Any], None] | None = None
+    on_error: Callable[[BaseException], None] | None = None
+
+
+@dataclass
+class BackgroundWorker:
+    # widget only needs after(); polars releases the GIL, so a thread is enough to keep Tk responsive
+    widget: Any = None
+    synchronous: bool = False
+    poll_interval: int = 15
+    on_busy: Callable[[bool], None] | None = None
+    generations: defaultdict[str, int] = field(default_factory=lambda: defaultdict(int))
+    pending: int = 0
+    polling: bool = False
+    results: Queue = field(default_factory=Queue)
+    executor: ThreadPoolExecutor | None = None
+
+    def current(self, channel: str, generation: int) -> bool:
+        return self.generations[channel] == generation
+
+    def cancel(self, channel: str):
+        self.generations[channel] += 1
+
+    def submit(
+        self,
+        channel: str,
+        func: Callable[..., Any],
+        *args,
+        on_done: Callable[[Any], None] | None = None,
+        on_error: Callable[[BaseException], None] | None = None,
+    ) -> int:
+        self.cancel(channel)
+        generation = self.generations[channel]
+
+        if self.synchronous or self.widget is None:
+            # Errors go to on_error here too, so callers handle them the same way in either mode
+            try:
+                result = func(*args)
+            except Exception as error:
+                if on_error is None:
+                    raise
+                on_error(error)
+                return generation
+
+            if on_done:
+                on_done(result)
+            return generation
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gui_library")
+
+        self.set_pending(self.pending + 1)
+        future = self.executor.submit(self.run, channel, generation, func, *args)
+        future.add_done_callback(
+            lambda future: self.results.put(self.collect(future, channel, generation, on_done, on_error))
+        )
+        self.schedule_poll()
+
+        return generation
+
+    def run(self, channel: str, generation: int, func: Callable[..., Any], *args) -> Any:
+        # Requests superseded while they sat in the queue are skipped, not computed
+        if not self.current(channel, generation):
+            return None
+        return func(*args)
+
+    def collect(
+        self,
+        future: Future,
+        channel: str,
+        generation: int,
+        on_done: Callable[[Any], None] | None,
+        on_error: Callable[[BaseException], None] | None,
+    ) -> WorkerResult:
+        if future.cancelled():
+            return WorkerResult(channel, generation)
+
+        error = future.exception()
+        result = None if error else future.result()
+        return WorkerResult(channel, generation, result, error, on_done, on_error)
+
+    def schedule_poll(self):
+        if not self.polling:
+            self.polling = True
+            self.widget.after(self.poll_interval, self.poll)
+
+    def poll(self):
+        self.polling = False
+
+        try:
+            while True:
+                try:
+                    item: WorkerResult = self.results.get_nowait()
+                except Empty:
+                    break
+
+                self.set_pending(self.pending - 1)
+
+                # Only the newest request on a channel is handed back to Tk, older ones are dropped
+                if not self.current(item.channel, item.generation):
+                    continue
+
+                if item.error is not None:
+                    if item.on_error:
+                        item.on_error(item.error)
+                        continue
+                    raise item.error
+
+                if item.on_done:
+                    item.on_done(item.result)
+        finally:
+            if self.pending:
+                self.schedule_poll()
+
+    def set_pending(self, pending: int):
+        was_busy = self.pending > 0
+        self.pending = pending
+        if self.on_busy and was_busy != (pending > 0):
+            self.on_busy(pending > 0)
+
+    def shutdown(self):
+        for channel in list(self.generations):
+            self.cancel(channel)
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+@dataclass
+class Debouncer:
+    widget: Any
+    delay: int
+    func: Callable[..., Any]
+    after_id: str | None = None
+
+    def __call__(self, *args):
+        if self.delay <= 0:
+            return self.func(*args)
+
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+
+        self.after_id = self.widget.after(self.delay, self.fire, *args)
+
+    def fire(self, *args):
+        self.after_id = None
+        self.func(*args)
+
+
+@dataclass
+class Batcher:
+    # Collects the items it is called with and hands them to func together, at most once every interval ms
+    widget: Any
+    interval: int
+    func: Callable[[list], Any]
+    items: list = field(default_factory=list)
+    after_id: str | None = None
+
+    def __call__(self, item: Any):
+        self.items.append(item)
+        if self.interval <= 0:
+            return self.fire()
+
+        if self.after_id is None:
+            self.after_id = self.widget.after(self.interval, self.fire)
+
+    def fire(self):
+        self.after_id = None
+        items, self.items = self.items, list()
+        if items:
+            self.func(items)
+
+    def cancel(self):
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+        self.items = list()
+
+
+@dataclass
+class ChunkedTask:
+    # Steps a generator of (done, total) from Tk's event loop for at most budget seconds per slice, so input and
+    # redraws are handled between slices; progress is reported at most once per progress_interval seconds
+    widget: Any
+    steps: Generator[tuple[int, int], None, None]
+    budget: float = 0.008
+    progress_interval: float = 0.1
+    check_every: int = 32
+    on_progress: Callable[[int, int], None] | None = None
+    on_done: Callable[[bool], None] | None = None
+    after_id: str | None = None
+    reported: float = 0.0
+    done: int = 0
+    total: int = 0
+
+    def start(self, synchronous: bool = False):
+        if synchronous:
+            self.run(budget=inf)
+        else:
+            self.run()
+
+    def run(self, budget: float | None = None):
+        self.after_id = None
+        deadline = perf_counter() + (self.budget if budget is None else budget)
+
+        for self.done, self.total in self.steps:
+            if self.done % self.check_every:
+                continue
+
+            now = perf_counter()
+            if now - self.reported >= self.progress_interval:
+                self.reported = now
+                self.report()
+
+            if now >= deadline:
+                # after(1) rather than after_idle, idle callbacks would starve Tk's own redraws
+                self.after_id = self.widget.after(1, self.run)
+                return
+
+        self.report()
+        if self.on_done:
+            self.on_done(True)
+
+    def report(self):
+        if self.on_progress:
+            self.on_progress(self.done, self.total)
+
+    @property
+    def running(self) -> bool:
+        return self.after_id is not None
+
+    def cancel(self):
+        if self.after_id is None:
+            return
+
+        self.widget.after_cancel(self.after_id)
+        self.after_id = None
+        self.steps.close()
+        if self.on_done:
+            self.on_done(False)
@@ -1,17 +1,37 @@
+import tkinter
+from functools import cache
+
 import polars
 import pytest
 from pytest import Config, Item, Parser
 
 
+@cache
+def has_display() -> bool:
+    try:
+        tkinter.Tk().destroy()
+    except tkinter.TclError:
+        return False
+    return True
+
+
 def pytest_addoption(parser: Parser):
     parser.addoption("--runslow", action="store_true", default=False, help="run slow tests")
 
 
 def pytest_configure(config: Config):
     config.addinivalue_line("markers", "slow: mark test as slow to run")
+    config.addinivalue_line("markers", "display: mark test as opening Tk windows")
 
 
 def pytest_collection_modifyitems(config: Config, items: list[Item]):
+    # Tests that open windows cannot run without a display, their flows are covered headlessly in test_viewer
+    if any("display" in item.keywords for item in items) and not has_display():
+        skip_display = pytest.mark.skip(reason="needs a display")
+        for item in items:
+            if "display" in item.keywords:
+                item.add_marker(skip_display)
+
     if config.getoption("--runslow"):
         # -- runslow given in cli, do not skip slow tests
         return
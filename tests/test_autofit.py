@@ -0,0 +1,43 @@
+import polars
+
+from gui_library.autofit import candidate_strings, column_widths, measurer
+
+
+class FakeFont:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        return "fake_font"
+
+    def measure(self, text: str) -> int:
+        self.calls += 1
+        return len(text) * 7
+
+
+def test_candidate_strings_pick_longest_values():
+    df = polars.DataFrame(
+        {
+            "name": ["a", "bbbbbbbbbb", None, "cc"],
+            "number": [5, -12_345, 7, 100],
+            "ratio": [0.5, 1 / 3, None, 2.0],
+        }
+    )
+
+    candidates = candidate_strings(df, top_k=1)
+
+    assert candidates["name"] == ["bbbbbbbbbb"]
+    assert "-12345" in candidates["number"]
+    assert candidates["ratio"] == [str(1 / 3)]
+
+
+def test_column_widths_measure_through_cache():
+    fake_font = FakeFont()
+    measure = measurer(fake_font)
+    df = polars.DataFrame({"column": ["x" * 20] * 1000})
+
+    widths = column_widths(df, measure=measure, measure_heading=measure)
+    column_widths(df, measure=measure, measure_heading=measure)
+
+    assert widths == {"column": int(20 * 7 * 1.2)}
+    assert fake_font.calls == 2
@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from gui_library.benchmark import SHAPES, compare, headless_operations, main, parse_size, run
+from gui_library.DataFrameViewer import DataFrameViewer
+
+
+@pytest.mark.parametrize("shape", list(SHAPES))
+def test_shapes_have_row_identities(shape: str):
+    df = SHAPES[shape](500)
+    assert df.height == 500
+    assert df.get_column("iid").n_unique() == 500
+    assert {"iid", "parent"} < set(df.columns)
+
+
+def test_headless_run_times_every_operation():
+    result = run([1000], ["nested"], repeat=1, headless=True, report=lambda line: None)
+    assert result["environment"]["mode"] == "headless"
+    assert sorted(key.rsplit("/", 1)[1] for key in result["results"]) == sorted(
+        ["load", "sort", "autofit", "filter_all", "filter_by_column", "expand", "family_tree", "chooser_select"]
+    )
+    assert all(measurement["seconds"] > 0 for measurement in result["results"].values())
+
+
+@pytest.mark.parametrize("virtual", [False, True])
+def test_headless_operations_render_through_the_viewer(monkeypatch: pytest.MonkeyPatch, virtual: bool):
+    # Timings of the headless run are the viewer's own, not a copy of its render
+    rendered: list[int] = list()
+    render = DataFrameViewer.render
+    monkeypatch.setattr(DataFrameViewer, "render", lambda self: rendered.append(self.df.height) or render(self))
+
+    setup, load = headless_operations(SHAPES["flat"](200), virtual)["load"]
+    setup()
+    load()
+    assert rendered == [200]
+
+
+def test_compare_flags_slowdowns_past_the_threshold():
+    baseline = {"results": {"a": {"seconds": 0.1, "peak_mb": 100.0}, "b": {"seconds": 0.001, "peak_mb": None}}}
+    current = {
+        "results": {
+            "a": {"seconds": 0.2, "peak_mb": 300.0},
+            "b": {"seconds": 0.002, "peak_mb": 1.0},
+            "new": {"seconds": 9.0, "peak_mb": None},
+        }
+    }
+
+    # b doubled but by less than the noise floor, new has no baseline to compare against
+    assert compare(current, baseline) == ["a: 100.00 ms -> 200.00 ms", "a: 100.0 MB -> 300.0 MB"]
+    assert compare(current, baseline, threshold=2.5) == []
+
+
+def test_saved_baseline_is_compared_on_the_next_run(tmp_path: Path):
+    baseline = tmp_path.joinpath("baseline.json")
+    arguments = ["--sizes", "1k", "--shapes", "flat", "--operations", "family_tree", "--repeat", "1", "--headless"]
+
+    assert main([*arguments, "--baseline", str(baseline), "--save"]) == 0
+    assert list(json.loads(baseline.read_text())["results"]) == ["headless/flat/1000/family_tree"]
+
+    saved = json.loads(baseline.read_text())
+    saved["results"]["headless/flat/1000/family_tree"]["seconds"] = 0
+    baseline.write_text(json.dumps(saved))
+    assert main([*arguments, "--baseline", str(baseline), "--noise-ms", "0"]) == 1
+
+
+def test_parse_size():
+    assert [parse_size(text) for text in ("1k", "10M", "2500", "1.5k")] == [1000, 10_000_000, 2500, 1500]
@@ -1,8 +1,10 @@
 import polars
+import pytest
 
-from src.gui_library.DataFrameChooser import ChooserController
+from src.gui_library.DataFrameChooser import ChooserController, ChooserModel
 
 
+@pytest.mark.display
 def test_chooser():
     df = polars.DataFrame(
         [
@@ -13,3 +15,21 @@ def test_chooser():
     )
     chooser = ChooserController(dataframe=df)
     chooser.run()
+
+
+def test_chooser_model_toggles_in_place():
+    df = polars.DataFrame({"iid": [str(i) for i in range(1000)], "a": list(range(1000)), "b": [None] * 1000})
+    model = ChooserModel(df=df)
+
+    model.select(("3", "999"))
+    model.select(("3", "5"))
+
+    assert model.df.schema == {**df.schema, "selected": polars.Boolean}
+    assert model.df.filter(polars.col("selected")).get_column("iid").to_list() == ["5", "999"]
+    assert model.get_values("5") == ("", "True")
+    assert model.get_values_batch(("999", "0")) == [("", "True"), ("", "False")]
+
+    # Toggles carry the display strings over to the new frame and only format the flipped rows
+    assert model.display.cached(model.df).keys() == {"b", "selected"}
+    model.select(("0",))
+    assert model.get_values("0") == ("", "True")
@@ -0,0 +1,45 @@
+from gui_library.columns import ColumnWindow
+
+
+def window() -> ColumnWindow:
+    columns = ColumnWindow(width=550, overscan=2)
+    columns.reset(["name", *[f"c{i}" for i in range(100)]])
+    columns.widths = {column: 100 for column in columns.columns}
+    return columns
+
+
+def test_window_projects_the_visible_columns_with_overscan():
+    columns = window()
+
+    assert columns.visible() == ["c0", "c1", "c2", "c3", "c4"]
+    assert columns.needs_projection()
+    assert columns.project() == ["c0", "c1", "c2", "c3", "c4", "c5", "c6"]
+    assert columns.projection()[0] == "name"
+
+    # Scrolls within the overscan keep the projection
+    columns.scroll(2)
+    assert columns.displayed() == ["c2", "c3", "c4", "c5", "c6"] and not columns.needs_projection()
+
+    columns.scroll(1, "pages")
+    assert columns.visible()[0] == "c6" and columns.needs_projection()
+    assert columns.project() == [f"c{i}" for i in range(4, 13)]
+
+    columns.moveto(2.0)
+    assert columns.visible() == ["c99"]
+    assert columns.fractions() == (0.99, 1.0)
+
+
+def test_hidden_and_moved_columns_carry_over_to_frames_that_have_them():
+    columns = window()
+    columns.hide(["c1", "name"])
+    columns.move("c50", 0)
+
+    assert columns.visible() == ["c50", "c0", "c2", "c3", "c4"]
+
+    # New columns go last
+    columns.reset(["name", "c50", "c1", "new", "c0"])
+    assert columns.shown() == ["c50", "c0", "new"]
+    assert columns.projected == [] and columns.widths == dict()
+
+    columns.show(["c1"])
+    assert columns.shown() == ["c50", "c0", "c1", "new"]
@@ -2,6 +2,7 @@
 from pathlib import Path
 
 import polars
+import pytest
 
 from gui_library.DataFrameViewer import DataFrameViewerApp
 
@@ -34,6 +35,7 @@ from gui_library.DataFrameViewer import DataFrameViewerApp
 #
 
 
+@pytest.mark.display
 def test_dataframeviewer_nested_dataset():
     path = Path(__file__).parent.joinpath("test_nested.csv")
 
@@ -52,6 +54,7 @@ def test_dataframeviewer_nested_dataset():
     app.mainloop()
 
 
+@pytest.mark.display
 def test_dataframeviewer_nested_data_filter_all():
     path = Path(__file__).parent.joinpath("test_nested.csv")
 
@@ -68,3 +71,15 @@ def test_dataframeviewer_nested_data_filter_all():
     app.dfv.update_data(df)
     # app.dfv.dfv.update_data(df)
     app.mainloop()
+
+
+@pytest.mark.slow
+@pytest.mark.display
+def test_dataframeviewer_virtual_large_dataset():
+    path = Path(__file__).parent.joinpath("test.csv")
+
+    df = polars.concat([polars.read_csv(path, infer_schema_length=0)] * 200)
+
+    app = DataFrameViewerApp(title="Test Virtual", filters="all", virtual=True)
+    app.dfv.update_data(df)
+    app.mainloop()
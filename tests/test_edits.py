@@ -0,0 +1,126 @@
+import polars
+import pytest
+
+from gui_library.edits import EditJournal, typed_value
+from gui_library.headless import HeadlessTreeview
+from gui_library.model import FilterModel, ViewerModel
+from gui_library.search import SearchIndex
+from gui_library.sorting import SortEngine
+from gui_library.treeview_sync import TreeviewSync
+
+
+def frame() -> polars.DataFrame:
+    return polars.DataFrame(
+        {
+            "iid": ["a", "b", "c"],
+            "parent": ["", "", ""],
+            "name": ["apple", "banana", "cherry"],
+            "count": [3, 1, 2],
+        }
+    )
+
+
+def test_journal_applies_undoes_and_redoes_batches():
+    df = frame()
+    journal = EditJournal()
+
+    assert journal.record(df, "b", "count", "7")
+    assert journal.record(df, "b", "count", "9")
+    assert journal.record(df, "c", "name", "date")
+    assert not journal.record(df, "a", "name", "apple")
+
+    batch = journal.apply(df)
+    assert batch is not None
+    assert batch.rows.to_list() == [1, 2] and sorted(batch.columns) == ["count", "name"]
+    assert batch.frame.get_column("count").to_list() == [3, 9, 2]
+    assert batch.frame.get_column("name").to_list() == ["apple", "banana", "date"]
+    assert df.get_column("count").to_list() == [3, 1, 2]
+
+    assert journal.delta().rows() == [("b", "count", "1", "9"), ("c", "name", "cherry", "date")]
+    assert journal.count == 2
+
+    undone = journal.undo(batch.frame)
+    assert undone is not None and undone.frame.equals(df)
+    assert journal.delta().is_empty()
+    assert journal.count == 0
+
+    redone = journal.redo(undone.frame)
+    assert redone is not None and redone.frame.equals(batch.frame)
+    assert journal.count == 2
+    assert journal.undo(journal.undo(redone.frame).frame) is None  # type: ignore
+
+
+def test_edits_must_fit_the_column():
+    df = frame()
+    journal = EditJournal()
+
+    with pytest.raises(ValueError):
+        journal.record(df, "a", "count", "many")
+    with pytest.raises(ValueError):
+        journal.record(df, "a", "count", "1.5")
+    with pytest.raises(ValueError):
+        journal.record(df, "a", "parent", "b")
+
+    assert typed_value("", polars.Int64) is None
+    assert typed_value("true", polars.Boolean) is True
+    assert journal.apply(df) is None
+
+
+def test_edits_refresh_only_what_they_touch():
+    df = frame()
+    engine = SortEngine()
+    engine.permutation(df, [("count", False)], 1)
+    engine.permutation(df, [("name", False), ("count", True)], 1)
+    engine.permutation(df, [("name", True)], 1)
+
+    engine.forget(["count"])
+    assert list(engine.permutations) == [(("name", True),)]
+    assert sorted(engine.orderings) == [("name", False), ("name", True)]
+
+    index = SearchIndex.build(df)
+    journal = EditJournal()
+    journal.record(df, "a", "name", "kiwi")
+    batch = journal.apply(df)
+    assert batch is not None
+
+    assert index.search("apple").to_list() == [0]
+    updated = index.updated(batch.rows, batch.frame)
+    assert index.search("apple").to_list() == [0]
+    index = updated
+    assert index.search("kiwi").to_list() == [0]
+    assert index.search("apple").to_list() == []
+    assert index.search("cherry").to_list() == [2]
+
+
+def test_viewer_writes_edits_without_a_reload():
+    filter_model = FilterModel(df=frame())
+    viewer = ViewerModel()
+    treeview = HeadlessTreeview()
+    sync = TreeviewSync()
+
+    viewer.load(filter_model.show_data(filter_model.prepare_data(filter_model.df)))  # type: ignore
+    viewer.show_sorted(
+        viewer.sorted_frame(viewer.unsorted_df, viewer.unsorted_positions, viewer.toggle_sort("count"), viewer.version)
+    )
+    viewer.select_where(polars.col("name") == "cherry")
+    sync.update(treeview, viewer.df)
+
+    assert viewer.frame_row("c") == 2
+    assert viewer.record_edit("b", "count", "5")
+    batch = viewer.flush_edits()
+    assert batch is not None
+    filter_model.apply_edits(batch)
+
+    # The sort is applied again, the selection stays and only the edited item is rewritten
+    assert viewer.df.get_column("iid").to_list() == ["b", "a", "c"]
+    assert viewer.selected_rows().get_column("iid").to_list() == ["c"]
+    treeview.operations.clear()
+    sync.update(treeview, viewer.df)
+    assert treeview.operations["item"] == 1 and not treeview.operations["insert"]
+
+    viewer.load(filter_model.filter_results(filter_model.filter_task("banana")))
+    assert viewer.df.get_column("count").to_list() == [5]
+
+    filter_model.apply_edits(viewer.undo())  # type: ignore
+    assert viewer.df.get_column("count").to_list() == [1]
+    assert viewer.journal.delta().is_empty()
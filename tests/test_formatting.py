@@ -0,0 +1,115 @@
+from datetime import date, datetime
+
+import polars
+
+from gui_library.edits import typed_value
+from gui_library.formatting import DisplayCache, DisplayFormat
+from gui_library.model import FilterModel
+from gui_library.predicates import ColumnFilter
+
+
+def frame() -> polars.DataFrame:
+    return polars.DataFrame(
+        {
+            "count": [1234567, -1000, None],
+            "price": [1234.5, -0.004, 2 / 3],
+            "flag": [True, None, False],
+            "day": [date(2024, 1, 2), None, date(2024, 12, 31)],
+            "at": [datetime(2024, 1, 2, 3, 4, 5), datetime(2024, 1, 2, 3, 4, 5, 500_000), None],
+            "tags": [["a", "b"], [], None],
+        }
+    )
+
+
+def test_default_format_reads_like_python():
+    assert DisplayFormat().frame(frame(), frame().columns).rows() == [
+        ("1234567", "1234.5", "True", "2024-01-02", "2024-01-02 03:04:05", "[a, b]"),
+        ("-1000", "-0.004", "", "", "2024-01-02 03:04:05.500", "[]"),
+        ("", "0.6666666666666666", "False", "2024-12-31", "", ""),
+    ]
+
+
+def test_formats_are_configurable_per_dtype():
+    display = DisplayFormat(null="-", float_precision=2, thousands=",", date="%d.%m.%Y", booleans=("no", "yes"))
+
+    assert display.frame(frame(), ["count", "price", "flag", "day"]).rows() == [
+        ("1,234,567", "1,234.50", "yes", "02.01.2024"),
+        ("-1,000", "0.00", "-", "-"),
+        ("-", "0.67", "no", "31.12.2024"),
+    ]
+    assert display.series(polars.Series("x", [float("nan"), 1e30])).to_list() == ["NaN", "1e+30"]
+
+
+def test_cache_formats_each_column_of_a_frame_once():
+    df = frame()
+    cache = DisplayCache(size=2)
+
+    strings = cache.frame(df, ["count", "day"])
+    assert cache.column(df, "count") is cache.strings(df)["count"]
+    assert cache.frame(df, ["day", "count"]).get_column("day").equals(strings.get_column("day"))
+
+    cache.column(df.head(1), "count")
+    cache.column(df.head(2), "count")
+    assert all(cached is not df for cached, _ in cache.frames)
+
+
+def test_edited_and_appended_frames_start_with_the_old_strings():
+    df = frame().select("count", "flag")
+    cache = DisplayCache()
+    cache.frame(df, ["count"])
+
+    edited = df.with_columns(polars.Series("count", [1, 2, 3]))
+    cache.edited(df, edited, polars.Series([1], dtype=polars.UInt32), ["count"])
+    assert cache.cached(edited)["count"].to_list() == ["1234567", "2", ""]
+
+    appended = polars.concat([edited, polars.DataFrame({"count": [7], "flag": [True]})]).slice(1)
+    cache.appended(edited, appended, appended.tail(1), 1)
+    assert cache.cached(appended).keys() == {"count"}
+    assert cache.column(appended, "count").to_list() == ["2", "", "7"]
+
+
+def test_filters_search_the_displayed_text():
+    display = DisplayCache(DisplayFormat(thousands=","))
+    filter_model = FilterModel(df=frame().select("count", "day"), display=display)
+    filter_model.show_data(filter_model.prepare_data(filter_model.df))
+
+    assert filter_model.update_all_filter("234,5").to_list() == [0]  # type: ignore
+    assert filter_model.update_by_column_filter({"count": "-1,0"}).to_list() == [1]  # type: ignore
+
+    # The search text is joined from the cached strings, the column filter shares them with the viewer too
+    assert filter_model.search.display is display  # type: ignore
+    assert display.cached(filter_model.df).keys() == {"iid", "parent", "count", "day"}  # type: ignore
+    column_filter = ColumnFilter(filter_model.df, display)  # type: ignore
+    column_filter.text("count")
+    assert "count" in display.strings(filter_model.df)  # type: ignore
+
+    lazy = FilterModel(df=frame().lazy(), display=display)
+    assert lazy.df.filter(lazy.all_filter_expression("1,234")).collect().height == 1  # type: ignore
+
+
+def test_displayed_text_reads_back_as_the_value():
+    display = DisplayFormat(
+        null="-", float_precision=2, thousands=",", date="%d/%m/%Y", datetime="%d/%m/%Y %H:%M", booleans=("no", "yes")
+    )
+    df = polars.DataFrame(
+        {
+            "count": [1234567, -1000, None],
+            "price": [1234.5, -0.25, 2.0],
+            "flag": [True, None, False],
+            "day": [date(2024, 1, 2), None, date(2024, 12, 31)],
+            "at": [datetime(2024, 1, 2, 3, 4), datetime(2024, 1, 2, 13, 45), None],
+        }
+    )
+
+    texts = display.frame(df, df.columns)
+    for column in df.columns:
+        values = [typed_value(text, df.schema[column], display) for text in texts.get_column(column)]
+        assert values == df.get_column(column).to_list(), column
+
+    column_filter = ColumnFilter(df, DisplayCache(display))
+    assert column_filter.rows({"count": ">-1,000"}).to_list() == [0]  # type: ignore
+    assert column_filter.rows({"flag": "=yes", "day": "<31/12/2024"}).to_list() == [0]  # type: ignore
+    assert column_filter.rows({"at": "02/01/2024 12:00..02/01/2024 14:00"}).to_list() == [1]  # type: ignore
+
+    lazy = FilterModel(df=df.lazy(), filters="by_column", display=DisplayCache(display))
+    assert lazy.df.filter(lazy.by_column_filter_expression({"price": "<=1,234.50"})).collect().height == 3  # type: ignore
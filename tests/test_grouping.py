@@ -0,0 +1,92 @@
+import polars
+import pytest
+
+from gui_library.grouping import GROUP, Grouping
+from gui_library.headless import HeadlessTreeview
+from gui_library.model import collected
+from gui_library.sources import LazyRows, RowView
+from gui_library.treeview_sync import TreeviewSync
+
+
+def frame() -> polars.DataFrame:
+    return polars.DataFrame(
+        {
+            "iid": ["a", "b", "c", "d", "e"],
+            "parent": ["", "", "", "", ""],
+            "city": ["Oslo", "Bergen", "Oslo", "Oslo", "Bergen"],
+            "count": [3, 1, 2, 5, 4],
+            "price": [1.0, 2.0, 3.0, 4.0, 5.0],
+        }
+    )
+
+
+def test_summary_counts_and_aggregates_each_group():
+    grouping = Grouping.build(frame(), ["city"], {"price": "sum", "count": "max"})
+
+    assert grouping.summary.columns == ["iid", "parent", "city", "count", "price", "group count"]
+    assert grouping.summary.rows() == [
+        (f"{GROUP}0", "", "Bergen", 4, 7.0, 2),
+        (f"{GROUP}1", "", "Oslo", 5, 8.0, 3),
+    ]
+    assert grouping.members is None
+    assert grouping.frame([f"{GROUP}0"]).rows() == [
+        (f"{GROUP}0", "", "Bergen", "4", "7.0", "2"),
+        (f"{GROUP}1", "", "Oslo", "5", "8.0", "3"),
+    ]
+
+
+def test_members_read_as_their_own_dtypes():
+    df = frame().with_columns(flag=polars.col("count") > 2)
+    grouping = Grouping.build(df, ["city"], {"count": "mean", "flag": "sum"})
+    grouping.members = grouping.index()
+
+    rows = grouping.frame([f"{GROUP}0"]).select("iid", "count", "flag").rows()
+    assert rows[0] == (f"{GROUP}0", "2.5", "1")
+    assert rows[2:] == [("b", "1", "False"), ("e", "4", "True")]
+
+
+def test_groupings_that_cannot_be_computed():
+    with pytest.raises(ValueError):
+        Grouping.build(frame(), [])
+    with pytest.raises(ValueError):
+        Grouping.build(frame(), ["town"])
+    with pytest.raises(ValueError):
+        Grouping.build(frame(), ["city"], {"price": "median"})
+
+    with pytest.raises(ValueError, match="sum of city"):
+        Grouping.build(frame(), ["count"], {"city": "sum"})
+    assert Grouping.build(frame(), ["count"], {"city": "max"}).aggregates == {"city": "max"}
+
+    # Aggregates of a key column are left out rather than refused
+    assert Grouping.build(frame(), ["city"], {"city": "max"}).aggregates == dict()
+
+
+def test_members_are_inserted_when_their_group_is_opened():
+    df = frame()
+    grouping = Grouping.build(collected(RowView(df, polars.Series([4, 3, 2, 1, 0], dtype=polars.UInt32))), ["city"])
+    treeview = HeadlessTreeview()
+    sync = TreeviewSync(lazy=True)
+    sync.expandable = grouping.groups()
+
+    sync.update(treeview, grouping.frame(sync.expanded))
+    assert treeview.get_children() == (f"{GROUP}0", f"{GROUP}1")
+    assert len(treeview.get_children(f"{GROUP}1")) == 1
+
+    grouping.members = grouping.index()
+    assert sync.open(f"{GROUP}1")
+    sync.update(treeview, grouping.frame(sync.expanded))
+    assert treeview.get_children(f"{GROUP}1") == ("d", "c", "a")
+    assert len(treeview.get_children(f"{GROUP}0")) == 1
+
+
+def test_lazy_sources_are_grouped_in_their_plan():
+    rows = LazyRows.open(frame().drop("iid", "parent").lazy(), page_size=2)
+    grouping = Grouping.build(rows, ["city"], {"price": "sum"})
+
+    assert grouping.summary.drop("iid", "parent").rows() == [("Bergen", None, 7.0, 2), ("Oslo", None, 8.0, 3)]
+    assert not rows.pages
+
+    grouping.members = grouping.index()
+    members = grouping.frame([f"{GROUP}1"]).filter(polars.col("parent") == f"{GROUP}1")
+    assert members.get_column("iid").to_list() == ["0", "2", "3"]
+    assert members.get_column("count").to_list() == ["3", "2", "5"]
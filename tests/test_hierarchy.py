@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import polars
+
+from gui_library.hierarchy import build_hierarchy
+
+
+def test_hierarchy_ancestors_for_nested_dataset():
+    df = polars.read_csv(Path(__file__).parent.joinpath("test_nested.csv")).fill_null(str())
+
+    hierarchy = build_hierarchy(df.get_column("iid"), df.get_column("parent"))
+
+    assert hierarchy.problems() == []
+    assert hierarchy.depth.to_list() == [0, 0, 0, 1, 2, 3, 0, 1, 0, 1]
+    assert hierarchy.ancestors is not None
+    assert hierarchy.ancestors.to_list()[3:6] == [[2], [2, 3], [2, 3, 4]]
+    assert hierarchy.expand(polars.Series([5, 7], dtype=polars.UInt32)).to_list() == [0, 2, 3, 4, 5, 7]
+
+
+def test_hierarchy_expand_without_ancestor_lists():
+    iids = polars.Series(["a", "b", "c", "d", "e"])
+    parents = polars.Series(["", "a", "b", "b", ""])
+
+    hierarchy = build_hierarchy(iids, parents)
+    expected = hierarchy.expand(polars.Series([2, 3], dtype=polars.UInt32)).to_list()
+
+    hierarchy.ancestors = None
+    assert hierarchy.expand(polars.Series([2, 3], dtype=polars.UInt32)).to_list() == expected == [0, 1, 2, 3]
+
+
+def test_hierarchy_reports_cycles_missing_parents_and_duplicates():
+    iids = polars.Series(["a", "b", "c", "d", "e", "f", "g", "g"])
+    parents = polars.Series(["b", "c", "a", "a", "missing", "g", "f", ""])
+
+    hierarchy = build_hierarchy(iids, parents)
+
+    assert hierarchy.missing_parents == ["e"]
+    assert hierarchy.cycles == ["a", "f"]
+    assert hierarchy.duplicates == ["g"]
+    assert hierarchy.parents().to_list() == ["", "c", "a", "a", "", "", "f", ""]
+    assert len(hierarchy.problems()) == 3
+
+
+def test_hierarchy_deep_chain_is_linear():
+    size = 50_000
+    iids = polars.Series([str(i) for i in range(size)])
+    parents = polars.Series([""] + [str(i - 1) for i in range(1, size)])
+
+    hierarchy = build_hierarchy(iids, parents)
+
+    assert hierarchy.max_depth == size - 1
+    assert hierarchy.ancestors is None
+    assert hierarchy.expand(polars.Series([size - 1], dtype=polars.UInt32)).len() == size
@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import polars
+
+from gui_library.headless import HeadlessTreeview
+from gui_library.model import FilterModel, ViewerModel
+from gui_library.treeview_sync import TreeviewSync
+
+
+def test_load_filter_sort_select_without_a_display():
+    df = polars.read_csv(Path(__file__).parent.joinpath("test_nested.csv")).fill_null("")
+    filter_model = FilterModel(df=df, filters="all")
+    viewer = ViewerModel()
+    treeview = HeadlessTreeview()
+    sync = TreeviewSync()
+
+    def render() -> dict[str, int]:
+        treeview.operations.clear()
+        sync.update(treeview, viewer.df)
+        return dict(treeview.operations)
+
+    assert viewer.load(filter_model.show_data(filter_model.prepare_data(df)))
+    assert render() == {"insert": 10}
+
+    viewer.load(filter_model.filter_results(filter_model.filter_task("sixth")))
+    assert viewer.df.get_column("iid").to_list() == ["three", "four", "five", "six"]
+    assert render() == {"detach": 6}
+    assert [iid for iid, *_ in treeview.rows()] == ["three", "four", "five", "six"]
+
+    keys = viewer.toggle_sort("description")
+    assert viewer.show_sorted(viewer.sorted_frame(viewer.unsorted_df, viewer.unsorted_positions, keys, viewer.version))
+    assert viewer.df.get_column("iid").to_list() == ["three", "six", "four", "five"]
+    assert render() == {"detach": 1, "move": 1}
+
+    viewer.select_where(polars.col("tag") == "green")
+    assert viewer.selected_rows().get_column("iid").to_list() == ["four"]
+
+    # Clearing the filter brings the detached items back and keeps both the sort and the selection
+    viewer.load(filter_model.filter_results(filter_model.filter_task("")))
+    assert render() == {"move": 6}
+    assert viewer.df.get_column("description").to_list() == sorted(df.get_column("description"), reverse=True)
+    assert viewer.selected_rows().get_column("iid").to_list() == ["four"]
+
+    viewer.select_all()
+    assert viewer.selection.count == 10
+
+    stale = viewer.sorted_frame(viewer.unsorted_df, viewer.unsorted_positions, keys, viewer.version - 1)
+    assert not viewer.show_sorted(stale)
+
+
+def test_appended_rows_are_filtered_and_evicted_without_a_reload():
+    df = polars.DataFrame({"iid": [f"r{i}" for i in range(6)], "name": ["ok", "bad"] * 3})
+    filter_model = FilterModel(df=df, filters="all")
+    viewer = ViewerModel()
+    treeview = HeadlessTreeview()
+    sync = TreeviewSync()
+
+    filter_model.show_data(filter_model.prepare_data(df))
+    viewer.load(filter_model.filter_results(filter_model.filter_task("ok")))
+    viewer.select_where(polars.col("iid") == "r4")
+    sync.update(treeview, viewer.df)
+
+    chunk = polars.DataFrame({"iid": ["r6", "r7", "r8"], "name": ["ok", "bad", "ok"]})
+    search = filter_model.search
+    result = filter_model.append_rows(chunk, "ok", max_rows=5)
+    assert result is not None and result.evicted == 4
+
+    # A filter still running on the worker keeps reading the index it started with
+    assert search is not None and filter_model.search is not search
+    assert search.search("ok").to_list() == [0, 2, 4]
+    evicted = df.get_column("iid").head(result.evicted)
+
+    treeview.operations.clear()
+    sync.remove(treeview, evicted)
+    sync.append(treeview, viewer.append(result))
+    assert dict(treeview.operations) == {"delete": 2, "insert": 2}
+    assert [iid for iid, *_ in treeview.rows()] == ["r4", "r6", "r8"]
+    assert viewer.selected_rows().get_column("iid").to_list() == ["r4"]
+
+    # The index, the filter and a full update all agree with what was appended
+    assert filter_model.update_all_filter("ok").to_list() == [0, 2, 4]  # type: ignore
+    viewer.load(filter_model.filter_results(filter_model.filter_task("ok")))
+    treeview.operations.clear()
+    sync.update(treeview, viewer.df)
+    assert not treeview.operations
+    assert filter_model.append_rows(chunk.with_columns(parent=polars.lit("r4")), "ok") is None
@@ -0,0 +1,68 @@
+from datetime import date, datetime
+
+import polars
+import pytest
+
+from gui_library.predicates import ColumnFilter, parse_predicate
+
+
+@pytest.fixture
+def df() -> polars.DataFrame:
+    return polars.DataFrame(
+        {
+            "name": ["alpha", "Beta", None, "gamma", "delta"],
+            "count": [5, 12, 100, None, 42],
+            "price": [1.5, 10.0, 99.9, 3.25, None],
+            "day": [date(2024, 1, 1), date(2024, 2, 15), None, date(2024, 3, 1), date(2023, 12, 31)],
+        }
+    )
+
+
+def test_parse_predicate():
+    assert parse_predicate(">=10") == (False, ">=", "10")
+    assert parse_predicate("!foo") == (True, "~", "foo")
+    assert parse_predicate("!=null") == (False, "!=", "null")
+    assert parse_predicate("1..100") == (False, "..", "1..100")
+
+
+@pytest.mark.parametrize(
+    ("patterns", "expected"),
+    [
+        ({"count": ">10"}, [1, 2, 4]),
+        ({"count": "10..50"}, [1, 4]),
+        ({"count": "..12"}, [0, 1]),
+        ({"count": "=null"}, [3]),
+        ({"count": "!=null", "price": "<5"}, [0]),
+        ({"count": "1"}, [1, 2]),
+        ({"count": ">abc"}, []),
+        ({"price": ">=10"}, [1, 2]),
+        ({"day": "2024-01-01..2024-02-28"}, [0, 1]),
+        ({"day": "<2024-01-01"}, [4]),
+        ({"name": "!a"}, [2]),
+        ({"name": "BETA"}, [1]),
+        ({"name": "^.a"}, [3]),
+        ({"name": "a("}, []),
+        ({"name": "="}, None),
+    ],
+)
+def test_column_filter_rows(df: polars.DataFrame, patterns: dict[str, str], expected: list[int] | None):
+    rows = ColumnFilter(df).rows(patterns)
+    assert (rows if rows is None else rows.to_list()) == expected
+
+
+def test_column_filter_caches_string_casts(df: polars.DataFrame):
+    column_filter = ColumnFilter(df)
+    column_filter.rows({"count": "1", "price": ">1"})
+    first = column_filter.strings["count"]
+
+    column_filter.rows({"count": "12"})
+    assert list(column_filter.strings) == ["count"]
+    assert column_filter.strings["count"] is first
+
+
+def test_times_without_an_offset_are_in_the_column_zone():
+    at = polars.Series("at", [datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 15)]).dt.replace_time_zone("Europe/Oslo")
+    column_filter = ColumnFilter(at.to_frame())
+
+    assert column_filter.rows({"at": ">2024-01-01T12:00"}).to_list() == [1]  # type: ignore
+    assert column_filter.rows({"at": "<2024-01-01T12:00+00:00"}).to_list() == [0]  # type: ignore
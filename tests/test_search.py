@@ -0,0 +1,40 @@
+import re
+
+import polars
+import pytest
+
+from gui_library.search import SearchIndex, is_literal
+
+
+@pytest.fixture
+def df() -> polars.DataFrame:
+    return polars.DataFrame(
+        {
+            "name": ["Alpha", "beta", "Gamma ray", None, "alphabet", "delta"],
+            "value": [1, 22, 333, 4444, 55, None],
+        }
+    )
+
+
+def expected(df: polars.DataFrame, pattern: str) -> list[int]:
+    rows = [" ".join(str(value) for value in row if value is not None) for row in df.rows()]
+    return [i for i, row in enumerate(rows) if re.search(pattern, row, re.IGNORECASE)]
+
+
+@pytest.mark.parametrize("max_chars", [0, 1000])
+def test_search_index_matches_regex_scan(df: polars.DataFrame, max_chars: int):
+    index = SearchIndex.build(df, max_chars=max_chars)
+    assert (index.grams is None) == (max_chars == 0)
+
+    for pattern in ["a", "al", "alp", "ALPHA", "alphab", "ph", "zzz", "a 1", "^al", "a$", "4+"]:
+        assert index.search(pattern).to_list() == expected(df, pattern), pattern
+
+
+def test_search_index_narrows_from_recent_results(df: polars.DataFrame):
+    index = SearchIndex.build(df, max_chars=0)
+    index.search("al")
+    assert index.candidates("alph").to_list() == [0, 4]  # type: ignore
+
+    assert index.search("alph") is index.search("ALPH")
+    assert index.search("a(").to_list() == []
+    assert is_literal("a b-c") and not is_literal("a.c")
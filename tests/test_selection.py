@@ -0,0 +1,49 @@
+import polars
+
+from gui_library.selection import SelectionModel
+from gui_library.sources import RowView
+
+
+def positions(*values: int) -> polars.Series:
+    return polars.Series("row", values, dtype=polars.UInt32)
+
+
+def test_selection_model_bulk_operations():
+    selection = SelectionModel()
+    selection.reset(10)
+
+    selection.set(positions(1, 3, 5))
+    assert selection.selected().to_list() == [1, 3, 5]
+
+    selection.toggle(positions(3, 4))
+    assert selection.selected().to_list() == [1, 4, 5]
+    assert selection.is_selected(positions(5, 0, 1)).to_list() == [True, False, True]
+
+    selection.replace(positions(9))
+    assert selection.selected().to_list() == [9]
+    assert selection.count == 1
+
+
+def test_selection_model_grows_with_positions():
+    selection = SelectionModel()
+    assert not selection.is_selected(positions(4)).item()
+
+    selection.set(positions(20))
+    assert selection.mask.len() == 21
+    assert selection.selected().to_list() == [20]
+
+
+def test_row_view_subsets_share_selection_positions():
+    df = polars.DataFrame({"a": [5, 3, 8, 1, 9]})
+    view = RowView.all(df)
+    subset = view.subset(positions(4, 1, 2))
+
+    assert subset.version == view.version
+    assert subset.collect()["a"].to_list() == [9, 3, 8]
+    assert subset.matches(polars.col("a") > 4).to_list() == [True, False, True]
+    assert subset.get_column("a").to_list() == [9, 3, 8]
+
+    selection = SelectionModel()
+    selection.reset(df.height)
+    selection.set(subset.rows.filter(subset.matches(polars.col("a") > 4)))
+    assert df[selection.selected()]["a"].to_list() == [8, 9]
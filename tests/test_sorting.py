@@ -0,0 +1,31 @@
+import polars
+
+from gui_library.sorting import SortEngine
+
+
+def test_sort_engine_matches_polars_sort():
+    df = polars.DataFrame(
+        {
+            "a": [3, 1, None, 1, 3, 2, 2],
+            "b": ["x", "y", "z", "a", "b", "c", None],
+        }
+    )
+    engine = SortEngine()
+
+    single = engine.permutation(df, [("a", True)], version=1)
+    assert df[single].get_column("a").to_list() == df.sort("a", descending=True).get_column("a").to_list()
+
+    multi = engine.permutation(df, [("a", False), ("b", True)], version=1)
+    assert df[multi].rows() == df.sort(["a", "b"], descending=[False, True]).rows()
+
+
+def test_sort_engine_caches_per_version():
+    df = polars.DataFrame({"a": [2, 1, 3]})
+    engine = SortEngine()
+
+    first = engine.permutation(df, [("a", False)], version=1)
+    assert engine.permutation(df, [("a", False)], version=1) is first
+
+    engine.permutation(df, [("a", False)], version=2)
+    assert engine.version == 2
+    assert list(engine.permutations) == [(("a", False),)]
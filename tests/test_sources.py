@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import polars
+import pytest
+
+from gui_library.sources import LazyRows, open_source
+
+
+@pytest.fixture
+def df() -> polars.DataFrame:
+    return polars.DataFrame({"a": [(i * 7) % 25 for i in range(25)], "b": [f"row {i}" for i in range(25)]})
+
+
+def test_open_source_scans_files(df: polars.DataFrame, tmp_path: Path):
+    df.write_parquet(tmp_path.joinpath("data.parquet"))
+    df.write_csv(tmp_path.joinpath("data.csv"))
+
+    for name in ["data.parquet", "data.csv"]:
+        source = open_source(tmp_path.joinpath(name))
+        assert isinstance(source, polars.LazyFrame)
+        assert source.collect().equals(df)
+
+    assert open_source(df) is df
+    with pytest.raises(ValueError):
+        open_source(tmp_path.joinpath("data.xlsx"))
+
+
+def test_lazy_rows_pages_match_eager_slices(df: polars.DataFrame):
+    rows = LazyRows.open(df.lazy(), page_size=4, max_pages=3)
+    eager = df.with_row_index("iid").with_columns(polars.col("iid").cast(polars.String))
+
+    assert rows.height == 25
+    assert rows.columns == ["iid", "a", "b"]
+    assert rows.slice(3, 7).equals(eager.slice(3, 7))
+    assert rows.slice(22, 10).equals(eager.slice(22, 10))
+    assert rows.slice(30, 5).is_empty()
+    assert len(rows.pages) == 3
+
+    ordered = rows.sort([("a", True), ("b", False)])
+    assert ordered.height == rows.height
+    assert ordered.slice(0, 25).equals(eager.sort(["a", "b"], descending=[True, False]))
+
+
+def test_sorted_lazy_rows_page_through_one_sorted_collect(df: polars.DataFrame):
+    rows = LazyRows.open(df.lazy(), page_size=4, max_pages=2)
+    eager = df.with_row_index("iid").with_columns(polars.col("iid").cast(polars.String))
+    expected = eager.sort(["a", "b"], descending=[True, False])
+
+    ordered = rows.sort([("a", True), ("b", False)])
+    assert ordered.ordered is not None and ordered.ordered.equals(expected)
+
+    # Pages never scan the source again, not even those evicted from the cache
+    ordered.lf = polars.LazyFrame().select(polars.col("missing"))
+    assert ordered.slice(21, 4).equals(expected.slice(21, 4))
+    assert ordered.slice(0, 25).equals(expected)
+    assert ordered.slice(5, 6).equals(expected.slice(5, 6))
+    assert ordered.collect().equals(expected)
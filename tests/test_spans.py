@@ -0,0 +1,62 @@
+import json
+import threading
+from pathlib import Path
+
+import polars
+
+from gui_library.spans import NULL_SPAN, SPANS, SpanRecorder, timed
+
+
+def test_spans_nest_per_thread():
+    recorder = SpanRecorder(enabled=True)
+
+    with recorder.span("load", rows=100):
+        with recorder.span("filter") as span:
+            span.rows = 40
+        thread = threading.Thread(target=lambda: recorder.span("worker").__enter__().__exit__(), name="worker")
+        thread.start()
+        thread.join()
+
+    df = recorder.frame()
+    assert df.get_column("name").to_list() == ["load", "filter", "worker"]
+    load, filter, worker = df.iter_rows(named=True)
+    assert (load["parent"], load["depth"]) == (None, 0)
+    assert (filter["parent"], filter["depth"], filter["rows"]) == (load["id"], 1, 40)
+    assert (worker["parent"], worker["thread"]) == (None, "worker")
+    assert load["duration_ms"] >= filter["duration_ms"]
+    assert df.get_column("rows_per_sec").null_count() == 1
+
+
+def test_disabled_spans_record_nothing():
+    recorder = SpanRecorder()
+    with recorder.span("load") as span:
+        span.rows = 5
+
+    assert span is NULL_SPAN
+    assert recorder.frame().is_empty()
+
+
+def test_timed_records_rows_and_exports(tmp_path: Path):
+    @timed(rows=lambda df: df.height)
+    def total(df: polars.DataFrame) -> int:
+        return df.get_column("a").sum()
+
+    df = polars.DataFrame({"a": [1, 2, 3]})
+    SPANS.enabled = True
+    try:
+        assert total(df) == 6
+    finally:
+        SPANS.enabled = False
+
+    assert total(df) == 6
+    spans = SPANS.frame()
+    SPANS.clear()
+    assert spans.select("name", "rows").rows() == [(total.__qualname__, 3)]
+
+    recorder = SpanRecorder(enabled=True)
+    with recorder.span("export", rows=1):
+        pass
+    recorder.write_csv(tmp_path.joinpath("spans.csv"))
+    recorder.write_json(tmp_path.joinpath("spans.json"))
+    assert polars.read_csv(tmp_path.joinpath("spans.csv")).get_column("name").to_list() == ["export"]
+    assert json.loads(tmp_path.joinpath("spans.json").read_text())[0]["name"] == "export"
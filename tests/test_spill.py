@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import polars
+
+from gui_library.headless import HeadlessFilter
+from gui_library.model import FilterModel
+from gui_library.sources import LazyRows, RowView
+from gui_library.spill import SpillStore
+
+
+def test_spill_store_maps_frames_and_cleans_up(tmp_path: Path):
+    df = polars.DataFrame({"a": list(range(100)), "b": [f"row {i}" for i in range(100)]})
+    store = SpillStore(directory=tmp_path, threshold=df.estimated_size())
+
+    assert store.should_spill(df)
+    assert not store.should_spill(df.head(10))
+    assert not store.should_spill(df.lazy())
+    assert SpillStore(directory=tmp_path, spill_lazy=True).should_spill(df.lazy())
+
+    mapped = store.spill(df)
+    streamed = store.spill(df.lazy().filter(polars.col("a") < 10))
+    assert mapped.equals(df)
+    assert streamed.equals(df.head(10))
+    assert len(list(tmp_path.glob("*.arrow"))) == 2
+
+    del mapped, streamed
+    store.close()
+    assert store.paths == []
+    assert list(tmp_path.glob("*.arrow")) == []
+
+
+def test_row_view_gathers_windows_in_view_order():
+    df = polars.DataFrame({"iid": [str(i) for i in range(10)], "a": [5, 3, 8, 1, 9, 2, 7, 0, 6, 4]})
+    view = RowView(df, polars.Series([1, 4, 6, 8], dtype=polars.UInt32))
+
+    assert view.height == 4
+    assert view.slice(1, 2).get_column("iid").to_list() == ["4", "6"]
+    assert view.filter(polars.col("a") > 5).get_column("iid").to_list() == ["4", "6", "8"]
+
+    ordered = view.reorder(df.get_column("a").arg_sort())
+    assert ordered.slice(0).get_column("a").to_list() == [3, 6, 7, 9]
+    assert RowView.all(df).reorder(df.get_column("a").arg_sort()).head().equals(df.sort("a"))
+
+
+def test_only_frames_over_the_threshold_are_spilled(tmp_path: Path):
+    df = polars.DataFrame({"a": list(range(100)), "b": [f"row {i}" for i in range(100)]})
+    store = SpillStore(directory=tmp_path, threshold=df.estimated_size())
+    model = FilterModel(spill=store)
+
+    rows, _, search = model.prepare_data(df.head(10))
+    assert isinstance(rows, RowView) and search is not None
+    rows, _, search = model.prepare_data(df)
+    assert isinstance(rows, RowView) and search is None
+    rows, _, _ = model.prepare_data(df.lazy())
+    assert isinstance(rows, LazyRows)
+    assert len(store.paths) == 1
+
+    del rows
+    store.close()
+
+
+def test_only_spilled_frames_are_shown_virtual(tmp_path: Path):
+    def frame(n: int) -> polars.DataFrame:
+        return polars.DataFrame({"a": list(range(n)), "b": [f"row {i}" for i in range(n)]})
+
+    store = SpillStore(directory=tmp_path, threshold=frame(10).estimated_size())
+
+    # Below the threshold the rows stay in memory and keep their hierarchy
+    small = HeadlessFilter(None, frame(3), iids=["1", "2", "3"], parents=["", "1", ""], spill=store, background=False)
+    assert not small.dfv.virtual and not store.paths
+    assert small.dfv.treeview.get_children() == ("1", "3")
+
+    large = HeadlessFilter(None, frame(100), spill=store, background=False)
+    assert large.dfv.virtual and len(store.paths) == 1
+
+    del small, large
+    store.close()
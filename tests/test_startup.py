@@ -0,0 +1,52 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from gui_library.library import find, locate
+
+# Cumulative microseconds `import gui_library` may take in a fresh interpreter
+IMPORT_BUDGET_US = 50_000
+
+
+def import_times(statement: str) -> dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True
+    )
+    times = dict()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.removeprefix("import time:").split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_stays_within_budget():
+    times = import_times("import gui_library")
+    assert times["gui_library"] < IMPORT_BUDGET_US
+
+
+def loaded(statement: str, modules: list[str]) -> list[str]:
+    check = f"{statement}; import sys; print(*[name for name in {modules!r} if name in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def test_heavy_dependencies_wait_for_first_use():
+    heavy = ["polars", "tkinter", "gui_library.DataFrameViewer"]
+    assert loaded("import gui_library, gui_library.info; gui_library.info.PYPROJECT", heavy) == []
+    assert loaded("from gui_library import show_dataframeviewer", heavy) == heavy
+
+
+def test_locate_resolves_every_name_in_one_walk(tmp_path: Path):
+    start = tmp_path.joinpath("a", "b")
+    start.mkdir(parents=True)
+    tmp_path.joinpath("settings.toml").touch()
+    tmp_path.joinpath("a", "pyproject.toml").touch()
+
+    found = locate(("pyproject.toml", "settings.toml", "missing.txt"), start)
+    assert found == {"pyproject.toml": tmp_path.joinpath("a"), "settings.toml": tmp_path}
+
+    hits = locate.cache_info().hits
+    assert find("__version__.py", tmp_path) == find("__version__.py", tmp_path)
+    assert locate.cache_info().hits == hits + 1
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import polars
+
+from gui_library.status_log import StatusLog
+
+START = datetime(2024, 5, 1, 12, 0, 0)
+
+
+def fill(log: StatusLog, count: int):
+    for i in range(count):
+        log.append(START + timedelta(seconds=i), f"status {i}", "left" if i % 2 else "right", "info.TFrame")
+
+
+def test_status_log_keeps_newest_statuses():
+    log = StatusLog(capacity=5)
+    fill(log, 12)
+
+    df = log.frame()
+    assert len(log) == 5
+    assert df.schema["timestamp"] == polars.Datetime("ns")
+    assert df.get_column("message").to_list() == [f"status {i}" for i in range(7, 12)]
+    assert df.get_column("timestamp").to_list() == [START + timedelta(seconds=i) for i in range(7, 12)]
+    assert df.get_column("side").cast(polars.String).to_list() == ["left", "right", "left", "right", "left"]
+
+
+def test_status_log_time_range():
+    log = StatusLog(capacity=8)
+    fill(log, 11)
+
+    df = log.frame(START + timedelta(seconds=5), START + timedelta(seconds=9))
+    assert df.get_column("message").to_list() == ["status 5", "status 6", "status 7", "status 8"]
+    assert log.frame(START + timedelta(seconds=20)).is_empty()
+
+
+def test_status_log_rolls_over_to_segments(tmp_path: Path):
+    log = StatusLog(capacity=4, directory=tmp_path)
+    fill(log, 10)
+
+    assert len(log.segments) == 2
+    assert log.scan().collect().get_column("message").to_list() == [f"status {i}" for i in range(10)]
+
+    ranged = log.scan(START + timedelta(seconds=3), START + timedelta(seconds=9)).collect()
+    assert ranged.get_column("message").to_list() == [f"status {i}" for i in range(3, 9)]
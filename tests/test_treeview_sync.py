@@ -0,0 +1,180 @@
+import random
+
+import polars
+
+from gui_library.headless import HeadlessTreeview
+from gui_library.treeview_sync import PLACEHOLDER, TreeviewSync, longest_increasing_subsequence
+
+
+def expected_rows(df: polars.DataFrame) -> list[tuple]:
+    # Items hold display strings
+    return [(iid, parent, text, str(value)) for iid, parent, text, value in df.iter_rows()]
+
+
+def test_longest_increasing_subsequence():
+    values = [5, 1, 6, 2, 7, 3, 8]
+    result = [values[i] for i in longest_increasing_subsequence(values)]
+
+    assert result == [1, 2, 3, 8]
+
+
+def test_sync_filter_and_sort_only_touch_changed_items():
+    df = polars.DataFrame(
+        {
+            "iid": [str(i) for i in range(1000)],
+            "parent": [""] * 1000,
+            "name": [f"row {i}" for i in range(1000)],
+            "value": list(range(1000)),
+        }
+    )
+    treeview = HeadlessTreeview()
+    sync = TreeviewSync()
+
+    stats = sync.update(treeview, df)
+    assert stats.inserted == 1000
+    assert treeview.rows() == expected_rows(df)
+
+    narrowed = df.filter(polars.col("value") % 10 != 3)
+    stats = sync.update(treeview, narrowed)
+    assert (stats.inserted, stats.moved, stats.detached) == (0, 0, 100)
+    assert treeview.rows() == expected_rows(narrowed)
+
+    stats = sync.update(treeview, df)
+    assert (stats.inserted, stats.moved, stats.detached) == (0, 100, 0)
+    assert treeview.rows() == expected_rows(df)
+
+    changed = df.with_columns(
+        polars.when(polars.col("value") == 7).then(-7).otherwise(polars.col("value")).alias("value")
+    )
+    stats = sync.update(treeview, changed)
+    assert (stats.updated, stats.operations) == (1, 1)
+    assert treeview.rows() == expected_rows(changed)
+
+    shuffled = df.sample(fraction=1.0, shuffle=True, seed=1)
+    sync.update(treeview, shuffled)
+    assert treeview.rows() == expected_rows(shuffled)
+
+
+def test_sync_keeps_hierarchy_order():
+    rng = random.Random(7)
+    iids = [str(i) for i in range(300)]
+    parents = [""] + [iids[rng.randrange(i)] if rng.random() < 0.8 else "" for i in range(1, 300)]
+    df = polars.DataFrame({"iid": iids, "parent": parents, "name": iids, "value": list(range(300))})
+
+    treeview = HeadlessTreeview()
+    sync = TreeviewSync(keep_detached=False)
+    sync.update(treeview, df)
+
+    for seed in range(5):
+        subset = df.sample(fraction=0.5, seed=seed).sort("value")
+        sync.update(treeview, subset)
+        assert sorted(treeview.rows()) == sorted(
+            (iid, parent if parent in set(subset["iid"]) else "", name, str(value))
+            for iid, parent, name, value in subset.iter_rows()
+        )
+        for parent in set(treeview.children) - {""}:
+            children = treeview.get_children(parent)
+            assert list(children) == [iid for iid in subset["iid"] if iid in children]
+
+
+def test_sync_steps_closed_early_keep_applied_items():
+    df = polars.DataFrame(
+        {"iid": [str(i) for i in range(100)], "parent": [""] * 100, "name": ["row"] * 100, "value": list(range(100))}
+    )
+    treeview = HeadlessTreeview()
+    sync = TreeviewSync()
+
+    steps = sync.steps(treeview, df)
+    for done, total in steps:
+        if done == 30:
+            break
+    steps.close()
+    assert total == 100
+    assert treeview.rows() == expected_rows(df.head(30))
+
+    reversed_df = df.reverse()
+    stats = sync.update(treeview, reversed_df)
+    assert (stats.inserted, stats.moved) == (70, 29)
+    assert treeview.rows() == expected_rows(reversed_df)
+
+
+def test_lazy_sync_inserts_children_when_opened():
+    df = polars.DataFrame(
+        {
+            "iid": ["a", "b", "c", "d", "e"],
+            "parent": ["", "", "a", "c", "b"],
+            "name": ["A", "B", "C", "D", "E"],
+            "value": [1, 2, 3, 4, 5],
+        }
+    )
+    treeview = HeadlessTreeview()
+    sync = TreeviewSync(lazy=True)
+
+    def update(frame: polars.DataFrame, open_paths: bool = False) -> dict[str, int]:
+        treeview.operations.clear()
+        sync.update(treeview, frame, open_paths=open_paths)
+        return dict(treeview.operations)
+
+    # Only the roots go in, each with a placeholder so it can be opened
+    assert update(df) == {"insert": 4}
+    assert [iid for iid, *_ in treeview.rows()] == ["a", PLACEHOLDER + "a", "b", PLACEHOLDER + "b"]
+
+    assert sync.open("a") and not sync.open("a") and not sync.open("d")
+    assert update(df) == {"delete": 1, "insert": 2}
+    assert [iid for iid, *_ in treeview.rows()] == ["a", "c", PLACEHOLDER + "c", "b", PLACEHOLDER + "b"]
+
+    # Sorted so children come before their parents, the parents still go in first
+    assert sync.open("c") and sync.open("b")
+    update(df.reverse())
+    assert treeview.rows() == [
+        ("b", "", "B", "2"),
+        ("e", "b", "E", "5"),
+        ("a", "", "A", "1"),
+        ("c", "a", "C", "3"),
+        ("d", "c", "D", "4"),
+    ]
+
+    sync.close(treeview, "a")
+    assert [iid for iid, *_ in treeview.rows()] == ["b", "e", "a", PLACEHOLDER + "a"]
+    assert sync.expanded == {"b"}
+
+    # A filter's rows are shown with every path to a match opened
+    update(df.filter(polars.col("iid").is_in(["a", "c", "d"])), open_paths=True)
+    assert [iid for iid, *_ in treeview.rows()] == ["a", "c", "d"]
+    assert treeview.opened == {"a", "c"}
+
+    # Clearing the filter closes the paths it opened, the items opened by hand stay open
+    update(df)
+    assert [iid for iid, *_ in treeview.rows()] == ["a", PLACEHOLDER + "a", "b", "e"]
+    assert treeview.opened == set()
+
+
+def test_projected_columns_are_rewritten_in_place():
+    df = polars.DataFrame(
+        {
+            "iid": ["a", "b", "c"],
+            "parent": ["", "", ""],
+            "name": ["A", "B", "C"],
+            "x": [1, 2, 3],
+            "y": [4, 5, 6],
+            "z": [7, 8, 9],
+        }
+    )
+    treeview = HeadlessTreeview()
+    sync = TreeviewSync(projection=["name", "x"])
+
+    sync.update(treeview, df)
+    sync.update(treeview, df.head(2))
+    assert treeview.rows() == [("a", "", "A", "1"), ("b", "", "B", "2")]
+
+    # Items are kept and get the new columns' values, the detached one is dropped rather than rewritten
+    sync.project(treeview, ["name", "z", "y"])
+    treeview.operations.clear()
+    stats = sync.update(treeview, df)
+    assert treeview.rows() == [("a", "", "A", "7", "4"), ("b", "", "B", "8", "5"), ("c", "", "C", "9", "6")]
+    assert (stats.updated, stats.inserted) == (2, 1)
+    assert treeview.operations["delete"] == 0
+
+    treeview.operations.clear()
+    sync.update(treeview, df)
+    assert not treeview.operations
@@ -0,0 +1,295 @@
+import tkinter
+from datetime import datetime
+from typing import Any
+from zoneinfo import ZoneInfo
+
+import polars
+import pytest
+
+from gui_library.DataFrameViewer import DATAFRAMEVIEWER_EDITED, DATAFRAMEVIEWER_SELECTION_CHANGED
+from gui_library.formatting import DisplayFormat
+from gui_library.headless import HeadlessFilter, HeadlessViewer
+from gui_library.StatusBar import StatusBar
+
+
+class HeadlessWidget(dict):
+    # Labels, buttons and the progress bar of a StatusBar, as far as it configures and places them
+    def config(self, **options: Any):
+        self.update(options)
+
+    configure = config
+
+    def grid(self, **options: Any):
+        self["shown"] = True
+
+    def grid_forget(self):
+        self["shown"] = False
+
+    def start(self, interval: int):
+        pass
+
+    def stop(self):
+        pass
+
+
+class HeadlessStatusFrame(tkinter.Frame):
+    def __init__(self, master: Any):
+        pass
+
+    def grid(self, **options: Any):
+        pass
+
+    def rowconfigure(self, *args: Any, **options: Any):
+        pass
+
+    def columnconfigure(self, *args: Any, **options: Any):
+        pass
+
+
+class HeadlessStatusBar(StatusBar, HeadlessStatusFrame):
+    def make_widgets(self):
+        self.left, self.right, self.cancel = HeadlessWidget(), HeadlessWidget(), HeadlessWidget()  # type: ignore
+        self.progress = HeadlessWidget(value=0)  # type: ignore
+        self.regrid()
+
+
+def frame() -> polars.DataFrame:
+    return polars.DataFrame(
+        {
+            "iid": ["a", "b", "c", "d"],
+            "parent": ["", "", "a", ""],
+            "name": ["one", "two", "three", "four"],
+            "count": [1, 2, 3, 4],
+        }
+    )
+
+
+def test_render_inserts_rows_and_reports_progress():
+    progress: list[str] = list()
+    viewer = HeadlessViewer(None, frame(), callback=lambda numerator, denominator, message: progress.append(message))
+
+    assert viewer.rendering is None and not viewer.partial
+    assert progress[-1] == "Finished Updating Treeview"
+    assert viewer.treeview.get_children() == ("a", "b", "d")
+    assert viewer.treeview.item("b") == {"text": "two", "values": ["2"], "tags": "", "open": False}
+    assert viewer.treeview.options["displaycolumns"] == ("count",)
+
+    # Children of a hierarchy are inserted when their parent is opened
+    viewer.treeview.focus("a")
+    viewer.on_treeview_open()
+    assert viewer.treeview.get_children("a") == ("c",)
+
+
+def test_lazy_sources_need_a_virtual_viewer():
+    viewer = HeadlessViewer(None, frame())
+
+    with pytest.raises(TypeError):
+        viewer.update_data(frame().lazy())
+    assert viewer.treeview.get_children() == ("a", "b", "d")
+
+
+def test_selection_syncs_between_treeview_and_model():
+    viewer = HeadlessViewer(None, frame().with_columns(parent=polars.lit("")))
+
+    viewer.treeview.selection_set(["b", "d"])
+    viewer.on_treeview_select()
+    assert viewer.selected_rows().get_column("iid").to_list() == ["b", "d"]
+    assert viewer.events == [DATAFRAMEVIEWER_SELECTION_CHANGED]
+
+    viewer.invert_selection()
+    assert viewer.treeview.selection() == ("a", "c")
+
+    viewer.sort_df("count")
+    assert viewer.treeview.get_children() == ("d", "c", "b", "a")
+    assert set(viewer.treeview.selection()) == {"a", "c"}
+
+
+def test_sorts_and_edits_reuse_the_display_strings(monkeypatch: pytest.MonkeyPatch):
+    df = polars.DataFrame({"iid": [str(i) for i in range(1000)], "name": [f"n{i % 7}" for i in range(1000)]})
+    viewer = HeadlessViewer(None, df.with_columns(parent=polars.lit(""), count=polars.int_range(1000)))
+
+    formatted: list[int] = list()
+    frame = DisplayFormat.frame
+    monkeypatch.setattr(
+        DisplayFormat, "frame", lambda self, df, columns: formatted.append(df.height) or frame(self, df, columns)
+    )
+
+    viewer.sort_df("count")
+    assert viewer.treeview.get_children()[0] == "999"
+    viewer.sort_df("name")
+    assert viewer.treeview.item("999")["values"] == ["999"]  # type: ignore
+    assert formatted == []
+
+    # An edit formats the cells it wrote
+    viewer.write_values("count", ["5", "6"], [50, 60])
+    assert viewer.treeview.item("6")["values"] == ["60"]  # type: ignore
+    assert formatted == [2]
+
+
+def test_selections_reach_children_once_they_are_inserted():
+    viewer = HeadlessViewer(None, frame())
+
+    viewer.select_all()
+    assert viewer.treeview.selection() == ("a", "b", "d")
+
+    viewer.treeview.focus("a")
+    viewer.on_treeview_open()
+    assert set(viewer.treeview.selection()) == {"a", "b", "c", "d"}
+
+
+def test_filters_release_closed_branches_when_asked():
+    kept = HeadlessFilter(None, frame(), background=False)
+    released = HeadlessFilter(None, frame(), background=False, release_closed=True)
+
+    for widget in (kept, released):
+        widget.dfv.treeview.focus("a")
+        widget.dfv.on_treeview_open()
+        assert widget.dfv.treeview.get_children("a") == ("c",)
+        widget.dfv.on_treeview_close()
+
+    assert kept.dfv.treeview.exists("c")
+    assert not released.dfv.treeview.exists("c")
+
+
+def test_virtual_selection_survives_scrolling():
+    df = polars.DataFrame({"iid": [str(i) for i in range(100)], "n": list(range(100))})
+    viewer = HeadlessViewer(None, df, virtual=True, overscan=0)
+    viewer.viewport.resize(height=10)
+    viewer.render_window()
+
+    viewer.select_range(5, 15)
+    assert viewer.treeview.selection() == tuple(str(i) for i in range(5, 10))
+
+    viewer.viewport.scroll(10)
+    viewer.render_window()
+    assert viewer.treeview.get_children() == tuple(str(i) for i in range(10, 20))
+    assert viewer.treeview.selection() == tuple(str(i) for i in range(10, 15))
+    assert viewer.model.selection.count == 10
+
+
+def test_edits_are_written_back_by_column_and_undone():
+    edited: list[int] = list()
+    viewer = HeadlessViewer(None, frame(), on_edit=lambda batch: edited.append(batch.rows.len()))
+
+    viewer.treeview.item("b", values=["20"])
+    viewer.entrypopup_write("b", viewer.treeview.item("b"))  # type: ignore
+    viewer.run_pending()
+
+    assert viewer.model.universe.get_column("count").to_list() == [1, 20, 3, 4]  # type: ignore
+    assert viewer.get_edits().rows() == [("b", "count", "2", "20")]
+    assert viewer.events == [DATAFRAMEVIEWER_EDITED]
+    assert edited == [1]
+
+    # Values the column cannot hold put the item back
+    viewer.treeview.item("b", values=["many"])
+    viewer.entrypopup_write("b", viewer.treeview.item("b"))  # type: ignore
+    assert viewer.treeview.item("b")["values"] == ["20"]  # type: ignore
+
+    viewer.undo()
+    assert viewer.model.universe.get_column("count").to_list() == [1, 2, 3, 4]  # type: ignore
+    assert viewer.treeview.item("b")["values"] == ["2"]  # type: ignore
+
+
+def test_edits_follow_column_moves():
+    df = polars.DataFrame({"iid": ["x", "y"], "name": ["p", "q"], "a": [1, 2], "b": [3, 4], "c": [5, 6]})
+    viewer = HeadlessViewer(None, df)
+    viewer.move_column("c", 0)
+    viewer.hide_columns(["a"])
+
+    columns = list(viewer.treeview["columns"])
+    values = viewer.treeview.item("y")["values"]  # type: ignore
+    values[columns.index("b")] = "40"
+    viewer.treeview.item("y", values=values)
+    viewer.entrypopup_write("y", viewer.treeview.item("y"))  # type: ignore
+
+    assert viewer.get_edits().rows() == [("y", "b", "4", "40")]
+    assert viewer.model.universe.row(1) == ("y", "q", 2, 40, 6)  # type: ignore
+
+
+def test_zoned_datetime_cells_are_edited_in_their_zone():
+    at = polars.Series("at", [datetime(2024, 1, 1, 9)]).dt.replace_time_zone("Europe/Oslo")
+    viewer = HeadlessViewer(None, polars.DataFrame({"iid": ["a"], "name": ["one"], "at": at}))
+
+    viewer.treeview.item("a", values=["2024-01-02 10:30:00"])
+    viewer.entrypopup_write("a", viewer.treeview.item("a"))  # type: ignore
+    viewer.flush_edits()
+    assert viewer.model.universe.get_column("at").to_list() == [  # type: ignore
+        datetime(2024, 1, 2, 10, 30, tzinfo=ZoneInfo("Europe/Oslo"))
+    ]
+    assert viewer.treeview.item("a")["values"] == ["2024-01-02 10:30:00+01:00"]  # type: ignore
+
+    viewer.treeview.item("a", values=["soon"])
+    viewer.entrypopup_write("a", viewer.treeview.item("a"))  # type: ignore
+    assert viewer.treeview.item("a")["values"] == ["2024-01-02 10:30:00+01:00"]  # type: ignore
+
+
+def test_written_values_are_not_journaled():
+    viewer = HeadlessViewer(None, frame().with_columns(parent=polars.lit(""), selected=polars.lit(False)))
+
+    viewer.treeview.item("a", values=["10", "False"])
+    viewer.entrypopup_write("a", viewer.treeview.item("a"))  # type: ignore
+    viewer.write_values("selected", ["a", "c"], [True, True])
+    viewer.flush_edits()
+    assert viewer.model.journal.count == 1
+    assert viewer.treeview.item("c")["values"] == ["3", "True"]  # type: ignore
+
+    viewer.undo()
+    assert viewer.model.universe.get_column("count").to_list() == [1, 2, 3, 4]  # type: ignore
+    assert viewer.model.universe.get_column("selected").to_list() == [True, False, True, False]  # type: ignore
+    assert viewer.get_edits().is_empty()
+
+
+def test_toggles_rewrite_only_their_items():
+    df = polars.DataFrame(
+        {"iid": [str(i) for i in range(1000)], "selected": False, "n": polars.int_range(1000, eager=True)}
+    )
+    viewer = HeadlessViewer(None, df)
+    viewer.sort_df("n")
+    viewer.treeview.operations.clear()
+
+    viewer.write_values("selected", ["3", "999"], [True, True])
+    assert viewer.treeview.operations == {"item": 2}
+    assert viewer.treeview.item("999")["values"] == ["999"]  # type: ignore
+    assert viewer.treeview.item("999")["text"] == "True"  # type: ignore
+
+    # The sync knows the rewritten rows, a render finds nothing to do
+    viewer.render()
+    assert viewer.treeview.operations == {"item": 2}
+
+    # Edits to a sort key move rows, they go through a render
+    viewer.write_values("n", ["3"], [5000])
+    assert viewer.treeview.get_children()[0] == "3"
+
+
+def test_groupings_that_fail_are_reported_and_forgotten():
+    messages: list[str] = list()
+    viewer = HeadlessViewer(None, frame(), on_message=messages.append)
+    viewer.worker.submit = lambda channel, func, *args, on_done, on_error: on_error(ValueError("out of memory"))
+
+    viewer.group_by(["name"], {"count": "sum"})
+    assert viewer.grouped is None
+    assert messages[-1] == "Grouping failed: out of memory"
+
+
+def test_errors_reach_the_status_bar():
+    status_bar = HeadlessStatusBar(None)
+    viewer = HeadlessViewer(None, frame(), callback=status_bar.update_progress, on_message=status_bar.update_status)
+    viewer.worker.submit = lambda channel, func, *args, on_done, on_error: on_error(ValueError("out of memory"))
+
+    # Progress that finished clears the bar, the error stays on the status line
+    viewer.group_by(["name"], {"count": "sum"})
+    assert status_bar.left["text"].endswith("| Grouping failed: out of memory")
+    assert status_bar.status_log.frame().get_column("message").to_list() == ["Grouping failed: out of memory"]
+
+
+def test_appended_rows_are_inserted_and_evicted():
+    viewer = HeadlessViewer(None, frame().with_columns(parent=polars.lit("")), max_rows=5)
+
+    viewer.append_rows(polars.DataFrame({"iid": ["e", "f"], "name": ["five", "six"], "count": [5, 6]}), follow=True)
+    viewer.run_pending()
+
+    assert viewer.treeview.get_children() == ("b", "c", "d", "e", "f")
+    assert not viewer.treeview.exists("a")
+    assert viewer.treeview.item("f")["values"] == ["6"]  # type: ignore
+    assert viewer.treeview.seen == "f"
+    assert viewer.treeview.operations["insert"] == 6
@@ -0,0 +1,33 @@
+from gui_library.viewport import Viewport
+
+
+def test_viewport_window_includes_overscan():
+    viewport = Viewport(total=1_000_000, height=30, overscan=10)
+    viewport.scroll_to(500_000)
+
+    assert viewport.window() == (499_990, 500_040)
+    assert viewport.needs_render()
+
+    viewport.realize()
+    viewport.scroll(5)
+
+    assert not viewport.needs_render()
+
+    viewport.scroll(1, "pages")
+
+    assert viewport.needs_render()
+
+
+def test_viewport_clamps_and_maps_fractions():
+    viewport = Viewport(total=100, height=10)
+
+    viewport.moveto(2.0)
+    assert viewport.offset == 90
+    assert viewport.fractions() == (0.9, 1.0)
+
+    viewport.ensure_visible(3)
+    assert viewport.offset == 3
+
+    viewport.resize(total=5)
+    assert viewport.offset == 0
+    assert viewport.window() == (0, 5)
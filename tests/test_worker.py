@@ -0,0 +1,106 @@
+import time
+
+from gui_library.worker import BackgroundWorker, Batcher, ChunkedTask, Debouncer
+
+
+class FakeWidget:
+    def __init__(self):
+        self.scheduled: dict[str, tuple] = dict()
+
+    def after(self, delay, func, *args):
+        after_id = f"after#{len(self.scheduled)}"
+        self.scheduled[after_id] = (func, args)
+        return after_id
+
+    def after_cancel(self, after_id):
+        del self.scheduled[after_id]
+
+    def run_pending(self):
+        while self.scheduled:
+            after_id = next(iter(self.scheduled))
+            func, args = self.scheduled.pop(after_id)
+            func(*args)
+
+
+def test_worker_drops_stale_generations():
+    widget = FakeWidget()
+    busy: list[bool] = list()
+    results: list[str] = list()
+    worker = BackgroundWorker(widget, on_busy=busy.append)
+
+    for pattern in ["a", "ab", "abc"]:
+        worker.submit("filter", lambda pattern=pattern: time.sleep(0.01) or pattern, on_done=results.append)
+
+    worker.executor.shutdown(wait=True)
+    widget.run_pending()
+
+    assert results == ["abc"]
+    assert busy == [True, False]
+
+
+def test_worker_synchronous_and_debouncer():
+    results: list[int] = list()
+    worker = BackgroundWorker(synchronous=True)
+    worker.submit("sort", sum, [1, 2, 3], on_done=results.append)
+    assert results == [6]
+
+    errors: list[BaseException] = list()
+    worker.submit("sort", sum, ["a"], on_done=results.append, on_error=errors.append)
+    assert results == [6] and isinstance(errors[0], TypeError)
+
+    widget = FakeWidget()
+    debouncer = Debouncer(widget, delay=150, func=results.append)
+    for value in range(5):
+        debouncer(value)
+
+    assert len(widget.scheduled) == 1
+    widget.run_pending()
+    assert results == [6, 4]
+
+
+def test_batcher_hands_over_everything_collected_since_the_last_batch():
+    widget = FakeWidget()
+    batches: list[list[int]] = list()
+    batcher = Batcher(widget, interval=50, func=batches.append)
+    for value in range(1000):
+        batcher(value)
+
+    assert len(widget.scheduled) == 1
+    widget.run_pending()
+    batcher(1000)
+    widget.run_pending()
+    assert [len(batch) for batch in batches] == [1000, 1]
+
+
+def test_chunked_task_runs_in_slices_until_cancelled():
+    widget = FakeWidget()
+    progress: list[int] = list()
+    finished: list[bool] = list()
+
+    def chunked() -> ChunkedTask:
+        return ChunkedTask(
+            widget,
+            ((step + 1, 100) for step in range(100)),
+            budget=0,
+            progress_interval=0,
+            check_every=10,
+            on_progress=lambda done, total: progress.append(done),
+            on_done=finished.append,
+        )
+
+    task = chunked()
+    task.start()
+    assert task.running and progress == [10]
+
+    func, args = widget.scheduled.pop(next(iter(widget.scheduled)))
+    func(*args)
+    assert progress == [10, 20]
+
+    task.cancel()
+    assert not task.running and not widget.scheduled
+    assert finished == [False]
+
+    progress.clear()
+    chunked().start(synchronous=True)
+    assert progress[-1] == 100
+    assert finished == [False, True]